@@ -0,0 +1,63 @@
+"""
+  Benchmark: CPU time per nicolive watch page
+
+  before: parse_ogp_in_nicolive_watch_html
+    + parse_json_ld_in_nicolive_watch_html (two html5lib trees per page)
+  after: parse_nicolive_watch_html
+    (one html5lib tree per page)
+  streaming: parse_nicolive_watch_html(engine='streaming')
+    (html.parser scan over <head>, no DOM)
+
+  python3 -m benchmarks.bench_nicolive_parse
+"""
+
+import time
+
+from liveinfo import nicolive
+
+from .watch_page import build_nicolive_watch_html
+
+
+def parse_twice(html: str) -> None:
+  nicolive.parse_ogp_in_nicolive_watch_html(html=html)
+  nicolive.parse_json_ld_in_nicolive_watch_html(html=html)
+
+
+def parse_once(html: str) -> None:
+  nicolive.parse_nicolive_watch_html(html=html)
+
+
+def parse_streaming(html: str) -> None:
+  nicolive.parse_nicolive_watch_html(html=html, engine='streaming')
+
+
+def measure(func, html: str, repeat: int) -> float:
+  start = time.process_time()
+  for _ in range(repeat):
+    func(html)
+  return (time.process_time() - start) / repeat
+
+
+def main():
+  import argparse
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--body_size', type=int, default=400_000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  html = build_nicolive_watch_html(body_size=args.body_size)
+  print(f'page size: {len(html.encode("utf-8")) / 1024:.1f} KiB')
+
+  before = measure(parse_twice, html, args.repeat)
+  after = measure(parse_once, html, args.repeat)
+  streaming = measure(parse_streaming, html, args.repeat)
+
+  print(f'before (2 parses): {before * 1000:.1f} ms CPU/page')
+  print(f'after  (1 parse):  {after * 1000:.1f} ms CPU/page')
+  print(f'streaming:         {streaming * 1000:.1f} ms CPU/page')
+  print(f'speedup: {before / after:.2f}x')
+  print(f'speedup (streaming): {before / streaming:.2f}x')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,93 @@
+"""
+  Benchmark: CPU time of nicolive.sanitize_filename per description
+
+  before: regex substitution + str.replace + char.encode('cp932') per char
+  after: one cp932 encode for the common case, then str.translate over a
+    lazily cached CP932 table from the first character CP932 cannot encode
+
+  Measured on descriptions with and without such characters (emoji).
+
+  python3 -m benchmarks.bench_sanitize_filename
+"""
+
+import re
+import time
+
+from liveinfo import nicolive
+
+
+description_paragraphs = [
+  '今日はのんびり作業しながら雑談します。',
+  '【告知】次回は10/15(日) 21:00～ 歌枠です！',
+  'BGM: https://example.com/bgm/list?id=123&sort=new',
+  'コメントは気軽にどうぞ♪ 初見さん大歓迎',
+  '※ネタバレ禁止です／リクエストは「#リクエスト」タグで*',
+  '髙橋さん、﨑山さんからのギフトありがとうございます①②③',
+]
+
+
+def build_description(size: int, emoji: bool) -> str:
+  paragraphs = ['今日も配信に来てくれてありがとう😊' if emoji else '']
+  length = 0
+  index = 0
+  while length < size:
+    paragraph = description_paragraphs[index % len(description_paragraphs)]
+    paragraphs.append(paragraph)
+    length += len(paragraph) + 1
+    index += 1
+
+  return '\n'.join(paragraphs).strip()
+
+
+def sanitize_filename_per_char(filename: str) -> str:
+  if filename.startswith(' '):
+    filename = '_' + filename[1:]
+
+  filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+  filename = filename.replace('\xe4', '')
+
+  sanitized = []
+  for char in filename:
+    try:
+      char.encode('cp932')
+      sanitized.append(char)
+    except UnicodeEncodeError:
+      sanitized.append('_')
+
+  return ''.join(sanitized)
+
+
+def measure(func, text: str, repeat: int) -> float:
+  start = time.process_time()
+  for _ in range(repeat):
+    func(text)
+  return (time.process_time() - start) / repeat
+
+
+def main():
+  import argparse
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--description_size', type=int, default=2000)
+  parser.add_argument('--repeat', type=int, default=2000)
+  args = parser.parse_args()
+
+  for emoji in [False, True]:
+    description = build_description(
+      size=args.description_size,
+      emoji=emoji,
+    )
+    print(f'description length: {len(description)} chars, emoji: {emoji}')
+
+    assert nicolive.sanitize_filename(description) == \
+      sanitize_filename_per_char(description)
+
+    before = measure(sanitize_filename_per_char, description, args.repeat)
+    after = measure(nicolive.sanitize_filename, description, args.repeat)
+
+    print(f'  before: {before * 1_000_000:.1f} us CPU/description')
+    print(f'  after:  {after * 1_000_000:.1f} us CPU/description')
+    print(f'  speedup: {before / after:.2f}x')
+
+
+if __name__ == '__main__':
+  main()
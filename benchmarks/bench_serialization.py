@@ -0,0 +1,85 @@
+"""
+  Benchmark: serialization throughput of a large ytlive result
+
+  dataclasses.asdict: the standard library conversion (deep copies)
+  dump_dataclass: the conversion used by --format and the cache
+
+  Each encoder (json, orjson, msgpack) is measured when it is installed.
+
+  python3 -m benchmarks.bench_serialization
+"""
+
+import dataclasses
+import json
+import time
+from typing import Any, Callable
+
+from liveinfo import ytlive
+from liveinfo.serialization import dump_dataclass
+
+from .ytlive_items import build_ytlive_videos_list_response
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+  start = time.process_time()
+  for _ in range(repeat):
+    func()
+  return (time.process_time() - start) / repeat
+
+
+def main():
+  import argparse
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--item_count', type=int, default=10_000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  result = ytlive.build_ytlive_programs_result(
+    videos_list_result=ytlive.build_ytlive_videos_list_result(
+      status_code=200,
+      response=build_ytlive_videos_list_response(
+        item_count=args.item_count,
+      ),
+    ),
+  )
+  item_count = len(result.data.items)
+  print(f'items: {item_count}')
+
+  assert dump_dataclass(result) == dataclasses.asdict(result)
+  value = dump_dataclass(result)
+
+  def report(label: str, seconds: float) -> None:
+    print(
+      f'{label:<24} {seconds * 1000:8.1f} ms'
+      f' {item_count / seconds:12,.0f} items/s'
+    )
+
+  report('dataclasses.asdict', measure(
+    lambda: dataclasses.asdict(result), args.repeat,
+  ))
+  report('dump_dataclass', measure(
+    lambda: dump_dataclass(result), args.repeat,
+  ))
+
+  report('encode json', measure(
+    lambda: json.dumps(value, ensure_ascii=False, separators=(',', ':')),
+    args.repeat,
+  ))
+
+  try:
+    import orjson
+    report('encode orjson', measure(lambda: orjson.dumps(value), args.repeat))
+  except ImportError:
+    print('encode orjson: not installed')
+
+  try:
+    import msgpack
+    report('encode msgpack', measure(
+      lambda: msgpack.packb(value, use_bin_type=True), args.repeat,
+    ))
+  except ImportError:
+    print('encode msgpack: not installed')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,119 @@
+"""
+  Fixtures of the benchmark suite
+
+  Synthesized, not recorded from the live services: the builders are
+  deterministic, so every run parses the same bytes, and each fixture is
+  sized like the real response.
+
+    nicolive_watch_on_air.html       watch page of a program on air (400 KB)
+    nicolive_watch_ended.html        watch page of an ended program (400 KB)
+    nicolive_watch_not_found.html    not found page (100 KB)
+    nicolive_watch_maintenance.html  maintenance page (no site chrome)
+    ytlive_search_list_{1,10,50}.json
+    ytlive_videos_list_{1,10,50}.json  (50: max ids per request)
+
+  Recorded responses can replace them: files with the same names in
+  --fixtures_dir are used instead. The suite stores the SHA-256 of every
+  fixture with the results, so runs with different fixtures are not
+  compared.
+
+  python3 -m benchmarks.fixtures --write /tmp/liveinfo-fixtures
+"""
+
+import hashlib
+import json
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from .watch_page import build_nicolive_error_html, build_nicolive_watch_html
+from .ytlive_items import (
+  build_ytlive_search_list_response, build_ytlive_videos_list_response,
+)
+
+
+ytlive_result_sizes = (1, 10, 50)
+
+
+def build_fixture_builders() -> Dict[str, Callable[[], str]]:
+  builders: Dict[str, Callable[[], str]] = {
+    'nicolive_watch_on_air.html': lambda: build_nicolive_watch_html(
+      body_size=400_000,
+      is_live=True,
+    ),
+    'nicolive_watch_ended.html': lambda: build_nicolive_watch_html(
+      body_size=400_000,
+      is_live=False,
+    ),
+    'nicolive_watch_not_found.html': lambda: build_nicolive_error_html(
+      title='番組が見つかりません',
+      message='お探しの番組は削除されたか、URLが間違っている可能性があります。',
+      body_size=100_000,
+    ),
+    'nicolive_watch_maintenance.html': lambda: build_nicolive_error_html(
+      title='メンテナンス中',
+      message='現在メンテナンス中です。しばらくお待ちください。',
+      body_size=0,
+    ),
+  }
+
+  for size in ytlive_result_sizes:
+    builders[f'ytlive_search_list_{size}.json'] = partial(
+      build_json_fixture,
+      build_response=build_ytlive_search_list_response,
+      item_count=size,
+    )
+    builders[f'ytlive_videos_list_{size}.json'] = partial(
+      build_json_fixture,
+      build_response=build_ytlive_videos_list_response,
+      item_count=size,
+    )
+
+  return builders
+
+
+def build_json_fixture(
+  build_response: Callable[[int], Dict[str, Any]],
+  item_count: int,
+) -> str:
+  return json.dumps(build_response(item_count), ensure_ascii=False)
+
+
+def load_fixtures(
+  fixtures_dir: Optional[Path] = None,
+) -> Dict[str, str]:
+  # fixture name -> text
+  fixtures: Dict[str, str] = {}
+  for name, build in build_fixture_builders().items():
+    path = fixtures_dir / name if fixtures_dir is not None else None
+    if path is not None and path.exists():
+      fixtures[name] = path.read_text(encoding='utf-8')
+    else:
+      fixtures[name] = build()
+
+  return fixtures
+
+
+def get_fixture_digest(text: str) -> str:
+  return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def main():
+  import argparse
+  parser = argparse.ArgumentParser()
+  parser.add_argument(
+    '--write', type=Path, required=True,
+    help='directory to write the synthesized fixtures to',
+  )
+  args = parser.parse_args()
+
+  fixtures_dir: Path = args.write
+  fixtures_dir.mkdir(parents=True, exist_ok=True)
+
+  for name, text in load_fixtures().items():
+    (fixtures_dir / name).write_text(text, encoding='utf-8')
+    print(f'{name}: {len(text.encode("utf-8")) / 1024:.1f} KiB')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,398 @@
+"""
+  Benchmark suite: parse throughput over fixed fixtures (benchmarks.fixtures)
+
+    parse_ogp_in_nicolive_watch_html[page]
+    parse_json_ld_in_nicolive_watch_html[page]
+    parse_nicolive_watch_html_streaming[page]
+      page: on_air, ended, not_found, maintenance
+    get_ytlive_programs[N]
+      search.list and videos.list of N items from an in-memory client
+      (JSON decoding and item construction, no network)
+    build_ytlive_videos_list_result[N]
+      item construction from a decoded videos.list response
+    sanitize_filename[description]
+    sanitize_filename[description_emoji]
+      the JSON-LD description of the on-air page, without and with a
+      character CP932 can not encode
+
+  Each case is timed in rounds of at least --min_time seconds (gc
+  disabled). The results are written as JSON with the environment, the
+  git commit and the SHA-256 of each fixture, by default to
+  benchmarks/results/<time>.json, so that later runs can be compared:
+
+  python3 -m benchmarks.suite
+  python3 -m benchmarks.suite --compare benchmarks/results/<time>.json
+
+  --compare prints the change of the median time per case and exits with
+  status 1 when a case got slower than --threshold (10%).
+"""
+
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from functools import partial
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from liveinfo import __VERSION__, nicolive, ytlive
+
+from .fixtures import get_fixture_digest, load_fixtures, ytlive_result_sizes
+
+
+nicolive_watch_pages = ['on_air', 'ended', 'not_found', 'maintenance']
+
+
+@dataclass
+class BenchmarkCase:
+  name: str
+  fixtures: List[str]  # fixture names
+  input_bytes: int  # bytes processed per call
+  func: Callable[[], Any]
+
+
+@dataclass
+class BenchmarkResult:
+  name: str
+  fixtures: List[str]
+  fixture_sha256: str  # of the fixtures, in order
+  input_bytes: int
+  loops: int  # calls per round
+  rounds: List[float]  # seconds per call
+  best: float
+  median: float
+  calls_per_second: float
+  megabytes_per_second: float
+
+
+class FixtureResponse:
+  def __init__(self, text: str):
+    self.status_code = 200
+    self.headers: Dict[str, str] = {}
+    self.text = text
+
+  @property
+  def content(self) -> bytes:
+    return self.text.encode('utf-8')
+
+  def json(self) -> Any:
+    return json.loads(self.text)
+
+  def close(self) -> None:
+    pass
+
+
+class FixtureClient:
+  # Serves search.list and videos.list responses from fixtures
+  def __init__(self, search_list_text: str, videos_list_text: str):
+    self.search_list_text = search_list_text
+    self.videos_list_text = videos_list_text
+
+  def get(
+    self,
+    url: str,
+    headers: Dict[str, str],
+    params: Optional[Dict[str, str]] = None,
+    stream: bool = False,
+  ) -> FixtureResponse:
+    if url == ytlive.search_api_url:
+      return FixtureResponse(self.search_list_text)
+
+    return FixtureResponse(self.videos_list_text)
+
+
+def build_cases(fixtures: Dict[str, str]) -> List[BenchmarkCase]:
+  cases: List[BenchmarkCase] = []
+
+  def get_size(fixture: str) -> int:
+    return len(fixtures[fixture].encode('utf-8'))
+
+  for page in nicolive_watch_pages:
+    fixture = f'nicolive_watch_{page}.html'
+    html = fixtures[fixture]
+
+    cases.extend([
+      BenchmarkCase(
+        name=f'parse_ogp_in_nicolive_watch_html[{page}]',
+        fixtures=[fixture],
+        input_bytes=get_size(fixture),
+        func=partial(nicolive.parse_ogp_in_nicolive_watch_html, html=html),
+      ),
+      BenchmarkCase(
+        name=f'parse_json_ld_in_nicolive_watch_html[{page}]',
+        fixtures=[fixture],
+        input_bytes=get_size(fixture),
+        func=partial(
+          nicolive.parse_json_ld_in_nicolive_watch_html,
+          html=html,
+        ),
+      ),
+      BenchmarkCase(
+        name=f'parse_nicolive_watch_html_streaming[{page}]',
+        fixtures=[fixture],
+        input_bytes=get_size(fixture),
+        func=partial(
+          nicolive.parse_nicolive_watch_html,
+          html=html,
+          engine='streaming',
+        ),
+      ),
+    ])
+
+  for size in ytlive_result_sizes:
+    search_list_fixture = f'ytlive_search_list_{size}.json'
+    videos_list_fixture = f'ytlive_videos_list_{size}.json'
+    client = FixtureClient(
+      search_list_text=fixtures[search_list_fixture],
+      videos_list_text=fixtures[videos_list_fixture],
+    )
+    videos_list_response = json.loads(fixtures[videos_list_fixture])
+
+    cases.extend([
+      BenchmarkCase(
+        name=f'get_ytlive_programs[{size}]',
+        fixtures=[search_list_fixture, videos_list_fixture],
+        input_bytes=get_size(search_list_fixture) +
+        get_size(videos_list_fixture),
+        func=partial(
+          ytlive.get_ytlive_programs,
+          channel_id='UC0000000000000000000000',
+          useragent='benchmark',
+          api_key='benchmark',
+          client=client,  # type: ignore
+        ),
+      ),
+      BenchmarkCase(
+        name=f'build_ytlive_videos_list_result[{size}]',
+        fixtures=[videos_list_fixture],
+        input_bytes=get_size(videos_list_fixture),
+        func=partial(
+          ytlive.build_ytlive_videos_list_result,
+          status_code=200,
+          response=videos_list_response,
+        ),
+      ),
+    ])
+
+  fixture = 'nicolive_watch_on_air.html'
+  json_ld_result = nicolive.parse_json_ld_in_nicolive_watch_html(
+    html=fixtures[fixture],
+    sanitize=False,
+  )
+  assert json_ld_result.result_type == 'success'
+  description = json_ld_result.data.description
+  assert description is not None
+
+  for name, text in [
+    ('description', description),
+    ('description_emoji', '😊' + description),
+  ]:
+    cases.append(
+      BenchmarkCase(
+        name=f'sanitize_filename[{name}]',
+        fixtures=[fixture],
+        input_bytes=len(text.encode('utf-8')),
+        func=partial(nicolive.sanitize_filename, text),
+      )
+    )
+
+  return cases
+
+
+def time_case(
+  func: Callable[[], Any],
+  min_time: float,
+  rounds: int,
+) -> Dict[str, Any]:
+  def run(loops: int) -> float:
+    gc.collect()
+    gc.disable()
+    try:
+      start = time.perf_counter()
+      for _ in range(loops):
+        func()
+      return time.perf_counter() - start
+    finally:
+      gc.enable()
+
+  # calls per round so that a round takes at least min_time
+  loops = 1
+  while True:
+    elapsed = run(loops)
+    if elapsed >= min_time:
+      break
+    loops *= 2 if elapsed <= 0 else max(2, int(min_time / elapsed) + 1)
+
+  return {
+    'loops': loops,
+    'rounds': [run(loops) / loops for _ in range(rounds)],
+  }
+
+
+def run_case(
+  case: BenchmarkCase,
+  fixtures: Dict[str, str],
+  min_time: float,
+  rounds: int,
+) -> BenchmarkResult:
+  timing = time_case(func=case.func, min_time=min_time, rounds=rounds)
+  round_times: List[float] = timing['rounds']
+  median = statistics.median(round_times)
+
+  return BenchmarkResult(
+    name=case.name,
+    fixtures=case.fixtures,
+    fixture_sha256=get_fixture_digest(
+      ''.join(fixtures[fixture] for fixture in case.fixtures),
+    ),
+    input_bytes=case.input_bytes,
+    loops=timing['loops'],
+    rounds=round_times,
+    best=min(round_times),
+    median=median,
+    calls_per_second=1.0 / median,
+    megabytes_per_second=case.input_bytes / median / 1_000_000,
+  )
+
+
+def get_git_commit() -> Optional[str]:
+  try:
+    return subprocess.run(
+      ['git', 'rev-parse', 'HEAD'],
+      capture_output=True,
+      check=True,
+      text=True,
+      cwd=Path(__file__).parent,
+    ).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def get_environment() -> Dict[str, Any]:
+  from importlib.metadata import PackageNotFoundError, version
+
+  packages: Dict[str, Optional[str]] = {}
+  for package in ['beautifulsoup4', 'html5lib']:
+    try:
+      packages[package] = version(package)
+    except PackageNotFoundError:
+      packages[package] = None
+
+  return {
+    'liveinfo': __VERSION__,
+    'git_commit': get_git_commit(),
+    'python': platform.python_version(),
+    'implementation': platform.python_implementation(),
+    'platform': platform.platform(),
+    'machine': platform.machine(),
+    'packages': packages,
+  }
+
+
+def compare_results(
+  baseline: Dict[str, Any],
+  results: List[BenchmarkResult],
+  threshold: float,
+) -> bool:
+  # Prints the change per case; True if any case regressed
+  baseline_cases = {case['name']: case for case in baseline['cases']}
+  regressed = False
+
+  print(f'compared with {baseline["created_at"]} '
+        f'({baseline["environment"]["git_commit"]})')
+
+  for result in results:
+    baseline_case = baseline_cases.get(result.name)
+    if baseline_case is None:
+      print(f'  {result.name}: new')
+      continue
+
+    if baseline_case['fixture_sha256'] != result.fixture_sha256:
+      print(f'  {result.name}: fixture changed, not compared')
+      continue
+
+    change = result.median / baseline_case['median'] - 1.0
+    mark = ''
+    if change > threshold:
+      mark = '  REGRESSION'
+      regressed = True
+    elif change < -threshold:
+      mark = '  improved'
+
+    print(f'  {result.name}: {baseline_case["median"] * 1000:.3f} ms -> '
+          f'{result.median * 1000:.3f} ms ({change:+.1%}){mark}')
+
+  return regressed
+
+
+def main():
+  import argparse
+  parser = argparse.ArgumentParser()
+  parser.add_argument(
+    '--fixtures_dir', type=Path,
+    help='recorded fixtures to use instead of the synthesized ones',
+  )
+  parser.add_argument('--output', type=Path)
+  parser.add_argument('--compare', type=Path, help='baseline results')
+  parser.add_argument('--threshold', type=float, default=0.10)
+  parser.add_argument('--filter', type=str, help='run cases containing it')
+  parser.add_argument('--min_time', type=float, default=0.2)
+  parser.add_argument('--rounds', type=int, default=5)
+  args = parser.parse_args()
+
+  fixtures = load_fixtures(fixtures_dir=args.fixtures_dir)
+  cases = [
+    case for case in build_cases(fixtures=fixtures)
+    if args.filter is None or args.filter in case.name
+  ]
+
+  created_at = datetime.now(tz=timezone.utc)
+  results: List[BenchmarkResult] = []
+  for case in cases:
+    result = run_case(
+      case=case,
+      fixtures=fixtures,
+      min_time=args.min_time,
+      rounds=args.rounds,
+    )
+    results.append(result)
+
+    print(f'{result.name}: {result.median * 1000:.3f} ms '
+          f'({result.calls_per_second:.1f} calls/s, '
+          f'{result.megabytes_per_second:.2f} MB/s)')
+
+  output: Optional[Path] = args.output
+  if output is None:
+    output = Path(__file__).parent / 'results' / \
+      f'{created_at.strftime("%Y%m%dT%H%M%SZ")}.json'
+  output.parent.mkdir(parents=True, exist_ok=True)
+  output.write_text(
+    json.dumps(
+      {
+        'created_at': created_at.isoformat(),
+        'environment': get_environment(),
+        'cases': [asdict(result) for result in results],
+      },
+      indent=2,
+    ) + '\n',
+    encoding='utf-8',
+  )
+  print(f'results: {output}')
+
+  if args.compare is not None:
+    baseline = json.loads(args.compare.read_text(encoding='utf-8'))
+    if compare_results(
+      baseline=baseline,
+      results=results,
+      threshold=args.threshold,
+    ):
+      sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,68 @@
+import json
+
+
+filler = (
+  '<div class="___program-item___"><a href="/watch/lv1">'
+  '<span>関連番組タイトル</span></a><p>説明文説明文説明文</p></div>\n'
+)
+
+
+def build_filler_body(body_size: int) -> str:
+  return filler * (body_size // len(filler.encode('utf-8')) + 1)
+
+
+def build_nicolive_watch_html(
+  body_size: int = 400_000,
+  is_live: bool = True,  # False: an ended program
+) -> str:
+  json_ld = {
+    '@context': 'https://schema.org',
+    '@type': 'VideoObject',
+    'name': '【雑談】まったり作業配信 #123',
+    'description': '今日はのんびり作業しながら雑談します。' * 20,
+    'thumbnailUrl': [
+      'https://secure-dcdn.cdn.nimg.jp/nicoaccount/usericon/1234/12345678.jpg',
+    ],
+    'publication': {
+      '@type': 'BroadcastEvent',
+      'isLiveBroadcast': is_live,
+      'startDate': '2023-10-01T21:00:00+09:00',
+      'endDate': '2023-10-01T23:00:00+09:00',
+    },
+  }
+
+  body = build_filler_body(body_size=body_size)
+
+  return (
+    '<!DOCTYPE html>\n'
+    '<html lang="ja"><head>\n'
+    '<meta charset="utf-8">\n'
+    '<title>【雑談】まったり作業配信 #123 - ニコニコ生放送</title>\n'
+    '<meta property="og:title" content="【雑談】まったり作業配信 #123">\n'
+    '<meta property="og:url" '
+    'content="https://live.nicovideo.jp/watch/lv339313375">\n'
+    '<script type="application/ld+json">'
+    f'{json.dumps(json_ld, ensure_ascii=False)}'
+    '</script>\n'
+    '</head>\n'
+    f'<body>\n{body}</body></html>\n'
+  )
+
+
+def build_nicolive_error_html(
+  title: str,
+  message: str,
+  body_size: int,
+) -> str:
+  # An error page (not found, maintenance) without og:url and JSON-LD
+  body = build_filler_body(body_size=body_size) if body_size > 0 else ''
+
+  return (
+    '<!DOCTYPE html>\n'
+    '<html lang="ja"><head>\n'
+    '<meta charset="utf-8">\n'
+    f'<title>{title} - ニコニコ生放送</title>\n'
+    '<meta property="og:title" content="ニコニコ生放送">\n'
+    '</head>\n'
+    f'<body>\n<h1>{title}</h1>\n<p>{message}</p>\n{body}</body></html>\n'
+  )
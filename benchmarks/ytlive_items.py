@@ -0,0 +1,78 @@
+from typing import Any, Dict
+
+
+def build_ytlive_videos_list_response(
+  item_count: int = 10_000,
+) -> Dict[str, Any]:
+  return {
+    'items': [
+      {
+        'id': f'video{index:07d}',
+        'snippet': {
+          'channelId': 'UC0000000000000000000000',
+          'channelTitle': '作業配信チャンネル',
+          'title': f'【雑談】まったり作業配信 #{index}',
+          'description': '今日はのんびり作業しながら雑談します。' * 10,
+          'liveBroadcastContent': 'none',
+          'thumbnails': {
+            size: {
+              'url': f'https://i.ytimg.com/vi/video{index:07d}/{size}.jpg',
+              'width': width,
+              'height': height,
+            }
+            for size, width, height in [
+              ('default', 120, 90),
+              ('medium', 320, 180),
+              ('high', 480, 360),
+              ('standard', 640, 480),
+              ('maxres', 1280, 720),
+            ]
+          },
+        },
+        'status': {
+          'uploadStatus': 'processed',
+          'privacyStatus': 'public',
+        },
+        'liveStreamingDetails': {
+          'actualStartTime': '2023-10-01T12:00:00Z',
+          'actualEndTime': '2023-10-01T14:00:00Z',
+          'scheduledStartTime': '2023-10-01T12:00:00Z',
+        },
+      }
+      for index in range(item_count)
+    ],
+  }
+
+
+def build_ytlive_search_list_response(
+  item_count: int = 50,
+) -> Dict[str, Any]:
+  return {
+    'nextPageToken': 'CDIQAA',
+    'items': [
+      {
+        'id': {'videoId': f'video{index:07d}'},
+        'snippet': {
+          'publishedAt': '2023-10-01T12:00:00Z',
+          'channelId': 'UC0000000000000000000000',
+          'channelTitle': '作業配信チャンネル',
+          'title': f'【雑談】まったり作業配信 #{index}',
+          'description': '今日はのんびり作業しながら雑談します。',
+          'liveBroadcastContent': 'none',
+          'thumbnails': {
+            size: {
+              'url': f'https://i.ytimg.com/vi/video{index:07d}/{size}.jpg',
+              'width': width,
+              'height': height,
+            }
+            for size, width, height in [
+              ('default', 120, 90),
+              ('medium', 320, 180),
+              ('high', 480, 360),
+            ]
+          },
+        },
+      }
+      for index in range(item_count)
+    ],
+  }
@@ -1,11 +1,99 @@
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
 __VERSION__ = '0.0.0'
 
 
-from . import nicolive
-from . import cli
+if TYPE_CHECKING:
+  from . import aio
+  from . import cache
+  from . import cli
+  from . import client
+  from . import liveinfo
+  from . import metrics
+  from . import nicolive
+  from . import output
+  from . import ratelimit
+  from . import resilience
+  from . import serialization
+  from . import singleflight
+  from . import watch
+  from . import ytlive
+  from .liveinfo import (
+    get_live_program, aget_live_program,
+    get_live_program_result, aget_live_program_result,
+    iter_live_program_results,
+  )
+  from .client import LiveInfoClient
+  from .aio import AsyncLiveInfoClient
+  from .cache import LiveProgramCache
+  from .singleflight import SingleFlight
+
+
+# Submodules are imported on first access (PEP 562),
+# so that `import liveinfo` does not load bs4, html5lib or requests
+_lazy_attributes = {
+  'aio': ('.aio', None),
+  'cache': ('.cache', None),
+  'cli': ('.cli', None),
+  'client': ('.client', None),
+  'liveinfo': ('.liveinfo', None),
+  'metrics': ('.metrics', None),
+  'nicolive': ('.nicolive', None),
+  'output': ('.output', None),
+  'ratelimit': ('.ratelimit', None),
+  'resilience': ('.resilience', None),
+  'serialization': ('.serialization', None),
+  'singleflight': ('.singleflight', None),
+  'watch': ('.watch', None),
+  'ytlive': ('.ytlive', None),
+  'get_live_program': ('.liveinfo', 'get_live_program'),
+  'aget_live_program': ('.liveinfo', 'aget_live_program'),
+  'get_live_program_result': ('.liveinfo', 'get_live_program_result'),
+  'aget_live_program_result': ('.liveinfo', 'aget_live_program_result'),
+  'iter_live_program_results': ('.liveinfo', 'iter_live_program_results'),
+  'LiveInfoClient': ('.client', 'LiveInfoClient'),
+  'AsyncLiveInfoClient': ('.aio', 'AsyncLiveInfoClient'),
+  'LiveProgramCache': ('.cache', 'LiveProgramCache'),
+  'SingleFlight': ('.singleflight', 'SingleFlight'),
+}
+
+
+def __getattr__(name: str) -> Any:
+  lazy_attribute = _lazy_attributes.get(name)
+  if lazy_attribute is None:
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+  module_name, attribute_name = lazy_attribute
+  module = import_module(module_name, __name__)
+  value = module if attribute_name is None else getattr(module, attribute_name)
+
+  globals()[name] = value
+  return value
 
 
 __all__ = [
-  'nicolive',
+  'aio',
+  'cache',
   'cli',
+  'client',
+  'liveinfo',
+  'metrics',
+  'nicolive',
+  'output',
+  'ratelimit',
+  'resilience',
+  'serialization',
+  'singleflight',
+  'watch',
+  'ytlive',
+  'get_live_program',
+  'aget_live_program',
+  'get_live_program_result',
+  'aget_live_program_result',
+  'iter_live_program_results',
+  'LiveInfoClient',
+  'AsyncLiveInfoClient',
+  'LiveProgramCache',
+  'SingleFlight',
 ]
@@ -0,0 +1,205 @@
+import contextlib
+from dataclasses import dataclass
+from typing import (
+  TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Mapping, Optional,
+)
+from urllib.parse import urlparse
+
+from .client import Timeout, default_timeout
+from .ratelimit import RateLimiter, get_retry_after
+from .resilience import CircuitBreaker, RetryPolicy
+
+if TYPE_CHECKING:
+  import aiohttp
+
+
+"""
+  Public APIs
+
+  Requires the optional dependency aiohttp:
+    pip3 install aoirint_liveinfo[async]
+"""
+
+
+@dataclass
+class AsyncLiveInfoResponse:
+  status_code: int
+  headers: Mapping[str, str]
+  text: str
+
+
+class AsyncLiveInfoClient:
+  def __init__(
+    self,
+    limit: int = 100,  # max connections in the pool
+    limit_per_host: int = 0,  # 0: unlimited
+    keepalive_timeout: float = 15.0,
+    session: Optional['aiohttp.ClientSession'] = None,
+    timeout: Optional[Timeout] = default_timeout,
+    retry: Optional[RetryPolicy] = None,  # None: no retry
+    circuit_breaker: Optional[CircuitBreaker] = None,
+    rate_limiter: Optional[RateLimiter] = None,  # keyed by host
+  ):
+    self.limit = limit
+    self.limit_per_host = limit_per_host
+    self.keepalive_timeout = keepalive_timeout
+    self.timeout = timeout
+    self.retry = retry
+    self.circuit_breaker = circuit_breaker
+    self.rate_limiter = rate_limiter
+
+    self._session = session
+    self._owns_session = session is None
+
+  @property
+  def session(self) -> 'aiohttp.ClientSession':
+    if self._session is None:
+      import aiohttp
+
+      connector = aiohttp.TCPConnector(
+        limit=self.limit,
+        limit_per_host=self.limit_per_host,
+        keepalive_timeout=self.keepalive_timeout,
+      )
+      self._session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=build_aiohttp_timeout(timeout=self.timeout),
+      )
+
+    return self._session
+
+  async def get(
+    self,
+    url: str,
+    headers: Mapping[str, str],
+    params: Optional[Mapping[str, str]] = None,
+    read_text: Optional[
+      Callable[['aiohttp.ClientResponse'], Awaitable[str]]
+    ] = None,
+  ) -> AsyncLiveInfoResponse:
+    import asyncio
+
+    import aiohttp
+
+    host = urlparse(url).netloc
+    retry = self.retry
+    circuit_breaker = self.circuit_breaker
+    rate_limiter = self.rate_limiter
+
+    attempt = 0
+    while True:
+      if circuit_breaker is not None:
+        circuit_breaker.before_request(host=host)
+
+      retry_after: Optional[float] = None
+
+      try:
+        if rate_limiter is not None:
+          await rate_limiter.aacquire(key=host)
+
+        res = await self._get_once(
+          url=url,
+          headers=headers,
+          params=params,
+          read_text=read_text,
+        )
+      except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+        if circuit_breaker is not None:
+          circuit_breaker.record_failure(host=host)
+
+        if retry is None or not retry.should_retry(attempt=attempt):
+          raise
+      except BaseException:
+        # neither a success nor a failure of the host (TooManyRedirects,
+        # cancellation, a rate limiter error): do not leave the circuit
+        # waiting for the trial forever
+        if circuit_breaker is not None:
+          circuit_breaker.release(host=host)
+
+        raise
+      else:
+        if circuit_breaker is not None:
+          if circuit_breaker.is_failure_status(status_code=res.status_code):
+            circuit_breaker.record_failure(host=host)
+          else:
+            circuit_breaker.record_success(host=host)
+
+        retry_after = get_retry_after(
+          status_code=res.status_code,
+          headers=res.headers,
+        )
+        if retry_after is not None and rate_limiter is not None:
+          await rate_limiter.adefer(key=host, seconds=retry_after)
+
+        if retry is None or \
+            res.status_code not in retry.retry_statuses or \
+            not retry.should_retry(attempt=attempt):
+          return res
+
+      assert retry is not None
+      await asyncio.sleep(
+        retry.get_delay(attempt=attempt, retry_after=retry_after),
+      )
+      attempt += 1
+
+  async def _get_once(
+    self,
+    url: str,
+    headers: Mapping[str, str],
+    params: Optional[Mapping[str, str]],
+    read_text: Optional[
+      Callable[['aiohttp.ClientResponse'], Awaitable[str]]
+    ],
+  ) -> AsyncLiveInfoResponse:
+    async with self.session.get(url, headers=headers, params=params) as res:
+      if res.status == 200 and read_text is not None:
+        text = await read_text(res)
+      else:
+        text = await res.text()
+
+      return AsyncLiveInfoResponse(
+        status_code=res.status,
+        headers=res.headers,
+        text=text,
+      )
+
+  async def close(self) -> None:
+    if self._session is not None and self._owns_session:
+      await self._session.close()
+    self._session = None
+
+  async def __aenter__(self) -> 'AsyncLiveInfoClient':
+    return self
+
+  async def __aexit__(self, *args: object) -> None:
+    await self.close()
+
+
+def build_aiohttp_timeout(
+  timeout: Optional[Timeout],
+) -> 'aiohttp.ClientTimeout':
+  import aiohttp
+
+  if timeout is None:
+    return aiohttp.ClientTimeout(total=None)
+
+  if isinstance(timeout, tuple):
+    connect, read = timeout
+    return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+
+  return aiohttp.ClientTimeout(total=timeout)
+
+
+@contextlib.asynccontextmanager
+async def open_async_client(
+  client: Optional[AsyncLiveInfoClient],
+) -> AsyncIterator[AsyncLiveInfoClient]:
+  # The given client, or a new one closed on exit: an aiohttp session is
+  # bound to an event loop and must be closed before the loop is, so there
+  # is no process-wide default client as for LiveInfoClient
+  if client is not None:
+    yield client
+    return
+
+  async with AsyncLiveInfoClient() as owned_client:
+    yield owned_client
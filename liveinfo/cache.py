@@ -0,0 +1,466 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import (
+  TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Protocol, Set,
+  Tuple, TypeVar, Union,
+)
+
+from .serialization import dump_dataclass, load_dataclass
+
+if TYPE_CHECKING:
+  import asyncio
+
+
+"""
+  Public APIs
+"""
+
+
+LiveProgramCacheKey = Tuple[str, str]  # (service, normalized live id)
+
+T = TypeVar('T')
+
+
+@dataclass
+class LiveProgramCacheEntry:
+  result: Any
+  fresh_until: float  # UNIX time
+  stale_until: float  # UNIX time
+
+
+class LiveProgramCacheBackend(Protocol):
+  def lookup(
+    self,
+    key: LiveProgramCacheKey,
+  ) -> Optional[LiveProgramCacheEntry]:
+    ...
+
+  def store(
+    self,
+    key: LiveProgramCacheKey,
+    entry: LiveProgramCacheEntry,
+  ) -> None:
+    ...
+
+  def invalidate(
+    self,
+    key: LiveProgramCacheKey,
+  ) -> None:
+    ...
+
+  def clear(self) -> None:
+    ...
+
+
+class MemoryLiveProgramCacheBackend:
+  def __init__(
+    self,
+    max_entries: int = 1024,
+  ):
+    self.max_entries = max_entries
+
+    self._lock = threading.Lock()
+    self._entries: \
+      'OrderedDict[LiveProgramCacheKey, LiveProgramCacheEntry]' = \
+      OrderedDict()
+
+  def lookup(
+    self,
+    key: LiveProgramCacheKey,
+  ) -> Optional[LiveProgramCacheEntry]:
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        return None
+
+      if entry.stale_until <= time.time():
+        del self._entries[key]
+        return None
+
+      self._entries.move_to_end(key)
+      return entry
+
+  def store(
+    self,
+    key: LiveProgramCacheKey,
+    entry: LiveProgramCacheEntry,
+  ) -> None:
+    with self._lock:
+      self._entries[key] = entry
+      self._entries.move_to_end(key)
+
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def invalidate(
+    self,
+    key: LiveProgramCacheKey,
+  ) -> None:
+    with self._lock:
+      self._entries.pop(key, None)
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+
+
+class SqliteLiveProgramCacheBackend:
+  # Shares results between processes through a SQLite database file.
+  # Each thread uses its own connection; WAL mode lets readers run
+  # concurrently with a writer, and busy_timeout waits for a locked
+  # database instead of failing.
+
+  def __init__(
+    self,
+    path: Union[str, Path],
+    max_entries: int = 100000,
+    timeout: float = 30.0,  # seconds to wait for a locked database
+    # service -> result type to deserialize stored results into
+    result_types: Optional[Dict[str, Any]] = None,
+  ):
+    self.path = str(path)
+    self.max_entries = max_entries
+    self.timeout = timeout
+    self.result_types = (
+      result_types
+      if result_types is not None
+      else get_default_result_types()
+    )
+
+    self._local = threading.local()
+
+    with self._connect() as conn:
+      conn.execute(
+        'CREATE TABLE IF NOT EXISTS live_program_cache ('
+        '  service TEXT NOT NULL,'
+        '  live_id TEXT NOT NULL,'
+        '  result TEXT NOT NULL,'
+        '  fresh_until REAL NOT NULL,'
+        '  stale_until REAL NOT NULL,'
+        '  stored_at REAL NOT NULL,'
+        '  PRIMARY KEY (service, live_id)'
+        ')'
+      )
+      conn.execute(
+        'CREATE INDEX IF NOT EXISTS live_program_cache_stale_until '
+        'ON live_program_cache (stale_until)'
+      )
+      conn.execute(
+        'CREATE INDEX IF NOT EXISTS live_program_cache_stored_at '
+        'ON live_program_cache (stored_at)'
+      )
+
+  def _connect(self) -> sqlite3.Connection:
+    conn: Optional[sqlite3.Connection] = getattr(self._local, 'conn', None)
+    if conn is None:
+      conn = sqlite3.connect(self.path, timeout=self.timeout)
+      conn.execute('PRAGMA journal_mode=WAL')
+      conn.execute('PRAGMA synchronous=NORMAL')
+      self._local.conn = conn
+
+    return conn
+
+  def lookup(
+    self,
+    key: LiveProgramCacheKey,
+  ) -> Optional[LiveProgramCacheEntry]:
+    service, live_id = key
+
+    result_type = self.result_types.get(service)
+    if result_type is None:
+      return None
+
+    row = self._connect().execute(
+      'SELECT result, fresh_until, stale_until FROM live_program_cache '
+      'WHERE service = ? AND live_id = ? AND stale_until > ?',
+      (service, live_id, time.time()),
+    ).fetchone()
+    if row is None:
+      return None
+
+    result_json, fresh_until, stale_until = row
+
+    return LiveProgramCacheEntry(
+      result=load_dataclass(result_type, json.loads(result_json)),
+      fresh_until=fresh_until,
+      stale_until=stale_until,
+    )
+
+  def store(
+    self,
+    key: LiveProgramCacheKey,
+    entry: LiveProgramCacheEntry,
+  ) -> None:
+    service, live_id = key
+    now = time.time()
+
+    result_json = json.dumps(
+      dump_dataclass(entry.result),
+      ensure_ascii=False,
+      separators=(',', ':'),
+    )
+
+    with self._connect() as conn:
+      conn.execute(
+        'INSERT OR REPLACE INTO live_program_cache '
+        '(service, live_id, result, fresh_until, stale_until, stored_at) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        (
+          service, live_id, result_json,
+          entry.fresh_until, entry.stale_until, now,
+        ),
+      )
+
+      # TTL eviction
+      conn.execute(
+        'DELETE FROM live_program_cache WHERE stale_until <= ?',
+        (now,),
+      )
+
+      # size eviction (oldest first)
+      conn.execute(
+        'DELETE FROM live_program_cache WHERE rowid IN ('
+        '  SELECT rowid FROM live_program_cache '
+        '  ORDER BY stored_at DESC LIMIT -1 OFFSET ?'
+        ')',
+        (self.max_entries,),
+      )
+
+  def invalidate(
+    self,
+    key: LiveProgramCacheKey,
+  ) -> None:
+    service, live_id = key
+
+    with self._connect() as conn:
+      conn.execute(
+        'DELETE FROM live_program_cache WHERE service = ? AND live_id = ?',
+        (service, live_id),
+      )
+
+  def clear(self) -> None:
+    with self._connect() as conn:
+      conn.execute('DELETE FROM live_program_cache')
+
+  def close(self) -> None:
+    conn: Optional[sqlite3.Connection] = getattr(self._local, 'conn', None)
+    if conn is not None:
+      conn.close()
+      self._local.conn = None
+
+
+def get_default_result_types() -> Dict[str, Any]:
+  from . import nicolive
+  from . import ytlive
+
+  return {
+    'nicolive': nicolive.GetNicoliveProgramResult,
+    'ytlive': ytlive.GetYtliveProgramsResult,
+  }
+
+
+default_result_type_ttls: Dict[str, float] = {
+  'maintenance': 10.0,
+  'unknown_error': 10.0,
+}
+
+
+class LiveProgramCache:
+  def __init__(
+    self,
+    ttl: float = 60.0,
+    max_entries: int = 1024,
+    result_type_ttls: Optional[Dict[str, float]] = None,
+    # TTL for a program id (lv*) whose end_date is in the past.
+    # Community, channel and user ids may start a new program at any time,
+    # so they always use ttl.
+    ended_program_ttl: float = 3600.0,
+    # Return an expired entry for this long after expiry while refreshing
+    # it in the background (0: disabled)
+    stale_while_revalidate: float = 0.0,
+    # MemoryLiveProgramCacheBackend(max_entries) if None
+    backend: Optional[LiveProgramCacheBackend] = None,
+  ):
+    self.ttl = ttl
+    self.result_type_ttls = (
+      result_type_ttls
+      if result_type_ttls is not None
+      else default_result_type_ttls
+    )
+    self.ended_program_ttl = ended_program_ttl
+    self.stale_while_revalidate = stale_while_revalidate
+    self.backend: LiveProgramCacheBackend = (
+      backend
+      if backend is not None
+      else MemoryLiveProgramCacheBackend(max_entries=max_entries)
+    )
+
+    self._lock = threading.Lock()
+    self._refreshing: Set[LiveProgramCacheKey] = set()
+    # the event loop keeps only weak references to tasks
+    self._refresh_tasks: Set['asyncio.Task[None]'] = set()
+
+  def get_ttl(
+    self,
+    key: LiveProgramCacheKey,
+    result: Any,
+  ) -> float:
+    result_type = result.result_type
+
+    if result_type in self.result_type_ttls:
+      return self.result_type_ttls[result_type]
+
+    service, live_id = key
+    if service == 'nicolive' and live_id.startswith('lv') and \
+        result_type == 'success':
+      end_date = result.data.end_date
+      if end_date is not None:
+        try:
+          has_ended = parse_iso8601(end_date) < datetime.now(tz=timezone.utc)
+        except (TypeError, ValueError):
+          # malformed, or without a time zone: not known to have ended
+          has_ended = False
+
+        if has_ended:
+          return self.ended_program_ttl
+
+    return self.ttl
+
+  def lookup(
+    self,
+    key: LiveProgramCacheKey,
+  ) -> Optional[LiveProgramCacheEntry]:
+    entry = self.backend.lookup(key=key)
+    if entry is None or entry.stale_until <= time.time():
+      return None
+
+    return entry
+
+  def store(
+    self,
+    key: LiveProgramCacheKey,
+    result: Any,
+  ) -> None:
+    fresh_until = time.time() + self.get_ttl(key=key, result=result)
+
+    self.backend.store(
+      key=key,
+      entry=LiveProgramCacheEntry(
+        result=result,
+        fresh_until=fresh_until,
+        stale_until=fresh_until + self.stale_while_revalidate,
+      ),
+    )
+
+  def invalidate(
+    self,
+    key: LiveProgramCacheKey,
+  ) -> None:
+    self.backend.invalidate(key=key)
+
+  def clear(self) -> None:
+    self.backend.clear()
+
+  def get_or_fetch(
+    self,
+    key: LiveProgramCacheKey,
+    fetch: Callable[[], T],
+  ) -> T:
+    entry = self.lookup(key=key)
+    if entry is not None:
+      if time.time() < entry.fresh_until:
+        return entry.result
+
+      if self._begin_refresh(key=key):
+        threading.Thread(
+          target=self._refresh,
+          args=(key, fetch),
+          daemon=True,
+        ).start()
+
+      return entry.result
+
+    result = fetch()
+    self.store(key=key, result=result)
+    return result
+
+  async def aget_or_fetch(
+    self,
+    key: LiveProgramCacheKey,
+    fetch: Callable[[], Awaitable[T]],
+  ) -> T:
+    entry = self.lookup(key=key)
+    if entry is not None:
+      if time.time() < entry.fresh_until:
+        return entry.result
+
+      if self._begin_refresh(key=key):
+        import asyncio
+
+        task = asyncio.ensure_future(self._arefresh(key=key, fetch=fetch))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+      return entry.result
+
+    result = await fetch()
+    self.store(key=key, result=result)
+    return result
+
+  def _begin_refresh(
+    self,
+    key: LiveProgramCacheKey,
+  ) -> bool:
+    with self._lock:
+      if key in self._refreshing:
+        return False
+
+      self._refreshing.add(key)
+      return True
+
+  def _end_refresh(
+    self,
+    key: LiveProgramCacheKey,
+  ) -> None:
+    with self._lock:
+      self._refreshing.discard(key)
+
+  def _refresh(
+    self,
+    key: LiveProgramCacheKey,
+    fetch: Callable[[], Any],
+  ) -> None:
+    try:
+      self.store(key=key, result=fetch())
+    except Exception:
+      pass  # keep serving the stale entry until it expires
+    finally:
+      self._end_refresh(key=key)
+
+  async def _arefresh(
+    self,
+    key: LiveProgramCacheKey,
+    fetch: Callable[[], Awaitable[Any]],
+  ) -> None:
+    try:
+      self.store(key=key, result=await fetch())
+    except Exception:
+      # nobody awaits this task: keep serving the stale entry until it
+      # expires
+      pass
+    finally:
+      self._end_refresh(key=key)
+
+
+def parse_iso8601(value: str) -> datetime:
+  # datetime.fromisoformat accepts "Z" only in Python 3.11+
+  if value.endswith('Z'):
+    value = value[:-1] + '+00:00'
+
+  return datetime.fromisoformat(value)
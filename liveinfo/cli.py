@@ -1,8 +1,24 @@
+import argparse
+import itertools
+import math
 import os
+import sys
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, List, Optional
 
 from . import liveinfo
+from .cache import LiveProgramCache, SqliteLiveProgramCacheBackend
+from .client import LiveInfoClient
+from .metrics import serve_metrics
+from .output import LiveProgramOutputWriter, OutputFormat
+from .ratelimit import RateLimiter, SqliteRateLimiterBackend
+from .resilience import CircuitBreaker, RetryPolicy
+from .singleflight import SingleFlight
+from .ytlive import (
+  YtliveApiKey, YtliveApiKeyPool, YtliveConditionalCache, YtliveSyncState,
+  ytlive_default_daily_quota,
+)
 
 
 """
@@ -10,38 +26,434 @@ from . import liveinfo
 """
 
 
-def cli():
-  import argparse
+def cli() -> None:
+  if len(sys.argv) > 1 and sys.argv[1] == 'watch':
+    watch_cli(argv=sys.argv[2:])
+    return
+
   parser = argparse.ArgumentParser()
-  parser.add_argument('live_id_or_url', type=str)
+  parser.add_argument('live_id_or_url', type=str, nargs='*')
+  parser.add_argument(
+    '--input', type=str,
+    help='file with one live_id_or_url per line ("-": stdin)',
+  )
+  add_service_arguments(parser)
+  add_client_arguments(parser)
+  parser.add_argument(
+    '--format', type=str,
+    choices=['repr', 'json', 'ndjson', 'msgpack'],
+    default=os.environ.get('LIVEINFO_FORMAT', 'repr'),
+    help='json: an array of the results, also for a single id',
+  )
+  parser.add_argument(
+    # a string default is converted (and validated) by type
+    '--jobs', type=positive_int,
+    default=os.environ.get('LIVEINFO_JOBS') or '8',
+  )
+  parser.add_argument(
+    '--cache_file', type=str,
+    default=os.environ.get('LIVEINFO_CACHE_FILE'),
+  )
+  parser.add_argument(
+    '--cache_ttl', type=float,
+    default=float(os.environ.get('LIVEINFO_CACHE_TTL', '60')),
+  )
+  args = parser.parse_args()
+
+  service: Optional[str] = args.service
+  nicolive_engine: liveinfo.nicolive.NicoliveWatchHtmlEngine = \
+    args.nicolive_engine
+
+  ytlive_api_key = read_ytlive_api_key(args)
+  ytlive_discovery: liveinfo.ytlive.YtliveDiscovery = args.ytlive_discovery
+
+  output_format: OutputFormat = args.format
+  jobs: int = args.jobs
+
+  cache_file: Optional[str] = args.cache_file
+  cache_ttl: float = args.cache_ttl
+
+  cache: Optional[LiveProgramCache] = None
+  if cache_file:
+    cache = LiveProgramCache(
+      ttl=cache_ttl,
+      backend=SqliteLiveProgramCacheBackend(path=cache_file),
+    )
+
+  input_file: Optional[str] = args.input
+  if input_file is None and len(args.live_id_or_url) == 0:
+    if sys.stdin.isatty():
+      parser.error('no live_id_or_url given')
+
+    input_file = '-'
+
+  live_ids_or_urls: Iterable[str] = itertools.chain(
+    args.live_id_or_url,
+    (
+      fields[0]
+      for fields in iter_input_fields(input_file=input_file)
+    ),
+  )
+
+  with build_client(args=args, pool_maxsize=jobs) as client:
+    outputs = liveinfo.iter_live_program_results(
+      live_ids_or_urls=live_ids_or_urls,
+      service=service,
+      ytlive_api_key=ytlive_api_key,
+      nicolive_engine=nicolive_engine,
+      client=client,
+      ytlive_conditional_cache=YtliveConditionalCache(),
+      ytlive_discovery=ytlive_discovery,
+      cache=cache,
+      # the same id given twice is fetched once while in flight
+      single_flight=SingleFlight(),
+      jobs=jobs,
+    )
+
+    if output_format == 'repr':
+      # printed as each completes; errors go to stderr and exit status 1
+      failed = False
+      for output in outputs:
+        try:
+          if output.error is not None or output.result is None:
+            raise liveinfo.GetLiveProgramError(output.error)
+
+          assert output.service is not None
+          print(
+            liveinfo.unwrap_live_program_result(
+              service=output.service,
+              live_program_result=output.result,
+            ),
+            flush=True,
+          )
+        except liveinfo.GetLiveProgramError as error:
+          failed = True
+          print(f'{output.live_id_or_url}: {error}', file=sys.stderr)
+
+      if failed:
+        sys.exit(1)
+      return
+
+    # written as each completes; errors are written as results (result_type)
+    # or as error messages (error) instead of raised
+    with LiveProgramOutputWriter(
+      format=output_format,
+      stream=sys.stdout.buffer,
+    ) as writer:
+      for output in outputs:
+        writer.write(output)
+
+
+def watch_cli(argv: List[str]) -> None:
+  from .watch import (
+    LiveProgramWatchScheduler, LiveProgramWatcher, WatchTarget,
+    fetch_live_program_snapshot,
+  )
+
+  parser = argparse.ArgumentParser(prog='liveinfo watch')
+  parser.add_argument('live_id_or_url', type=str, nargs='*')
+  parser.add_argument(
+    '--input', type=str,
+    help='file with one "<live_id_or_url> [interval]" per line',
+  )
+  add_service_arguments(parser)
+  add_client_arguments(parser)
+  parser.add_argument(
+    '--interval', type=positive_float,
+    default=os.environ.get('LIVEINFO_WATCH_INTERVAL') or '60',
+  )
+  parser.add_argument(
+    '--max_interval', type=float,
+    default=float(os.environ.get('LIVEINFO_WATCH_MAX_INTERVAL', '900')),
+  )
+  parser.add_argument('--backoff', type=float, default=2.0)
+  parser.add_argument(
+    '--dense_interval', type=float, default=15.0,
+    help='interval around scheduled start times',
+  )
+  parser.add_argument(
+    '--long_idle_interval', type=float, default=3600.0,
+    help='interval for ids not on air for 3 days',
+  )
+  parser.add_argument('--viewers_delta', type=int, default=100)
+  parser.add_argument('--jobs', type=positive_int, default=8)
+  parser.add_argument(
+    '--metrics_port', type=int,
+    default=(
+      int(os.environ['LIVEINFO_METRICS_PORT'])
+      if os.environ.get('LIVEINFO_METRICS_PORT') else None
+    ),
+    help='serve Prometheus metrics at http://<metrics_host>:<port>/metrics',
+  )
+  parser.add_argument(
+    '--metrics_host', type=str,
+    default=os.environ.get('LIVEINFO_METRICS_HOST', '127.0.0.1'),
+  )
+  args = parser.parse_args(argv)
+
+  service: Optional[str] = args.service
+  nicolive_engine: liveinfo.nicolive.NicoliveWatchHtmlEngine = \
+    args.nicolive_engine
+
+  ytlive_api_key = read_ytlive_api_key(args)
+  ytlive_discovery: liveinfo.ytlive.YtliveDiscovery = args.ytlive_discovery
+
+  targets: List[WatchTarget] = []
+  for live_id_or_url in args.live_id_or_url:
+    targets.append(
+      WatchTarget(
+        live_id_or_url=live_id_or_url,
+        service=liveinfo.select_service(
+          live_id_or_url=live_id_or_url,
+          service=service,
+        ),
+      )
+    )
+
+  input_file: Optional[str] = args.input
+  for fields in iter_input_fields(input_file=input_file):
+    interval: Optional[float] = None
+    if len(fields) > 1:
+      try:
+        interval = positive_float(fields[1])
+      except argparse.ArgumentTypeError as error:
+        parser.error(f'--input line {" ".join(fields)!r}: interval {error}')
+
+    targets.append(
+      WatchTarget(
+        live_id_or_url=fields[0],
+        service=liveinfo.select_service(
+          live_id_or_url=fields[0],
+          service=service,
+        ),
+        interval=interval,
+      )
+    )
+
+  if len(targets) == 0:
+    parser.error('no live_id_or_url given')
+
+  if ytlive_api_key is None and any(
+    target.service == 'ytlive' for target in targets
+  ):
+    parser.error(
+      'ytlive ids need --ytlive_api_key or --ytlive_api_key_file',
+    )
+
+  jobs: int = args.jobs
+
+  metrics_port: Optional[int] = args.metrics_port
+  if metrics_port is not None:
+    # served until the process exits
+    serve_metrics(port=metrics_port, host=args.metrics_host)
+
+  with build_client(args=args, pool_maxsize=jobs) as client, \
+      LiveProgramOutputWriter(
+        format='ndjson',
+        stream=sys.stdout.buffer,
+      ) as writer:
+    fetch = partial(
+      fetch_live_program_snapshot,
+      useragent=liveinfo.default_useragent,
+      ytlive_api_key=ytlive_api_key,
+      client=client,
+      nicolive_engine=nicolive_engine,
+      ytlive_discovery=ytlive_discovery,
+      ytlive_conditional_cache=YtliveConditionalCache(),
+      # re-query only new, upcoming and live videos on each poll
+      ytlive_sync_state=YtliveSyncState(),
+    )
+
+    with LiveProgramWatcher(
+      targets=targets,
+      fetch=fetch,
+      scheduler=LiveProgramWatchScheduler(
+        interval=args.interval,
+        max_interval=args.max_interval,
+        backoff=args.backoff,
+        dense_interval=args.dense_interval,
+        long_idle_interval=args.long_idle_interval,
+      ),
+      viewers_delta=args.viewers_delta,
+      jobs=jobs,
+    ) as watcher:
+      try:
+        watcher.run(emit=writer.write)
+      except KeyboardInterrupt:
+        pass
+
+
+def add_service_arguments(parser: argparse.ArgumentParser) -> None:
   parser.add_argument(
     '-s', '--service', type=str,
     choices=['nicolive', 'ytlive'],
   )
+  parser.add_argument(
+    '--nicolive_engine', type=str,
+    choices=['html5lib', 'streaming'],
+    default=os.environ.get('LIVEINFO_NICOLIVE_ENGINE', 'html5lib'),
+  )
   parser.add_argument(
     '--ytlive_api_key', type=str,
     default=os.environ.get('LIVEINFO_YTLIVE_API_KEY'),
   )
+  # one key per line; several keys are used as a YtliveApiKeyPool
   parser.add_argument(
     '--ytlive_api_key_file', type=str,
     default=os.environ.get('LIVEINFO_YTLIVE_API_KEY_FILE'),
   )
-  args = parser.parse_args()
+  parser.add_argument(
+    '--ytlive_daily_quota', type=int,
+    default=int(os.environ.get(
+      'LIVEINFO_YTLIVE_DAILY_QUOTA',
+      str(ytlive_default_daily_quota),
+    )),
+  )
+  parser.add_argument(
+    '--ytlive_discovery', type=str,
+    choices=['search', 'uploads'],
+    default=os.environ.get('LIVEINFO_YTLIVE_DISCOVERY', 'search'),
+  )
 
-  live_id_or_url: str = args.live_id_or_url
-  service: Optional[str] = args.service
 
+def add_client_arguments(parser: argparse.ArgumentParser) -> None:
+  parser.add_argument(
+    '--connect_timeout', type=float,
+    default=float(os.environ.get('LIVEINFO_CONNECT_TIMEOUT', '10')),
+  )
+  parser.add_argument(
+    '--read_timeout', type=float,
+    default=float(os.environ.get('LIVEINFO_READ_TIMEOUT', '30')),
+  )
+  parser.add_argument(
+    '--retries', type=int,
+    default=int(os.environ.get('LIVEINFO_RETRIES', '2')),
+    help='retries on connection errors, timeouts, 429 and 5xx',
+  )
+  parser.add_argument(
+    '--circuit_breaker_threshold', type=int,
+    default=int(os.environ.get('LIVEINFO_CIRCUIT_BREAKER_THRESHOLD', '5')),
+    help='consecutive failures to stop requesting a host (0: disabled)',
+  )
+  parser.add_argument(
+    '--circuit_breaker_reset', type=float,
+    default=float(os.environ.get('LIVEINFO_CIRCUIT_BREAKER_RESET', '60')),
+    help='seconds to fail fast before trying a failing host again',
+  )
+  parser.add_argument(
+    '--rate', type=positive_float,
+    default=os.environ.get('LIVEINFO_RATE') or None,
+    help='max requests per second per host (default: unlimited)',
+  )
+  parser.add_argument(
+    '--burst', type=int,
+    default=int(os.environ.get('LIVEINFO_BURST', '1')),
+    help='max requests at once per host with --rate',
+  )
+  parser.add_argument(
+    '--rate_limit_file', type=str,
+    default=os.environ.get('LIVEINFO_RATE_LIMIT_FILE'),
+    help='SQLite database to share --rate between processes',
+  )
+
+
+def build_client(
+  args: argparse.Namespace,
+  pool_maxsize: int,
+) -> LiveInfoClient:
+  circuit_breaker_threshold: int = args.circuit_breaker_threshold
+
+  rate: Optional[float] = args.rate
+  rate_limit_file: Optional[str] = args.rate_limit_file
+
+  rate_limiter: Optional[RateLimiter] = None
+  if rate is not None:
+    rate_limiter = RateLimiter(
+      rate=rate,
+      burst=args.burst,
+      backend=(
+        SqliteRateLimiterBackend(path=rate_limit_file)
+        if rate_limit_file else None
+      ),
+    )
+
+  return LiveInfoClient(
+    pool_maxsize=pool_maxsize,
+    timeout=(args.connect_timeout, args.read_timeout),
+    retry=RetryPolicy(max_retries=args.retries),
+    circuit_breaker=(
+      CircuitBreaker(
+        failure_threshold=circuit_breaker_threshold,
+        reset_timeout=args.circuit_breaker_reset,
+      )
+      if circuit_breaker_threshold > 0 else None
+    ),
+    rate_limiter=rate_limiter,
+  )
+
+
+def read_ytlive_api_key(args: argparse.Namespace) -> Optional[YtliveApiKey]:
   ytlive_api_key: Optional[str] = args.ytlive_api_key
   ytlive_api_key_file: Optional[str] = args.ytlive_api_key_file
-  if ytlive_api_key_file:
-    ytlive_api_key = (
-      Path(ytlive_api_key_file).read_text(encoding='utf-8').strip()
-    )
+  if not ytlive_api_key_file:
+    return ytlive_api_key
 
-  print(
-    liveinfo.get_live_program(
-      live_id_or_url=live_id_or_url,
-      service=service,
-      ytlive_api_key=ytlive_api_key,
-    )
+  # skipping blank lines and comments (#)
+  ytlive_api_keys = [
+    line.strip()
+    for line in Path(ytlive_api_key_file).read_text(encoding='utf-8')
+    .splitlines()
+    if line.strip() != '' and not line.strip().startswith('#')
+  ]
+  if len(ytlive_api_keys) == 0:
+    return None
+
+  if len(ytlive_api_keys) == 1:
+    return ytlive_api_keys[0]
+
+  return YtliveApiKeyPool(
+    api_keys=ytlive_api_keys,
+    daily_quota=args.ytlive_daily_quota,
   )
+
+
+def positive_int(value: str) -> int:
+  try:
+    number = int(value)
+  except ValueError:
+    raise argparse.ArgumentTypeError(f'invalid int value: {value!r}')
+
+  if number < 1:
+    raise argparse.ArgumentTypeError(f'must be at least 1: {number}')
+
+  return number
+
+
+def positive_float(value: str) -> float:
+  try:
+    number = float(value)
+  except ValueError:
+    raise argparse.ArgumentTypeError(f'invalid float value: {value!r}')
+
+  if not (number > 0 and math.isfinite(number)):
+    raise argparse.ArgumentTypeError(f'must be positive and finite: {number}')
+
+  return number
+
+
+def iter_input_fields(input_file: Optional[str]) -> Iterator[List[str]]:
+  # Whitespace-separated fields of each line of a file ("-": stdin),
+  # skipping blank lines and comments (#).
+  # stdin is read line by line as it arrives.
+  if input_file is None:
+    return
+
+  if input_file == '-':
+    lines: Iterable[str] = sys.stdin
+  else:
+    lines = Path(input_file).read_text(encoding='utf-8').splitlines()
+
+  for line in lines:
+    fields = line.split('#', 1)[0].split()
+    if len(fields) > 0:
+      yield fields
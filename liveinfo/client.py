@@ -0,0 +1,170 @@
+import time
+from typing import TYPE_CHECKING, Mapping, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+from .ratelimit import RateLimiter, get_retry_after
+from .resilience import CircuitBreaker, RetryPolicy
+
+if TYPE_CHECKING:
+  import requests
+
+
+"""
+  Public APIs
+"""
+
+
+Timeout = Union[float, Tuple[float, float]]  # total or (connect, read)
+
+default_timeout: Timeout = (10.0, 30.0)
+
+
+class LiveInfoClient:
+  def __init__(
+    self,
+    pool_connections: int = 10,  # number of hosts to keep pools for
+    pool_maxsize: int = 10,  # max connections per host
+    keep_alive: bool = True,
+    timeout: Optional[Timeout] = default_timeout,
+    session: Optional['requests.Session'] = None,
+    retry: Optional[RetryPolicy] = None,  # None: no retry
+    circuit_breaker: Optional[CircuitBreaker] = None,
+    rate_limiter: Optional[RateLimiter] = None,  # keyed by host
+  ):
+    self.pool_connections = pool_connections
+    self.pool_maxsize = pool_maxsize
+    self.keep_alive = keep_alive
+    self.timeout = timeout
+    self.retry = retry
+    self.circuit_breaker = circuit_breaker
+    self.rate_limiter = rate_limiter
+
+    self._session = session
+    self._owns_session = session is None
+
+  @property
+  def session(self) -> 'requests.Session':
+    if self._session is None:
+      import requests
+      import requests.adapters
+
+      session = requests.Session()
+
+      adapter = requests.adapters.HTTPAdapter(
+        pool_connections=self.pool_connections,
+        pool_maxsize=self.pool_maxsize,
+      )
+      session.mount('https://', adapter)
+      session.mount('http://', adapter)
+
+      if not self.keep_alive:
+        session.headers['Connection'] = 'close'
+
+      self._session = session
+
+    return self._session
+
+  def get(
+    self,
+    url: str,
+    headers: Mapping[str, str],
+    params: Optional[Mapping[str, str]] = None,
+    stream: bool = False,
+  ) -> 'requests.Response':
+    import requests
+
+    host = urlparse(url).netloc
+    retry = self.retry
+    circuit_breaker = self.circuit_breaker
+    rate_limiter = self.rate_limiter
+
+    attempt = 0
+    while True:
+      if circuit_breaker is not None:
+        circuit_breaker.before_request(host=host)
+
+      retry_after: Optional[float] = None
+
+      try:
+        if rate_limiter is not None:
+          rate_limiter.acquire(key=host)
+
+        res = self.session.get(
+          url,
+          headers=headers,
+          params=params,
+          stream=stream,
+          timeout=self.timeout,
+        )
+      except (requests.ConnectionError, requests.Timeout):
+        if circuit_breaker is not None:
+          circuit_breaker.record_failure(host=host)
+
+        if retry is None or not retry.should_retry(attempt=attempt):
+          raise
+      except BaseException:
+        # neither a success nor a failure of the host (TooManyRedirects,
+        # cancellation, a rate limiter error): do not leave the circuit
+        # waiting for the trial forever
+        if circuit_breaker is not None:
+          circuit_breaker.release(host=host)
+
+        raise
+      else:
+        if circuit_breaker is not None:
+          if circuit_breaker.is_failure_status(status_code=res.status_code):
+            circuit_breaker.record_failure(host=host)
+          else:
+            circuit_breaker.record_success(host=host)
+
+        retry_after = get_retry_after(
+          status_code=res.status_code,
+          headers=res.headers,
+        )
+        if retry_after is not None and rate_limiter is not None:
+          rate_limiter.defer(key=host, seconds=retry_after)
+
+        if retry is None or \
+            res.status_code not in retry.retry_statuses or \
+            not retry.should_retry(attempt=attempt):
+          return res
+
+        res.close()
+
+      assert retry is not None
+      time.sleep(
+        retry.get_delay(attempt=attempt, retry_after=retry_after),
+      )
+      attempt += 1
+
+  def close(self) -> None:
+    if self._session is not None and self._owns_session:
+      self._session.close()
+    self._session = None
+
+  def __enter__(self) -> 'LiveInfoClient':
+    return self
+
+  def __exit__(self, *args: object) -> None:
+    self.close()
+
+
+def http_get(
+  client: Optional[LiveInfoClient],
+  url: str,
+  headers: Mapping[str, str],
+  params: Optional[Mapping[str, str]] = None,
+  stream: bool = False,
+) -> 'requests.Response':
+  if client is None:
+    import requests
+
+    return requests.get(
+      url,
+      headers=headers,
+      params=params,
+      stream=stream,
+      timeout=default_timeout,
+    )
+
+  return client.get(url, headers=headers, params=params, stream=stream)
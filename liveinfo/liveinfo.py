@@ -1,9 +1,22 @@
+from concurrent.futures import (
+  FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait,
+)
 from urllib.parse import urlparse
-from typing import Optional, Literal, Union
+from typing import (
+  Awaitable, Callable, Iterable, Iterator, Optional, Literal, Set, Union,
+  cast,
+)
 
 from . import __VERSION__
 from . import nicolive
 from . import ytlive
+from .aio import AsyncLiveInfoClient
+from .cache import LiveProgramCache, LiveProgramCacheKey
+from .client import LiveInfoClient
+from .metrics import count_result
+from .output import LiveProgramOutput
+from .resilience import CircuitOpenError
+from .singleflight import SingleFlight
 
 """
   Public APIs
@@ -22,66 +35,443 @@ class GetLiveProgramError(Exception):
   pass
 
 
+LiveProgramResult = Union[
+  nicolive.GetNicoliveProgramResult,
+  ytlive.GetYtliveProgramsResult,
+]
+
+
 def get_live_program(
   live_id_or_url: str,
   service: Optional[str],
-  ytlive_api_key: Optional[str],
+  ytlive_api_key: Optional[ytlive.YtliveApiKey],
   useragent: str = default_useragent,
+  nicolive_engine: nicolive.NicoliveWatchHtmlEngine = 'html5lib',
+  client: Optional[LiveInfoClient] = None,
+  ytlive_conditional_cache: Optional[ytlive.YtliveConditionalCache] = None,
+  ytlive_sync_state: Optional[ytlive.YtliveSyncState] = None,
+  ytlive_discovery: ytlive.YtliveDiscovery = 'search',
+  cache: Optional[LiveProgramCache] = None,
+  # coalesces concurrent fetches of the same id
+  single_flight: Optional[SingleFlight] = None,
+  nicolive_sanitize: bool = True,
 ) -> Union[
   nicolive.GetNicoliveProgramNicoliveProgramData,
   ytlive.GetYtliveProgramsSuccessYtliveProgramsData,
 ]:
-  if service is None:
-    service = guess_service(live_id_or_url=live_id_or_url)
+  service = select_service(live_id_or_url=live_id_or_url, service=service)
 
-  if service is None:
-    raise GetLiveProgramError(
-      'Service not specified and auto selection failed. '
-      'Specify an argument: --service=[nicolive]'
+  return unwrap_live_program_result(
+    service=service,
+    live_program_result=get_live_program_result(
+      live_id_or_url=live_id_or_url,
+      service=service,
+      ytlive_api_key=ytlive_api_key,
+      useragent=useragent,
+      nicolive_engine=nicolive_engine,
+      client=client,
+      ytlive_conditional_cache=ytlive_conditional_cache,
+      ytlive_sync_state=ytlive_sync_state,
+      ytlive_discovery=ytlive_discovery,
+      cache=cache,
+      single_flight=single_flight,
+      nicolive_sanitize=nicolive_sanitize,
+    ),
+  )
+
+
+def get_live_program_result(
+  live_id_or_url: str,
+  service: Optional[str],
+  ytlive_api_key: Optional[ytlive.YtliveApiKey],
+  useragent: str = default_useragent,
+  nicolive_engine: nicolive.NicoliveWatchHtmlEngine = 'html5lib',
+  client: Optional[LiveInfoClient] = None,
+  ytlive_conditional_cache: Optional[ytlive.YtliveConditionalCache] = None,
+  ytlive_sync_state: Optional[ytlive.YtliveSyncState] = None,
+  ytlive_discovery: ytlive.YtliveDiscovery = 'search',
+  cache: Optional[LiveProgramCache] = None,
+  # coalesces concurrent fetches of the same id
+  single_flight: Optional[SingleFlight] = None,
+  nicolive_sanitize: bool = True,
+) -> LiveProgramResult:
+  # Like get_live_program, but returns error results instead of raising
+  service = select_service(live_id_or_url=live_id_or_url, service=service)
+
+  if service == 'nicolive':
+    def fetch_nicolive_program() -> nicolive.GetNicoliveProgramResult:
+      return nicolive.get_nicolive_program(
+        live_id_or_url=live_id_or_url,
+        useragent=useragent,
+        engine=nicolive_engine,
+        client=client,
+        sanitize=nicolive_sanitize,
+      )
+
+    return get_or_fetch_live_program_result(
+      key=build_live_program_cache_key(
+        service=service,
+        live_id_or_url=live_id_or_url,
+      ),
+      fetch=fetch_nicolive_program,
+      cache=cache,
+      single_flight=single_flight,
+    )
+
+  elif service == 'ytlive':
+    if ytlive_api_key is None:
+      raise GetLiveProgramError('ytlive_api_key is required')
+
+    def fetch_ytlive_programs() -> ytlive.GetYtliveProgramsResult:
+      assert ytlive_api_key is not None
+
+      return ytlive.get_ytlive_programs(
+        channel_id=live_id_or_url,
+        useragent=useragent,
+        api_key=ytlive_api_key,
+        client=client,
+        conditional_cache=ytlive_conditional_cache,
+        discovery=ytlive_discovery,
+        sync_state=ytlive_sync_state,
+      )
+
+    return get_or_fetch_live_program_result(
+      key=build_live_program_cache_key(
+        service=service,
+        live_id_or_url=live_id_or_url,
+      ),
+      fetch=fetch_ytlive_programs,
+      cache=cache,
+      single_flight=single_flight,
     )
 
+  else:
+    raise GetLiveProgramError(f'Unknown service: {service}')
+
+
+async def aget_live_program(
+  live_id_or_url: str,
+  service: Optional[str],
+  ytlive_api_key: Optional[ytlive.YtliveApiKey],
+  useragent: str = default_useragent,
+  nicolive_engine: nicolive.NicoliveWatchHtmlEngine = 'html5lib',
+  client: Optional[AsyncLiveInfoClient] = None,
+  ytlive_conditional_cache: Optional[ytlive.YtliveConditionalCache] = None,
+  ytlive_sync_state: Optional[ytlive.YtliveSyncState] = None,
+  ytlive_discovery: ytlive.YtliveDiscovery = 'search',
+  cache: Optional[LiveProgramCache] = None,
+  # coalesces concurrent fetches of the same id
+  single_flight: Optional[SingleFlight] = None,
+  nicolive_sanitize: bool = True,
+) -> Union[
+  nicolive.GetNicoliveProgramNicoliveProgramData,
+  ytlive.GetYtliveProgramsSuccessYtliveProgramsData,
+]:
+  service = select_service(live_id_or_url=live_id_or_url, service=service)
+
+  return unwrap_live_program_result(
+    service=service,
+    live_program_result=await aget_live_program_result(
+      live_id_or_url=live_id_or_url,
+      service=service,
+      ytlive_api_key=ytlive_api_key,
+      useragent=useragent,
+      nicolive_engine=nicolive_engine,
+      client=client,
+      ytlive_conditional_cache=ytlive_conditional_cache,
+      ytlive_sync_state=ytlive_sync_state,
+      ytlive_discovery=ytlive_discovery,
+      cache=cache,
+      single_flight=single_flight,
+      nicolive_sanitize=nicolive_sanitize,
+    ),
+  )
+
+
+async def aget_live_program_result(
+  live_id_or_url: str,
+  service: Optional[str],
+  ytlive_api_key: Optional[ytlive.YtliveApiKey],
+  useragent: str = default_useragent,
+  nicolive_engine: nicolive.NicoliveWatchHtmlEngine = 'html5lib',
+  client: Optional[AsyncLiveInfoClient] = None,
+  ytlive_conditional_cache: Optional[ytlive.YtliveConditionalCache] = None,
+  ytlive_sync_state: Optional[ytlive.YtliveSyncState] = None,
+  ytlive_discovery: ytlive.YtliveDiscovery = 'search',
+  cache: Optional[LiveProgramCache] = None,
+  # coalesces concurrent fetches of the same id
+  single_flight: Optional[SingleFlight] = None,
+  nicolive_sanitize: bool = True,
+) -> LiveProgramResult:
+  service = select_service(live_id_or_url=live_id_or_url, service=service)
+
   if service == 'nicolive':
-    nicolive_program_result = \
-      nicolive.get_nicolive_program(
+    async def fetch_nicolive_program() -> nicolive.GetNicoliveProgramResult:
+      return await nicolive.aget_nicolive_program(
         live_id_or_url=live_id_or_url,
         useragent=useragent,
+        engine=nicolive_engine,
+        client=client,
+        sanitize=nicolive_sanitize,
       )
 
-    if nicolive_program_result.result_type == 'success':
-      if nicolive_program_result.data_type == 'nicolive_program':
-        return nicolive_program_result.data
-      else:
-        raise GetLiveProgramError(nicolive_program_result)
-    else:
-      raise GetLiveProgramError(nicolive_program_result)
+    return await aget_or_fetch_live_program_result(
+      key=build_live_program_cache_key(
+        service=service,
+        live_id_or_url=live_id_or_url,
+      ),
+      fetch=fetch_nicolive_program,
+      cache=cache,
+      single_flight=single_flight,
+    )
 
   elif service == 'ytlive':
-    assert ytlive_api_key is not None, 'ytlive_api_key is required'
+    if ytlive_api_key is None:
+      raise GetLiveProgramError('ytlive_api_key is required')
 
-    ytlive_programs_result = \
-      ytlive.get_ytlive_programs(
+    async def fetch_ytlive_programs() -> ytlive.GetYtliveProgramsResult:
+      assert ytlive_api_key is not None
+
+      return await ytlive.aget_ytlive_programs(
         channel_id=live_id_or_url,
         useragent=useragent,
         api_key=ytlive_api_key,
+        client=client,
+        conditional_cache=ytlive_conditional_cache,
+        discovery=ytlive_discovery,
+        sync_state=ytlive_sync_state,
       )
 
-    if ytlive_programs_result.result_type == 'success':
-      if ytlive_programs_result.data_type == 'ytlive_programs':
-        return ytlive_programs_result.data
-      else:
-        raise GetLiveProgramError(ytlive_programs_result)
-    else:
-      raise GetLiveProgramError(ytlive_programs_result)
+    return await aget_or_fetch_live_program_result(
+      key=build_live_program_cache_key(
+        service=service,
+        live_id_or_url=live_id_or_url,
+      ),
+      fetch=fetch_ytlive_programs,
+      cache=cache,
+      single_flight=single_flight,
+    )
 
   else:
     raise GetLiveProgramError(f'Unknown service: {service}')
 
 
-def guess_service(live_id_or_url: str) -> Optional[Literal['nicolive']]:
+def iter_live_program_results(
+  live_ids_or_urls: Iterable[str],
+  service: Optional[str],
+  ytlive_api_key: Optional[ytlive.YtliveApiKey],
+  useragent: str = default_useragent,
+  nicolive_engine: nicolive.NicoliveWatchHtmlEngine = 'html5lib',
+  client: Optional[LiveInfoClient] = None,
+  ytlive_conditional_cache: Optional[ytlive.YtliveConditionalCache] = None,
+  ytlive_sync_state: Optional[ytlive.YtliveSyncState] = None,
+  ytlive_discovery: ytlive.YtliveDiscovery = 'search',
+  cache: Optional[LiveProgramCache] = None,
+  # coalesces concurrent fetches of the same id
+  single_flight: Optional[SingleFlight] = None,
+  nicolive_sanitize: bool = True,
+  jobs: int = 8,
+) -> Iterator[LiveProgramOutput]:
+  # Fetches with up to jobs requests in flight and yields one output per
+  # id as soon as it completes (not in the input order).
+  # live_ids_or_urls is consumed lazily, so it may be a stream (stdin).
+  # service=None selects the service of each id by guess_service.
+  import requests
+
+  def fetch(live_id_or_url: str) -> LiveProgramOutput:
+    selected_service: Optional[str] = None
+    try:
+      selected_service = select_service(
+        live_id_or_url=live_id_or_url,
+        service=service,
+      )
+
+      return LiveProgramOutput(
+        live_id_or_url=live_id_or_url,
+        service=selected_service,
+        result=get_live_program_result(
+          live_id_or_url=live_id_or_url,
+          service=selected_service,
+          ytlive_api_key=ytlive_api_key,
+          useragent=useragent,
+          nicolive_engine=nicolive_engine,
+          client=client,
+          ytlive_conditional_cache=ytlive_conditional_cache,
+          ytlive_sync_state=ytlive_sync_state,
+          ytlive_discovery=ytlive_discovery,
+          cache=cache,
+          single_flight=single_flight,
+          nicolive_sanitize=nicolive_sanitize,
+        ),
+      )
+    except (
+      GetLiveProgramError,
+      CircuitOpenError,
+      requests.RequestException,
+    ) as error:
+      return LiveProgramOutput(
+        live_id_or_url=live_id_or_url,
+        service=selected_service,
+        result=None,
+        error=str(error),
+      )
+    except Exception as error:
+      # an unexpected error (e.g. a malformed response) of one id must not
+      # end the iteration for the others
+      return LiveProgramOutput(
+        live_id_or_url=live_id_or_url,
+        service=selected_service,
+        result=None,
+        error=f'{type(error).__name__}: {error}',
+      )
+
+  with ThreadPoolExecutor(max_workers=jobs) as executor:
+    pending: Set['Future[LiveProgramOutput]'] = set()
+
+    for live_id_or_url in live_ids_or_urls:
+      if len(pending) >= jobs:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+          yield future.result()
+
+      pending.add(executor.submit(fetch, live_id_or_url))
+
+    for future in as_completed(pending):
+      yield future.result()
+
+
+def select_service(
+  live_id_or_url: str,
+  service: Optional[str],
+) -> str:
+  if service is None:
+    service = guess_service(live_id_or_url=live_id_or_url)
+
+  if service is None:
+    raise GetLiveProgramError(
+      'Service not specified and auto selection failed. '
+      'Specify an argument: --service=[nicolive, ytlive]'
+    )
+
+  return service
+
+
+def build_live_program_cache_key(
+  service: str,
+  live_id_or_url: str,
+) -> LiveProgramCacheKey:
+  if service == 'nicolive':
+    safe_live_id = nicolive.get_safe_live_id(live_id_or_url=live_id_or_url)
+    if safe_live_id is not None:
+      return (service, safe_live_id)
+
+  return (service, live_id_or_url.strip())
+
+
+def get_or_fetch_live_program_result(
+  key: LiveProgramCacheKey,
+  fetch: Callable[[], LiveProgramResult],
+  cache: Optional[LiveProgramCache],
+  single_flight: Optional[SingleFlight],
+) -> LiveProgramResult:
+  def fetch_once() -> LiveProgramResult:
+    if single_flight is not None:
+      return single_flight.do(key=key, fetch=fetch)
+
+    return fetch()
+
+  if cache is not None:
+    result = cache.get_or_fetch(key=key, fetch=fetch_once)
+  else:
+    result = fetch_once()
+
+  service, _ = key
+  count_result(service=service, result_type=result.result_type)
+  return result
+
+
+async def aget_or_fetch_live_program_result(
+  key: LiveProgramCacheKey,
+  fetch: Callable[[], Awaitable[LiveProgramResult]],
+  cache: Optional[LiveProgramCache],
+  single_flight: Optional[SingleFlight],
+) -> LiveProgramResult:
+  async def fetch_once() -> LiveProgramResult:
+    if single_flight is not None:
+      return await single_flight.ado(key=key, fetch=fetch)
+
+    return await fetch()
+
+  if cache is not None:
+    result = await cache.aget_or_fetch(key=key, fetch=fetch_once)
+  else:
+    result = await fetch_once()
+
+  service, _ = key
+  count_result(service=service, result_type=result.result_type)
+  return result
+
+
+def unwrap_live_program_result(
+  service: str,
+  live_program_result: LiveProgramResult,
+) -> Union[
+  nicolive.GetNicoliveProgramNicoliveProgramData,
+  ytlive.GetYtliveProgramsSuccessYtliveProgramsData,
+]:
+  if service == 'nicolive':
+    return unwrap_nicolive_program_result(
+      nicolive_program_result=cast(
+        nicolive.GetNicoliveProgramResult,
+        live_program_result,
+      ),
+    )
+
+  return unwrap_ytlive_programs_result(
+    ytlive_programs_result=cast(
+      ytlive.GetYtliveProgramsResult,
+      live_program_result,
+    ),
+  )
+
+
+def unwrap_nicolive_program_result(
+  nicolive_program_result: nicolive.GetNicoliveProgramResult,
+) -> nicolive.GetNicoliveProgramNicoliveProgramData:
+  if nicolive_program_result.result_type == 'success':
+    if nicolive_program_result.data_type == 'nicolive_program':
+      return nicolive_program_result.data
+    else:
+      raise GetLiveProgramError(nicolive_program_result)
+  else:
+    raise GetLiveProgramError(nicolive_program_result)
+
+
+def unwrap_ytlive_programs_result(
+  ytlive_programs_result: ytlive.GetYtliveProgramsResult,
+) -> ytlive.GetYtliveProgramsSuccessYtliveProgramsData:
+  if ytlive_programs_result.result_type == 'success':
+    if ytlive_programs_result.data_type == 'ytlive_programs':
+      return ytlive_programs_result.data
+    else:
+      raise GetLiveProgramError(ytlive_programs_result)
+  else:
+    raise GetLiveProgramError(ytlive_programs_result)
+
+
+def guess_service(
+  live_id_or_url: str,
+) -> Optional[Literal['nicolive', 'ytlive']]:
   urlp = urlparse(live_id_or_url)
 
   if urlp.scheme == 'https' and \
      urlp.hostname == 'live.nicovideo.jp':
       return 'nicolive'
 
+  if nicolive.validate_live_id(live_id=live_id_or_url):
+    return 'nicolive'
+
+  if ytlive.validate_ytlive_channel_id(channel_id=live_id_or_url):
+    return 'ytlive'
+
   return None
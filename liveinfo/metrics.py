@@ -0,0 +1,334 @@
+import contextlib
+import threading
+import time
+from typing import (
+  TYPE_CHECKING, ContextManager, Dict, Iterator, List, Optional, Sequence,
+  Tuple, Union,
+)
+
+if TYPE_CHECKING:
+  from http.server import ThreadingHTTPServer
+
+
+"""
+  Public APIs
+
+  Counters and histograms of where the time goes in a fetch, exposed in the
+  Prometheus text format (version 0.0.4):
+
+    liveinfo_http_request_duration_seconds{endpoint}
+    liveinfo_http_response_bytes{endpoint}
+      endpoint: nicolive_watch, search.list, playlistItems.list, videos.list
+    liveinfo_html5lib_parse_duration_seconds
+    liveinfo_json_ld_decode_duration_seconds
+    liveinfo_sanitize_filename_duration_seconds
+    liveinfo_results_total{service, result_type}
+
+  Disabled by default: until enable_metrics is called, measure returns a
+  shared no-op context manager and the other functions return at once.
+"""
+
+
+LabelValues = Tuple[str, ...]
+
+latency_buckets = (
+  0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+size_buckets = (
+  1024.0, 4096.0, 16384.0, 65536.0, 262144.0, 1048576.0, 4194304.0,
+)
+parse_buckets = (
+  0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+sanitize_buckets = (
+  0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01,
+)
+
+
+class Counter:
+  def __init__(
+    self,
+    name: str,
+    help: str,
+    label_names: Sequence[str] = (),
+  ):
+    self.name = name
+    self.help = help
+    self.label_names = tuple(label_names)
+
+    self._lock = threading.Lock()
+    self._values: Dict[LabelValues, float] = {}
+
+  def inc(
+    self,
+    labels: LabelValues = (),
+    amount: float = 1.0,
+  ) -> None:
+    with self._lock:
+      self._values[labels] = self._values.get(labels, 0.0) + amount
+
+  def get(self, labels: LabelValues = ()) -> float:
+    with self._lock:
+      return self._values.get(labels, 0.0)
+
+  def render(self) -> List[str]:
+    lines = [
+      f'# HELP {self.name} {self.help}',
+      f'# TYPE {self.name} counter',
+    ]
+
+    with self._lock:
+      for labels, value in sorted(self._values.items()):
+        lines.append(
+          f'{self.name}{format_labels(self.label_names, labels)} '
+          f'{format_value(value)}'
+        )
+
+    return lines
+
+
+class Histogram:
+  def __init__(
+    self,
+    name: str,
+    help: str,
+    buckets: Sequence[float],
+    label_names: Sequence[str] = (),
+  ):
+    self.name = name
+    self.help = help
+    self.buckets = tuple(sorted(buckets))
+    self.label_names = tuple(label_names)
+
+    self._lock = threading.Lock()
+    # labels -> (count per bucket (not cumulative, +Inf last), sum)
+    self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+  def observe(
+    self,
+    value: float,
+    labels: LabelValues = (),
+  ) -> None:
+    index = len(self.buckets)
+    for bucket_index, bucket in enumerate(self.buckets):
+      if value <= bucket:
+        index = bucket_index
+        break
+
+    with self._lock:
+      counts_and_sum = self._values.get(labels)
+      if counts_and_sum is None:
+        counts_and_sum = ([0] * (len(self.buckets) + 1), [0.0])
+        self._values[labels] = counts_and_sum
+
+      counts, total = counts_and_sum
+      counts[index] += 1
+      total[0] += value
+
+  @contextlib.contextmanager
+  def time(self, labels: LabelValues = ()) -> Iterator[None]:
+    started_at = time.perf_counter()
+    try:
+      yield
+    finally:
+      self.observe(value=time.perf_counter() - started_at, labels=labels)
+
+  def get_count(self, labels: LabelValues = ()) -> int:
+    with self._lock:
+      counts_and_sum = self._values.get(labels)
+      return sum(counts_and_sum[0]) if counts_and_sum is not None else 0
+
+  def render(self) -> List[str]:
+    lines = [
+      f'# HELP {self.name} {self.help}',
+      f'# TYPE {self.name} histogram',
+    ]
+
+    with self._lock:
+      for labels, (counts, total) in sorted(self._values.items()):
+        cumulative_count = 0
+        for bucket, count in zip(
+          [*map(format_value, self.buckets), '+Inf'],
+          counts,
+        ):
+          cumulative_count += count
+          bucket_labels = format_labels(
+            (*self.label_names, 'le'),
+            (*labels, bucket),
+          )
+          lines.append(
+            f'{self.name}_bucket{bucket_labels} {cumulative_count}'
+          )
+
+        formatted_labels = format_labels(self.label_names, labels)
+        lines.append(
+          f'{self.name}_sum{formatted_labels} {format_value(total[0])}'
+        )
+        lines.append(f'{self.name}_count{formatted_labels} {sum(counts)}')
+
+    return lines
+
+
+class LiveInfoMetrics:
+  def __init__(self) -> None:
+    self.http_request_duration = Histogram(
+      name='liveinfo_http_request_duration_seconds',
+      help='HTTP request latency per upstream endpoint, including retries.',
+      buckets=latency_buckets,
+      label_names=('endpoint',),
+    )
+    self.http_response_bytes = Histogram(
+      name='liveinfo_http_response_bytes',
+      help='HTTP response body size per upstream endpoint.',
+      buckets=size_buckets,
+      label_names=('endpoint',),
+    )
+    self.html5lib_parse_duration = Histogram(
+      name='liveinfo_html5lib_parse_duration_seconds',
+      help='Time to build an html5lib tree of a nicolive watch page.',
+      buckets=parse_buckets,
+    )
+    self.json_ld_decode_duration = Histogram(
+      name='liveinfo_json_ld_decode_duration_seconds',
+      help='Time to decode the JSON-LD of a nicolive watch page.',
+      buckets=parse_buckets,
+    )
+    self.sanitize_filename_duration = Histogram(
+      name='liveinfo_sanitize_filename_duration_seconds',
+      help='Time to sanitize the name and description of a program.',
+      buckets=sanitize_buckets,
+    )
+    self.results = Counter(
+      name='liveinfo_results_total',
+      help='Results per service and result type.',
+      label_names=('service', 'result_type'),
+    )
+
+  def render(self) -> str:
+    metrics: List[Union[Counter, Histogram]] = [
+      self.http_request_duration,
+      self.http_response_bytes,
+      self.html5lib_parse_duration,
+      self.json_ld_decode_duration,
+      self.sanitize_filename_duration,
+      self.results,
+    ]
+
+    lines: List[str] = []
+    for metric in metrics:
+      lines.extend(metric.render())
+
+    return '\n'.join(lines) + '\n'
+
+
+_metrics: Optional[LiveInfoMetrics] = None
+_null_measurement: ContextManager[None] = contextlib.nullcontext()
+
+
+def enable_metrics() -> LiveInfoMetrics:
+  global _metrics
+
+  if _metrics is None:
+    _metrics = LiveInfoMetrics()
+
+  return _metrics
+
+
+def disable_metrics() -> None:
+  global _metrics
+
+  _metrics = None
+
+
+def get_metrics() -> Optional[LiveInfoMetrics]:
+  return _metrics
+
+
+def measure(
+  histogram_name: str,  # attribute name of a LiveInfoMetrics histogram
+  labels: LabelValues = (),
+) -> ContextManager[None]:
+  metrics = _metrics
+  if metrics is None:
+    return _null_measurement
+
+  histogram: Histogram = getattr(metrics, histogram_name)
+  return histogram.time(labels=labels)
+
+
+def observe_http_response_bytes(
+  endpoint: str,
+  body: Union[str, bytes, None],
+) -> None:
+  metrics = _metrics
+  if metrics is None or body is None:
+    return
+
+  metrics.http_response_bytes.observe(
+    value=len(body.encode('utf-8') if isinstance(body, str) else body),
+    labels=(endpoint,),
+  )
+
+
+def count_result(
+  service: str,
+  result_type: str,
+) -> None:
+  metrics = _metrics
+  if metrics is None:
+    return
+
+  metrics.results.inc(labels=(service, result_type))
+
+
+def format_labels(
+  label_names: Sequence[str],
+  labels: Sequence[str],
+) -> str:
+  if len(label_names) == 0:
+    return ''
+
+  def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"') \
+      .replace('\n', '\\n')
+
+  return '{' + ','.join(
+    f'{name}="{escape(value)}"' for name, value in zip(label_names, labels)
+  ) + '}'
+
+
+def format_value(value: float) -> str:
+  return repr(float(value))
+
+
+def serve_metrics(
+  port: int,
+  host: str = '127.0.0.1',
+) -> 'ThreadingHTTPServer':
+  # Serves GET /metrics in a daemon thread; call shutdown() to stop
+  from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+  metrics = enable_metrics()
+
+  class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+      if self.path.split('?', 1)[0] != '/metrics':
+        self.send_error(404)
+        return
+
+      body = metrics.render().encode('utf-8')
+      self.send_response(200)
+      self.send_header('Content-Type', 'text/plain; version=0.0.4')
+      self.send_header('Content-Length', str(len(body)))
+      self.end_headers()
+      self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+      pass  # no access log on stderr
+
+  server = ThreadingHTTPServer((host, port), MetricsHandler)
+  server.daemon_threads = True
+
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+
+  return server
@@ -1,19 +1,34 @@
-import sys
-import requests
-from bs4 import BeautifulSoup, Tag
+import codecs
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from html.parser import HTMLParser
 import json
 from dataclasses import dataclass
-from typing import Literal, Optional, Union, List
+from typing import (
+  TYPE_CHECKING, Dict, Literal, Optional, Union, List, Sequence, Tuple,
+)
 import re
-import os
 from urllib.parse import urlparse
 
+from .aio import AsyncLiveInfoClient, open_async_client
+from .client import LiveInfoClient, http_get
+from .metrics import measure, observe_http_response_bytes
+from .ratelimit import RateLimiter
+
+if TYPE_CHECKING:
+  import aiohttp
+  import requests
+  from bs4 import BeautifulSoup
+
 
 """
   Public APIs
 """
 
 
+NicoliveWatchHtmlEngine = Literal['html5lib', 'streaming']
+
+
 @dataclass
 class GetNicoliveProgramNicoliveProgramData:
   name: Optional[str]
@@ -58,36 +73,204 @@ GetNicoliveProgramResult = Union[
   GetNicoliveProgramMaintenanceResult,
   GetNicoliveProgramUnknownErrorResult,
 ]
-invalid_chars = r'[<>:"/\\|?*]'
-def sanitize_filename(filename):
-    # 最初の空白をアンダースコアに変換
-    if filename.startswith(" "):
-        filename = "_" + filename[1:]
-
-    # 禁止文字をアンダースコアに置き換え
-    filename = re.sub(invalid_chars, "_", filename)
-    filename = filename.replace('\xe4', '')
-    # CP932にエンコードできない文字をアンダースコアに置き換え
-    sanitized = []
-    for char in filename:
-        try:
-            char.encode("cp932")  # CP932でエンコード可能かチェック
-            sanitized.append(char)
-        except UnicodeEncodeError:
-            sanitized.append("_")  # エンコード不可の場合はアンダースコアに置換
-
-    return "".join(sanitized)
+
+
+class SanitizeFilenameTable(Dict[int, Optional[int]]):
+  # str.translate table replacing characters CP932 cannot encode.
+  # A code point is checked once on first use and the result is cached.
+  def __missing__(self, code_point: int) -> Optional[int]:
+    replacement = code_point
+    try:
+      chr(code_point).encode('cp932')  # CP932でエンコード可能かチェック
+    except UnicodeEncodeError:
+      replacement = ord('_')  # エンコード不可の場合はアンダースコアに置換
+
+    self[code_point] = replacement
+    return replacement
+
+
+sanitize_filename_table = SanitizeFilenameTable()
+
+invalid_filename_chars = '<>:"/\\|?*'
+
+
+def sanitize_filename(filename: str) -> str:
+  # 最初の空白をアンダースコアに変換
+  if filename.startswith(' '):
+    filename = '_' + filename[1:]
+
+  # 禁止文字をアンダースコアに置き換え
+  for char in invalid_filename_chars:
+    if char in filename:
+      filename = filename.replace(char, '_')
+  filename = filename.replace('\xe4', '')
+
+  # CP932にエンコードできない文字をアンダースコアに置き換え
+  # (most titles and descriptions encode as is)
+  try:
+    filename.encode('cp932')
+    return filename
+  except UnicodeEncodeError as error:
+    # characters before the first error are known to be encodable
+    return filename[:error.start] + \
+      filename[error.start:].translate(sanitize_filename_table)
 
 
 def get_nicolive_program(
   live_id_or_url: str,
   useragent: str,
+  engine: NicoliveWatchHtmlEngine = 'html5lib',
+  client: Optional[LiveInfoClient] = None,
+  sanitize: bool = True,  # sanitize_filename name and description
 ) -> GetNicoliveProgramResult:
   nicolive_watch_result = fetch_nicolive_watch(
     live_id_or_url=live_id_or_url,
     useragent=useragent,
+    stream=engine == 'streaming',
+    client=client,
+  )
+
+  return get_nicolive_program_from_watch_result(
+    nicolive_watch_result=nicolive_watch_result,
+    engine=engine,
+    sanitize=sanitize,
+  )
+
+
+def get_nicolive_programs_batch(
+  live_ids_or_urls: Sequence[str],
+  useragent: str,
+  max_concurrency: int = 8,
+  per_host_rate: Optional[float] = None,  # requests per second
+  parse_workers: Optional[int] = None,
+  engine: NicoliveWatchHtmlEngine = 'html5lib',
+  client: Optional[LiveInfoClient] = None,
+  sanitize: bool = True,
+) -> List[GetNicoliveProgramResult]:
+  # Fetch watch pages concurrently through one pooled client.
+  # Results are returned in the order of live_ids_or_urls.
+  #
+  # parse_workers=None: parse each page in its fetch thread
+  # parse_workers=N: parse pages in a pool of N processes (html5lib is
+  #   CPU-bound and does not scale with threads)
+  #
+  # An error of one id (a connection error, an open circuit, a malformed
+  # page) becomes its unknown result instead of failing the whole batch.
+  rate_limiter = (
+    RateLimiter(rate=per_host_rate) if per_host_rate is not None else None
   )
 
+  owned_client = client is None
+  if client is None:
+    client = LiveInfoClient(
+      pool_connections=1,
+      pool_maxsize=max_concurrency,
+    )
+
+  def fetch(live_id_or_url: str) -> FetchNicoliveWatchResult:
+    if rate_limiter is not None:
+      rate_limiter.acquire()
+
+    try:
+      return fetch_nicolive_watch(
+        live_id_or_url=live_id_or_url,
+        useragent=useragent,
+        stream=engine == 'streaming',
+        client=client,
+      )
+    except Exception:
+      return FetchNicoliveWatchUnknownResult(
+        result_type='unknown',
+      )
+
+  def fetch_and_parse(live_id_or_url: str) -> GetNicoliveProgramResult:
+    try:
+      return get_nicolive_program_from_watch_result(
+        nicolive_watch_result=fetch(live_id_or_url),
+        engine=engine,
+        sanitize=sanitize,
+      )
+    except Exception:
+      return GetNicoliveProgramUnknownErrorResult(
+        result_type='unknown_error',
+      )
+
+  def get_parse_result(
+    parse_future: 'Future[GetNicoliveProgramResult]',
+  ) -> GetNicoliveProgramResult:
+    try:
+      return parse_future.result()
+    except Exception:
+      return GetNicoliveProgramUnknownErrorResult(
+        result_type='unknown_error',
+      )
+
+  try:
+    with ThreadPoolExecutor(max_workers=max_concurrency) as fetch_executor:
+      if parse_workers is None:
+        return list(fetch_executor.map(fetch_and_parse, live_ids_or_urls))
+
+      from concurrent.futures import ProcessPoolExecutor
+
+      with ProcessPoolExecutor(max_workers=parse_workers) as parse_executor:
+        fetch_futures = [
+          fetch_executor.submit(fetch, live_id_or_url)
+          for live_id_or_url in live_ids_or_urls
+        ]
+
+        parse_futures: List['Future[GetNicoliveProgramResult]'] = []
+        for fetch_future in fetch_futures:
+          parse_futures.append(
+            parse_executor.submit(
+              get_nicolive_program_from_watch_result,
+              nicolive_watch_result=fetch_future.result(),
+              engine=engine,
+              sanitize=sanitize,
+            )
+          )
+
+        return [
+          get_parse_result(parse_future) for parse_future in parse_futures
+        ]
+  finally:
+    if owned_client:
+      client.close()
+
+
+async def aget_nicolive_program(
+  live_id_or_url: str,
+  useragent: str,
+  engine: NicoliveWatchHtmlEngine = 'html5lib',
+  client: Optional[AsyncLiveInfoClient] = None,
+  sanitize: bool = True,
+) -> GetNicoliveProgramResult:
+  nicolive_watch_result = await afetch_nicolive_watch(
+    live_id_or_url=live_id_or_url,
+    useragent=useragent,
+    stream=engine == 'streaming',
+    client=client,
+  )
+
+  # parse in a worker thread not to block the event loop
+  import asyncio
+
+  loop = asyncio.get_running_loop()
+  return await loop.run_in_executor(
+    None,
+    functools.partial(
+      get_nicolive_program_from_watch_result,
+      nicolive_watch_result=nicolive_watch_result,
+      engine=engine,
+      sanitize=sanitize,
+    ),
+  )
+
+
+def get_nicolive_program_from_watch_result(
+  nicolive_watch_result: 'FetchNicoliveWatchResult',
+  engine: NicoliveWatchHtmlEngine = 'html5lib',
+  sanitize: bool = True,
+) -> GetNicoliveProgramResult:
   if nicolive_watch_result.result_type == 'success':
     if nicolive_watch_result.data_type == 'html':
       html = nicolive_watch_result.data.html
@@ -102,14 +285,20 @@ def get_nicolive_program(
       start_date: Optional[str] = None
       end_date: Optional[str] = None
 
-      ogp_result = parse_ogp_in_nicolive_watch_html(html=html)
+      watch_html_result = parse_nicolive_watch_html(
+        html=html,
+        engine=engine,
+        sanitize=sanitize,
+      )
+      ogp_result = watch_html_result.data.ogp
+      json_ld_result = watch_html_result.data.json_ld
+
       if ogp_result.result_type == 'success':
         if ogp_result.data_type == 'ogp':
           ogp_data = ogp_result.data
 
           url = ogp_data.url
 
-      json_ld_result = parse_json_ld_in_nicolive_watch_html(html=html)
       if json_ld_result.result_type == 'success':
         if json_ld_result.data_type == 'json_ld':
           json_ld_data = json_ld_result.data
@@ -228,43 +417,98 @@ def validate_live_url_and_get_safe_live_id(live_url: str) -> Optional[str]:
   return None
 
 
+def get_safe_live_id(live_id_or_url: str) -> Optional[str]:
+  if validate_live_id(live_id=live_id_or_url):
+    return live_id_or_url
+
+  return validate_live_url_and_get_safe_live_id(live_url=live_id_or_url)
+
+
 def fetch_nicolive_watch(
   live_id_or_url: str,
   useragent: str,
+  stream: bool = False,
+  client: Optional[LiveInfoClient] = None,
 ) -> FetchNicoliveWatchResult:
   # validate live_id
-  safe_live_id = None
-
-  is_live_id = False
-  if validate_live_id(live_id=live_id_or_url):
-    is_live_id = True
-    safe_live_id = live_id_or_url
-
-  is_live_url = False
-  if not is_live_id:
-    result = validate_live_url_and_get_safe_live_id(live_url=live_id_or_url)
-    if result is not None:
-      is_live_url = True
-      safe_live_id = result
-
-  if not is_live_id and not is_live_url:
+  safe_live_id = get_safe_live_id(live_id_or_url=live_id_or_url)
+  if safe_live_id is None:
     return FetchNicoliveWatchInvalidLiveIdOrUrlResult(
       result_type='invalid_live_id_or_url',
     )
 
-  assert safe_live_id is not None
-
   headers = {
     'User-Agent': useragent,
   }
 
-  res = requests.get(
-    f'https://live.nicovideo.jp/watch/{safe_live_id}',
-    headers=headers,
+  with measure('http_request_duration', labels=('nicolive_watch',)):
+    res = http_get(
+      client,
+      f'https://live.nicovideo.jp/watch/{safe_live_id}',
+      headers=headers,
+      stream=stream,
+    )
+    status_code = res.status_code
+
+    html: Optional[str] = None
+    if status_code == 200:
+      if stream:
+        # stop downloading once og:url and json-ld are found in <head>
+        html = read_nicolive_watch_html_head(res=res)
+      else:
+        html = res.text
+
+  res.close()
+
+  observe_http_response_bytes(endpoint='nicolive_watch', body=html)
+
+  return build_fetch_nicolive_watch_result(
+    status_code=status_code,
+    html=html,
   )
-  status_code = res.status_code
+
+
+async def afetch_nicolive_watch(
+  live_id_or_url: str,
+  useragent: str,
+  stream: bool = False,
+  client: Optional[AsyncLiveInfoClient] = None,
+) -> FetchNicoliveWatchResult:
+  # validate live_id
+  safe_live_id = get_safe_live_id(live_id_or_url=live_id_or_url)
+  if safe_live_id is None:
+    return FetchNicoliveWatchInvalidLiveIdOrUrlResult(
+      result_type='invalid_live_id_or_url',
+    )
+
+  async with open_async_client(client=client) as client:
+    headers = {
+      'User-Agent': useragent,
+    }
+
+    with measure('http_request_duration', labels=('nicolive_watch',)):
+      res = await client.get(
+        f'https://live.nicovideo.jp/watch/{safe_live_id}',
+        headers=headers,
+        # stop downloading once og:url and json-ld are found in <head>
+        read_text=aread_nicolive_watch_html_head if stream else None,
+      )
+
+    html = res.text if res.status_code == 200 else None
+    observe_http_response_bytes(endpoint='nicolive_watch', body=html)
+
+    return build_fetch_nicolive_watch_result(
+      status_code=res.status_code,
+      html=html,
+    )
+
+
+def build_fetch_nicolive_watch_result(
+  status_code: int,
+  html: Optional[str],
+) -> FetchNicoliveWatchResult:
   if status_code == 200:
-    html = res.text
+    assert html is not None
 
     return FetchNicoliveWatchSuccessHtmlResult(
       result_type='success',
@@ -289,6 +533,55 @@ def fetch_nicolive_watch(
   )
 
 
+def read_nicolive_watch_html_head(
+  res: 'requests.Response',
+  chunk_size: int = 16384,
+) -> str:
+  decoder = codecs.getincrementaldecoder(res.encoding or 'utf-8')(
+    errors='replace',
+  )
+  extractor = NicoliveWatchHeadExtractor()
+
+  chunks: List[str] = []
+  try:
+    for chunk in res.iter_content(chunk_size=chunk_size):
+      text = decoder.decode(chunk)
+      chunks.append(text)
+
+      extractor.feed_safely(text)
+      if extractor.done:
+        break
+    else:
+      chunks.append(decoder.decode(b'', final=True))
+  finally:
+    res.close()
+
+  return ''.join(chunks)
+
+
+async def aread_nicolive_watch_html_head(
+  res: 'aiohttp.ClientResponse',
+  chunk_size: int = 16384,
+) -> str:
+  decoder = codecs.getincrementaldecoder(res.charset or 'utf-8')(
+    errors='replace',
+  )
+  extractor = NicoliveWatchHeadExtractor()
+
+  chunks: List[str] = []
+  async for chunk in res.content.iter_chunked(chunk_size):
+    text = decoder.decode(chunk)
+    chunks.append(text)
+
+    extractor.feed_safely(text)
+    if extractor.done:
+      break
+  else:
+    chunks.append(decoder.decode(b'', final=True))
+
+  return ''.join(chunks)
+
+
 """
   Private API: Parse a live url in a watch page HTML
   https://live.nicovideo.jp/watch/{live_id}
@@ -318,16 +611,37 @@ ParseOgpInNicoliveWatchHtmlResult = Union[
 ]
 
 
+def build_nicolive_watch_soup(html: str) -> 'BeautifulSoup':
+  from bs4 import BeautifulSoup
+
+  with measure('html5lib_parse_duration'):
+    return BeautifulSoup(html, 'html5lib')
+
+
 def parse_ogp_in_nicolive_watch_html(
   html: str,
 ) -> ParseOgpInNicoliveWatchHtmlResult:
-  bs = BeautifulSoup(html, 'html5lib')
+  bs = build_nicolive_watch_soup(html=html)
+
+  return parse_ogp_in_nicolive_watch_soup(bs=bs)
+
+
+def parse_ogp_in_nicolive_watch_soup(
+  bs: 'BeautifulSoup',
+) -> ParseOgpInNicoliveWatchHtmlResult:
+  from bs4 import Tag
 
   og_url_tag = bs.find('meta', attrs={'property': 'og:url', 'content': True})
   url = og_url_tag['content'] if isinstance(og_url_tag, Tag) else None
   if isinstance(url, list):
     url = url[0]
 
+  return build_ogp_in_nicolive_watch_html_result(url=url)
+
+
+def build_ogp_in_nicolive_watch_html_result(
+  url: Optional[str],
+) -> ParseOgpInNicoliveWatchHtmlResult:
   return ParseOgpInNicoliveWatchHtmlSuccessOgpResult(
     result_type='success',
     data_type='ogp',
@@ -378,8 +692,18 @@ ParseJsonLdInNicoliveWatchHtmlResult = Union[
 
 def parse_json_ld_in_nicolive_watch_html(
   html: str,
+  sanitize: bool = True,
+) -> ParseJsonLdInNicoliveWatchHtmlResult:
+  bs = build_nicolive_watch_soup(html=html)
+
+  return parse_json_ld_in_nicolive_watch_soup(bs=bs, sanitize=sanitize)
+
+
+def parse_json_ld_in_nicolive_watch_soup(
+  bs: 'BeautifulSoup',
+  sanitize: bool = True,
 ) -> ParseJsonLdInNicoliveWatchHtmlResult:
-  bs = BeautifulSoup(html, 'html5lib')
+  from bs4 import Tag
 
   json_ld_tag = bs.find('script', attrs={'type': 'application/ld+json'})
   if not isinstance(json_ld_tag, Tag):
@@ -393,7 +717,18 @@ def parse_json_ld_in_nicolive_watch_html(
       result_type='not_found',
     )
 
-  json_ld_data = json.loads(json_ld_text)
+  return parse_json_ld_text_in_nicolive_watch_html(
+    json_ld_text=json_ld_text,
+    sanitize=sanitize,
+  )
+
+
+def parse_json_ld_text_in_nicolive_watch_html(
+  json_ld_text: str,
+  sanitize: bool = True,
+) -> ParseJsonLdInNicoliveWatchHtmlResult:
+  with measure('json_ld_decode_duration'):
+    json_ld_data = json.loads(json_ld_text)
 
   name = json_ld_data.get('name')
   description = json_ld_data.get('description')
@@ -405,17 +740,144 @@ def parse_json_ld_in_nicolive_watch_html(
   #   ISO8601 timezone-aware datetime string
   start_date = publication.get('startDate')
   end_date = publication.get('endDate')
-  name=sanitize_filename(name)
-  description=sanitize_filename(description)
-  
+
+  if sanitize:
+    with measure('sanitize_filename_duration'):
+      if name is not None:
+        name = sanitize_filename(name)
+      if description is not None:
+        description = sanitize_filename(description)
+
   return ParseJsonLdInNicoliveWatchHtmlSuccessJsonLdResult(
     result_type='success',
     data_type='json_ld',
-       data=ParseJsonLdInNicoliveWatchHtmlSuccessJsonLdData(
-       name=name,
-       description=description,
-       thumbnail_url=thumbnail_url,
-       start_date=start_date,
-       end_date=end_date,
+    data=ParseJsonLdInNicoliveWatchHtmlSuccessJsonLdData(
+      name=name,
+      description=description,
+      thumbnail_url=thumbnail_url,
+      start_date=start_date,
+      end_date=end_date,
     )
   )
+
+
+"""
+  Private API: Parse a watch page HTML at once
+  https://live.nicovideo.jp/watch/{live_id}
+
+  engine='html5lib' builds a single html5lib tree and shares it between
+  the OGP parser and the JSON-LD parser.
+
+  engine='streaming' scans the tokens with html.parser and stops once
+  og:url and the first JSON-LD block are found. It falls back to
+  engine='html5lib' when either of them is not found.
+"""
+
+
+@dataclass
+class ParseNicoliveWatchHtmlSuccessWatchData:
+  ogp: ParseOgpInNicoliveWatchHtmlResult
+  json_ld: ParseJsonLdInNicoliveWatchHtmlResult
+
+
+@dataclass
+class ParseNicoliveWatchHtmlSuccessWatchResult:
+  result_type: Literal['success']
+  data_type: Literal['watch']
+  data: ParseNicoliveWatchHtmlSuccessWatchData
+
+
+ParseNicoliveWatchHtmlResult = Union[
+  ParseNicoliveWatchHtmlSuccessWatchResult,
+]
+
+
+class NicoliveWatchHeadExtractor(HTMLParser):
+  def __init__(self) -> None:
+    super().__init__()
+    self.og_url: Optional[str] = None
+    self.json_ld_text: Optional[str] = None
+    self.failed = False
+
+    self._json_ld_chunks: Optional[List[str]] = None
+
+  @property
+  def done(self) -> bool:
+    return self.og_url is not None and self.json_ld_text is not None
+
+  def feed_safely(self, data: str) -> None:
+    if self.failed or self.done:
+      return
+
+    try:
+      self.feed(data)
+    except Exception:
+      self.failed = True
+
+  def handle_starttag(
+    self,
+    tag: str,
+    attrs: List[Tuple[str, Optional[str]]],
+  ) -> None:
+    if tag == 'meta' and self.og_url is None:
+      attr_dict = dict(attrs)
+      content = attr_dict.get('content')
+      if attr_dict.get('property') == 'og:url' and content is not None:
+        self.og_url = content
+
+    elif tag == 'script' and self.json_ld_text is None:
+      if dict(attrs).get('type') == 'application/ld+json':
+        self._json_ld_chunks = []
+
+  def handle_endtag(self, tag: str) -> None:
+    if tag == 'script' and self._json_ld_chunks is not None:
+      self.json_ld_text = ''.join(self._json_ld_chunks)
+      self._json_ld_chunks = None
+
+  def handle_data(self, data: str) -> None:
+    if self._json_ld_chunks is not None:
+      self._json_ld_chunks.append(data)
+
+
+def parse_nicolive_watch_html(
+  html: str,
+  engine: NicoliveWatchHtmlEngine = 'html5lib',
+  sanitize: bool = True,
+) -> ParseNicoliveWatchHtmlResult:
+  if engine == 'streaming':
+    extractor = NicoliveWatchHeadExtractor()
+    for offset in range(0, len(html), 16384):
+      extractor.feed_safely(html[offset:offset + 16384])
+      if extractor.done or extractor.failed:
+        break
+
+    if extractor.done and not extractor.failed:
+      assert extractor.json_ld_text is not None
+
+      return ParseNicoliveWatchHtmlSuccessWatchResult(
+        result_type='success',
+        data_type='watch',
+        data=ParseNicoliveWatchHtmlSuccessWatchData(
+          ogp=build_ogp_in_nicolive_watch_html_result(
+            url=extractor.og_url,
+          ),
+          json_ld=parse_json_ld_text_in_nicolive_watch_html(
+            json_ld_text=extractor.json_ld_text,
+            sanitize=sanitize,
+          ),
+        ),
+      )
+
+  bs = build_nicolive_watch_soup(html=html)
+
+  return ParseNicoliveWatchHtmlSuccessWatchResult(
+    result_type='success',
+    data_type='watch',
+    data=ParseNicoliveWatchHtmlSuccessWatchData(
+      ogp=parse_ogp_in_nicolive_watch_soup(bs=bs),
+      json_ld=parse_json_ld_in_nicolive_watch_soup(
+        bs=bs,
+        sanitize=sanitize,
+      ),
+    ),
+  )
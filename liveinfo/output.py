@@ -0,0 +1,99 @@
+import json
+from dataclasses import dataclass
+from typing import Any, BinaryIO, List, Literal, Optional, Union
+
+from . import nicolive
+from . import ytlive
+from .serialization import dump_dataclass
+
+
+"""
+  Public APIs
+
+  Writes results as JSON, NDJSON (one JSON object per line) or MessagePack
+  (one object after another).
+
+  JSON is encoded with orjson when it is installed:
+    pip3 install aoirint_liveinfo[fast]
+
+  MessagePack requires the optional dependency msgpack:
+    pip3 install aoirint_liveinfo[msgpack]
+"""
+
+
+OutputFormat = Literal['repr', 'json', 'ndjson', 'msgpack']
+
+
+@dataclass
+class LiveProgramOutput:
+  live_id_or_url: str
+  service: Optional[str]  # None: not selected
+  result: Optional[Union[
+    nicolive.GetNicoliveProgramResult,
+    ytlive.GetYtliveProgramsResult,
+  ]]
+  error: Optional[str] = None  # set instead of result on exceptions
+
+
+def encode_json(value: Any) -> bytes:
+  try:
+    import orjson
+  except ImportError:
+    return json.dumps(
+      value,
+      ensure_ascii=False,
+      separators=(',', ':'),
+    ).encode('utf-8')
+
+  return orjson.dumps(value)
+
+
+def encode_msgpack(value: Any) -> bytes:
+  import msgpack
+
+  return msgpack.packb(value, use_bin_type=True)
+
+
+class LiveProgramOutputWriter:
+  # format='json' writes one document when closed: an array of the
+  # records, even of a single one, so that its shape does not depend on the
+  # number of ids.
+  # format='ndjson' and format='msgpack' write each record immediately.
+
+  def __init__(
+    self,
+    format: OutputFormat,
+    stream: BinaryIO,
+  ):
+    self.format = format
+    self.stream = stream
+
+    self._records: List[Any] = []
+
+  def write(self, record: Any) -> None:
+    if self.format == 'repr':
+      self.stream.write(f'{record}\n'.encode('utf-8'))
+    elif self.format == 'json':
+      self._records.append(dump_dataclass(record))
+      return
+    elif self.format == 'ndjson':
+      self.stream.write(encode_json(dump_dataclass(record)) + b'\n')
+    elif self.format == 'msgpack':
+      self.stream.write(encode_msgpack(dump_dataclass(record)))
+    else:
+      raise ValueError(f'Unknown format: {self.format}')
+
+    self.stream.flush()
+
+  def close(self) -> None:
+    if self.format == 'json':
+      self.stream.write(encode_json(self._records) + b'\n')
+      self.stream.flush()
+
+      self._records = []
+
+  def __enter__(self) -> 'LiveProgramOutputWriter':
+    return self
+
+  def __exit__(self, *args: object) -> None:
+    self.close()
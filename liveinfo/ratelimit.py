@@ -0,0 +1,258 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from functools import partial
+from pathlib import Path
+from typing import (
+  Callable, Dict, Mapping, Optional, Protocol, Tuple, TypeVar, Union,
+)
+
+
+"""
+  Public APIs
+
+  Token bucket rate limiter keyed by upstream host: up to rate requests per
+  second on average, and up to burst requests at once after being idle.
+
+  A bucket is kept as the theoretical arrival time of the next request
+  (GCRA), a single float per key, so that SqliteRateLimiterBackend can share
+  one budget between processes.
+"""
+
+
+T = TypeVar('T')
+
+# (theoretical arrival time or None for a new key, now)
+#   -> (new theoretical arrival time, result)
+RateLimiterUpdate = Callable[[Optional[float], float], Tuple[float, T]]
+
+
+@dataclass
+class RateLimit:
+  rate: float  # requests per second
+  burst: int = 1
+
+
+class RateLimiterBackend(Protocol):
+  def update(self, key: str, func: RateLimiterUpdate[T]) -> T:
+    # Applies func to the state of key atomically
+    ...
+
+
+class MemoryRateLimiterBackend:
+  # Shared by the threads and asyncio tasks of one process
+
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    self._arrival_times: Dict[str, float] = {}
+
+  def update(self, key: str, func: RateLimiterUpdate[T]) -> T:
+    with self._lock:
+      arrival_time, result = func(
+        self._arrival_times.get(key),
+        time.monotonic(),
+      )
+      self._arrival_times[key] = arrival_time
+
+      return result
+
+
+class SqliteRateLimiterBackend:
+  # Shares the budget between processes through a SQLite database file.
+  # Each update is an immediate transaction, and the wall clock is used
+  # as the clock common to the processes.
+
+  def __init__(
+    self,
+    path: Union[str, Path],
+    timeout: float = 30.0,  # seconds to wait for a locked database
+  ):
+    self.path = str(path)
+    self.timeout = timeout
+
+    self._local = threading.local()
+
+    self._connect().execute(
+      'CREATE TABLE IF NOT EXISTS rate_limiter ('
+      '  key TEXT NOT NULL PRIMARY KEY,'
+      '  arrival_time REAL NOT NULL'
+      ')'
+    )
+
+  def _connect(self) -> sqlite3.Connection:
+    conn: Optional[sqlite3.Connection] = getattr(self._local, 'conn', None)
+    if conn is None:
+      # autocommit mode to control transactions explicitly
+      conn = sqlite3.connect(
+        self.path,
+        timeout=self.timeout,
+        isolation_level=None,
+      )
+      conn.execute('PRAGMA journal_mode=WAL')
+      conn.execute('PRAGMA synchronous=NORMAL')
+      self._local.conn = conn
+
+    return conn
+
+  def update(self, key: str, func: RateLimiterUpdate[T]) -> T:
+    conn = self._connect()
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+      row = conn.execute(
+        'SELECT arrival_time FROM rate_limiter WHERE key = ?',
+        (key,),
+      ).fetchone()
+
+      arrival_time, result = func(
+        row[0] if row is not None else None,
+        time.time(),
+      )
+
+      conn.execute(
+        'INSERT OR REPLACE INTO rate_limiter (key, arrival_time) '
+        'VALUES (?, ?)',
+        (key, arrival_time),
+      )
+    except BaseException:
+      conn.execute('ROLLBACK')
+      raise
+
+    conn.execute('COMMIT')
+    return result
+
+  def close(self) -> None:
+    conn: Optional[sqlite3.Connection] = getattr(self._local, 'conn', None)
+    if conn is not None:
+      conn.close()
+      self._local.conn = None
+
+
+class RateLimiter:
+  def __init__(
+    self,
+    rate: float,  # requests per second
+    burst: int = 1,
+    # key (host) -> limit instead of rate and burst
+    host_limits: Optional[Mapping[str, RateLimit]] = None,
+    # MemoryRateLimiterBackend() if None
+    backend: Optional[RateLimiterBackend] = None,
+  ):
+    self.default_limit = RateLimit(rate=rate, burst=burst)
+    self.host_limits = dict(host_limits) if host_limits is not None else {}
+    self.backend: RateLimiterBackend = (
+      backend if backend is not None else MemoryRateLimiterBackend()
+    )
+
+    for limit in [self.default_limit, *self.host_limits.values()]:
+      if limit.rate <= 0:
+        raise ValueError(f'rate must be positive: {limit.rate}')
+      if limit.burst < 1:
+        raise ValueError(f'burst must be at least 1: {limit.burst}')
+
+  def get_limit(self, key: str) -> RateLimit:
+    return self.host_limits.get(key, self.default_limit)
+
+  def reserve(self, key: str = '') -> float:
+    # Takes a token for key and returns the seconds to wait before using it
+    limit = self.get_limit(key)
+    interval = 1.0 / limit.rate
+
+    def take(
+      arrival_time: Optional[float],
+      now: float,
+    ) -> Tuple[float, float]:
+      next_arrival_time = max(
+        arrival_time if arrival_time is not None else now,
+        now,
+      ) + interval
+      allowed_at = next_arrival_time - limit.burst * interval
+
+      return next_arrival_time, max(0.0, allowed_at - now)
+
+    return self.backend.update(key=key, func=take)
+
+  def acquire(self, key: str = '') -> None:
+    wait = self.reserve(key=key)
+    if wait > 0:
+      time.sleep(wait)
+
+  async def aacquire(self, key: str = '') -> None:
+    import asyncio
+
+    if isinstance(self.backend, MemoryRateLimiterBackend):
+      wait = self.reserve(key=key)
+    else:
+      # other backends may block (a locked SQLite database), so they are
+      # called in a thread instead of on the event loop
+      wait = await asyncio.get_running_loop().run_in_executor(
+        None,
+        partial(self.reserve, key=key),
+      )
+
+    if wait > 0:
+      await asyncio.sleep(wait)
+
+  def defer(self, key: str, seconds: float) -> None:
+    # Allows no request for key for seconds (Retry-After)
+    limit = self.get_limit(key)
+    interval = 1.0 / limit.rate
+
+    def push(
+      arrival_time: Optional[float],
+      now: float,
+    ) -> Tuple[float, None]:
+      deferred_arrival_time = now + seconds + (limit.burst - 1) * interval
+      if arrival_time is not None:
+        deferred_arrival_time = max(arrival_time, deferred_arrival_time)
+
+      return deferred_arrival_time, None
+
+    self.backend.update(key=key, func=push)
+
+  async def adefer(self, key: str, seconds: float) -> None:
+    import asyncio
+
+    if isinstance(self.backend, MemoryRateLimiterBackend):
+      self.defer(key=key, seconds=seconds)
+      return
+
+    await asyncio.get_running_loop().run_in_executor(
+      None,
+      partial(self.defer, key=key, seconds=seconds),
+    )
+
+
+def parse_retry_after(value: str) -> Optional[float]:
+  # Retry-After: <delay-seconds> or <HTTP-date>
+  value = value.strip()
+  if value.isdigit():
+    return float(value)
+
+  try:
+    date = parsedate_to_datetime(value)
+  except (TypeError, ValueError):
+    return None
+
+  if date.tzinfo is None:
+    date = date.replace(tzinfo=timezone.utc)
+
+  return max(0.0, date.timestamp() - time.time())
+
+
+def get_retry_after(
+  status_code: int,
+  headers: Mapping[str, str],
+) -> Optional[float]:
+  # Seconds to wait before the next request, for 429 and 503 responses
+  if status_code not in (429, 503):
+    return None
+
+  value = headers.get('Retry-After')
+  if value is None:
+    return None
+
+  return parse_retry_after(value)
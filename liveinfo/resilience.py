@@ -0,0 +1,117 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+"""
+  Public APIs
+
+  RetryPolicy retries requests failed with a connection error, a timeout or
+  a retryable status (429, 5xx) after a jittered exponential backoff, or
+  after Retry-After if the server sends a longer one.
+
+  CircuitBreaker fails fast for a host while it keeps failing (connection
+  errors, timeouts and 5xx, e.g. during niconico maintenance): after
+  failure_threshold consecutive failures, requests to the host raise
+  CircuitOpenError for reset_timeout seconds, then one trial request is let
+  through to decide whether to close the circuit again.
+"""
+
+
+class CircuitOpenError(Exception):
+  def __init__(self, host: str):
+    super().__init__(f'Circuit open for {host}')
+    self.host = host
+
+
+@dataclass
+class RetryPolicy:
+  max_retries: int = 2  # retries after the first attempt
+  backoff_base: float = 0.5  # seconds, doubled per retry
+  backoff_max: float = 30.0
+  retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+  def should_retry(self, attempt: int) -> bool:
+    # attempt: 0 for the first attempt
+    return attempt < self.max_retries
+
+  def get_delay(
+    self,
+    attempt: int,
+    retry_after: Optional[float] = None,  # seconds given by the server
+  ) -> float:
+    # full jitter: uniform in [0, min(backoff_max, backoff_base * 2^attempt)]
+    delay = random.uniform(
+      0.0,
+      min(self.backoff_max, self.backoff_base * (2 ** attempt)),
+    )
+
+    if retry_after is not None:
+      delay = max(delay, min(self.backoff_max, retry_after))
+
+    return delay
+
+
+@dataclass
+class CircuitState:
+  failures: int = 0
+  opened_at: Optional[float] = None  # None: closed
+  trial_in_flight: bool = False  # half-open
+
+
+class CircuitBreaker:
+  def __init__(
+    self,
+    failure_threshold: int = 5,
+    reset_timeout: float = 60.0,
+  ):
+    self.failure_threshold = failure_threshold
+    self.reset_timeout = reset_timeout
+
+    self._lock = threading.Lock()
+    self._states: Dict[str, CircuitState] = {}
+
+  @staticmethod
+  def is_failure_status(status_code: int) -> bool:
+    return status_code >= 500
+
+  def before_request(self, host: str) -> None:
+    # Raises CircuitOpenError when the circuit for host is open
+    with self._lock:
+      state = self._states.get(host)
+      if state is None or state.opened_at is None:
+        return
+
+      if time.monotonic() - state.opened_at < self.reset_timeout or \
+          state.trial_in_flight:
+        raise CircuitOpenError(host=host)
+
+      state.trial_in_flight = True
+
+  def record_success(self, host: str) -> None:
+    with self._lock:
+      self._states.pop(host, None)
+
+  def record_failure(self, host: str) -> None:
+    with self._lock:
+      state = self._states.setdefault(host, CircuitState())
+      state.failures += 1
+
+      if state.trial_in_flight or state.failures >= self.failure_threshold:
+        state.opened_at = time.monotonic()
+        state.trial_in_flight = False
+
+  def release(self, host: str) -> None:
+    # Ends a request with no verdict on the host (an unexpected error,
+    # cancellation), so that the next request can be the trial
+    with self._lock:
+      state = self._states.get(host)
+      if state is not None:
+        state.trial_in_flight = False
+
+  def is_open(self, host: str) -> bool:
+    with self._lock:
+      state = self._states.get(host)
+      return state is not None and state.opened_at is not None
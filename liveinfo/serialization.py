@@ -0,0 +1,78 @@
+import dataclasses
+import functools
+from typing import Any, Dict, Tuple, Union, get_args, get_origin
+
+import typing
+
+
+"""
+  Public APIs
+
+  Converts the result dataclasses of nicolive and ytlive to JSON-compatible
+  values (dict, list, str, int, float, bool, None) and back.
+"""
+
+
+def dump_dataclass(obj: Any) -> Any:
+  if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+    return {
+      name: dump_dataclass(getattr(obj, name))
+      for name in get_field_names(type(obj))
+    }
+
+  if isinstance(obj, list):
+    return [dump_dataclass(item) for item in obj]
+
+  return obj
+
+
+def load_dataclass(tp: Any, data: Any) -> Any:
+  if data is None:
+    return None
+
+  origin = get_origin(tp)
+
+  if origin is Union:
+    dataclass_types = [
+      arg for arg in get_args(tp)
+      if isinstance(arg, type) and dataclasses.is_dataclass(arg)
+    ]
+    if len(dataclass_types) == 0 or not isinstance(data, dict):
+      return data  # e.g. Optional[str], Union[Literal[...], str]
+
+    if len(dataclass_types) == 1:
+      return load_dataclass(dataclass_types[0], data)
+
+    # result unions are tagged with result_type
+    for dataclass_type in dataclass_types:
+      result_type = get_type_hints(dataclass_type).get('result_type')
+      if result_type is not None and \
+          data.get('result_type') in get_args(result_type):
+        return load_dataclass(dataclass_type, data)
+
+    raise ValueError(
+      f'No member of {tp} matches result_type: {data.get("result_type")}'
+    )
+
+  if origin is list:
+    item_type = get_args(tp)[0]
+    return [load_dataclass(item_type, item) for item in data]
+
+  if isinstance(tp, type) and dataclasses.is_dataclass(tp):
+    type_hints = get_type_hints(tp)
+    return tp(**{
+      name: load_dataclass(type_hints[name], data.get(name))
+      for name in get_field_names(tp)
+    })
+
+  return data
+
+
+@functools.lru_cache(maxsize=None)
+def get_field_names(cls: type) -> Tuple[str, ...]:
+  return tuple(field.name for field in dataclasses.fields(cls))
+
+
+@functools.lru_cache(maxsize=None)
+def get_type_hints(cls: type) -> Dict[str, Any]:
+  return typing.get_type_hints(cls)
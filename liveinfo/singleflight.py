@@ -0,0 +1,100 @@
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import (
+  TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, MutableMapping,
+  TypeVar, cast,
+)
+
+if TYPE_CHECKING:
+  import asyncio
+
+
+"""
+  Public APIs
+
+  SingleFlight coalesces concurrent fetches of the same key: while a fetch
+  for a key is in flight, other callers asking for the key wait for it and
+  receive its result (or its exception) instead of fetching again.
+
+  do is for threads and ado is for asyncio tasks. Nothing is kept after the
+  fetch completes; use LiveProgramCache to reuse results for a while.
+"""
+
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    self._calls: Dict[Hashable, 'Future[Any]'] = {}
+    self._async_calls: MutableMapping[
+      'asyncio.AbstractEventLoop',
+      Dict[Hashable, 'asyncio.Future[Any]'],
+    ] = weakref.WeakKeyDictionary()
+
+  def do(
+    self,
+    key: Hashable,
+    fetch: Callable[[], T],
+  ) -> T:
+    with self._lock:
+      call = self._calls.get(key)
+      is_leader = call is None
+      if call is None:
+        call = Future()
+        self._calls[key] = call
+
+    if not is_leader:
+      return cast(T, call.result())
+
+    try:
+      result = fetch()
+    except BaseException as error:
+      self._end(key=key)
+      call.set_exception(error)
+      raise
+
+    self._end(key=key)
+    call.set_result(result)
+    return result
+
+  async def ado(
+    self,
+    key: Hashable,
+    fetch: Callable[[], Awaitable[T]],
+  ) -> T:
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+
+    calls = self._async_calls.get(loop)
+    if calls is None:
+      calls = {}
+      self._async_calls[loop] = calls
+
+    call = calls.get(key)
+    if call is None:
+      # A task of its own, so that a cancelled caller does not cancel the
+      # fetch the others are waiting for
+      call = asyncio.ensure_future(fetch())
+      calls[key] = call
+      call.add_done_callback(lambda _: calls.pop(key, None))
+      call.add_done_callback(retrieve_exception)
+
+    return cast(T, await asyncio.shield(call))
+
+  def _end(
+    self,
+    key: Hashable,
+  ) -> None:
+    with self._lock:
+      self._calls.pop(key, None)
+
+
+def retrieve_exception(task: 'asyncio.Future[Any]') -> None:
+  # Marks the exception as retrieved, for when every caller was cancelled:
+  # otherwise asyncio logs "Task exception was never retrieved"
+  if not task.cancelled():
+    task.exception()
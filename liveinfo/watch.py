@@ -0,0 +1,537 @@
+import heapq
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, List, Literal, Optional, Sequence, Tuple
+
+from . import nicolive
+from . import ytlive
+from .cache import parse_iso8601
+from .client import LiveInfoClient
+from .metrics import count_result
+from .resilience import CircuitOpenError
+
+
+"""
+  Public APIs
+
+  Polls many live ids / channels and reports only state changes.
+"""
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LiveProgramSnapshot:
+  service: str
+  is_live: bool
+  program_id: Optional[str]  # lv* (nicolive), video id (ytlive)
+  title: Optional[str]
+  url: Optional[str]
+  viewers: Optional[int]
+  start_date: Optional[str]  # ISO8601 timezone-aware datetime string
+  end_date: Optional[str]  # ISO8601 timezone-aware datetime string
+
+
+LiveProgramWatchEventType = Literal[
+  'went_live',
+  'ended',
+  'new_program',
+  'title_changed',
+  'viewers_changed',
+]
+
+
+@dataclass
+class LiveProgramWatchEvent:
+  event_type: LiveProgramWatchEventType
+  time: str  # ISO8601 timezone-aware datetime string
+  live_id_or_url: str
+  current: LiveProgramSnapshot
+  previous: Optional[LiveProgramSnapshot]
+
+
+@dataclass
+class WatchTarget:
+  live_id_or_url: str
+  service: str
+  interval: Optional[float] = None  # seconds; the watcher default if None
+
+
+@dataclass
+class WatchTargetState:
+  target: WatchTarget
+  interval: float  # current idle polling interval (seconds)
+  next_poll_at: Optional[float]  # UNIX time; None: polling stopped
+  snapshot: Optional[LiveProgramSnapshot] = None
+  reported_viewers: Optional[int] = None
+  first_polled_at: Optional[float] = None  # UNIX time
+  last_live_at: Optional[float] = None  # UNIX time
+
+
+def build_nicolive_program_snapshot(
+  nicolive_program_result: nicolive.GetNicoliveProgramResult,
+  now: float,  # UNIX time
+) -> Optional[LiveProgramSnapshot]:
+  if nicolive_program_result.result_type == 'success':
+    data = nicolive_program_result.data
+
+    is_live = False
+    if data.start_date is not None and \
+        parse_iso8601(data.start_date).timestamp() <= now:
+      is_live = data.end_date is None or \
+        now < parse_iso8601(data.end_date).timestamp()
+
+    program_id: Optional[str] = None
+    if data.url is not None:
+      program_id_match = re.search(r'lv\d+', data.url)
+      if program_id_match is not None:
+        program_id = program_id_match.group(0)
+
+    return LiveProgramSnapshot(
+      service='nicolive',
+      is_live=is_live,
+      program_id=program_id,
+      title=data.name,
+      url=data.url,
+      viewers=None,  # not in the watch page
+      start_date=data.start_date,
+      end_date=data.end_date,
+    )
+
+  # a community or channel without any program
+  if nicolive_program_result.result_type == 'not_found':
+    return build_offline_snapshot(service='nicolive')
+
+  return None
+
+
+def build_ytlive_programs_snapshot(
+  ytlive_programs_result: ytlive.GetYtliveProgramsResult,
+) -> Optional[LiveProgramSnapshot]:
+  if ytlive_programs_result.result_type != 'success':
+    return None
+
+  items = ytlive_programs_result.data.items
+
+  # the live broadcast, or else the next scheduled one
+  item = next(
+    (item for item in items if item.live_broadcast_content == 'live'),
+    None,
+  )
+  if item is None:
+    item = next(
+      (item for item in items if item.live_broadcast_content == 'upcoming'),
+      None,
+    )
+  if item is None:
+    return build_offline_snapshot(service='ytlive')
+
+  details = item.live_streaming_details
+
+  viewers: Optional[int] = None
+  if details.concurrent_viewers is not None:
+    viewers = int(details.concurrent_viewers)
+
+  return LiveProgramSnapshot(
+    service='ytlive',
+    is_live=item.live_broadcast_content == 'live',
+    program_id=item.video_id,
+    title=item.title,
+    url=f'https://www.youtube.com/watch?v={item.video_id}',
+    viewers=viewers,
+    start_date=details.actual_start_time or details.scheduled_start_time,
+    end_date=details.actual_end_time,
+  )
+
+
+def build_offline_snapshot(service: str) -> LiveProgramSnapshot:
+  return LiveProgramSnapshot(
+    service=service,
+    is_live=False,
+    program_id=None,
+    title=None,
+    url=None,
+    viewers=None,
+    start_date=None,
+    end_date=None,
+  )
+
+
+def fetch_live_program_snapshot(
+  target: WatchTarget,
+  useragent: str,
+  ytlive_api_key: Optional[ytlive.YtliveApiKey],
+  client: Optional[LiveInfoClient] = None,
+  nicolive_engine: nicolive.NicoliveWatchHtmlEngine = 'html5lib',
+  ytlive_discovery: ytlive.YtliveDiscovery = 'search',
+  ytlive_conditional_cache: Optional[ytlive.YtliveConditionalCache] = None,
+  ytlive_sync_state: Optional[ytlive.YtliveSyncState] = None,
+) -> Optional[LiveProgramSnapshot]:
+  # None: the state is unknown this time (error, maintenance)
+  import requests
+
+  now = time.time()
+
+  try:
+    if target.service == 'nicolive':
+      nicolive_program_result = nicolive.get_nicolive_program(
+        live_id_or_url=target.live_id_or_url,
+        useragent=useragent,
+        engine=nicolive_engine,
+        client=client,
+      )
+      count_result(
+        service=target.service,
+        result_type=nicolive_program_result.result_type,
+      )
+
+      return build_nicolive_program_snapshot(
+        nicolive_program_result=nicolive_program_result,
+        now=now,
+      )
+
+    if target.service == 'ytlive':
+      assert ytlive_api_key is not None, 'ytlive_api_key is required'
+
+      ytlive_programs_result = ytlive.get_ytlive_programs(
+        channel_id=target.live_id_or_url,
+        useragent=useragent,
+        api_key=ytlive_api_key,
+        client=client,
+        conditional_cache=ytlive_conditional_cache,
+        discovery=ytlive_discovery,
+        sync_state=ytlive_sync_state,
+      )
+      count_result(
+        service=target.service,
+        result_type=ytlive_programs_result.result_type,
+      )
+
+      return build_ytlive_programs_snapshot(
+        ytlive_programs_result=ytlive_programs_result,
+      )
+  except (CircuitOpenError, requests.RequestException):
+    return None
+  except Exception:
+    # an unexpected error (e.g. a malformed response) of one poll must not
+    # stop the watcher; the previous state is kept
+    logger.warning(
+      'Failed to fetch %s', target.live_id_or_url,
+      exc_info=True,
+    )
+    return None
+
+  raise ValueError(f'Unknown service: {target.service}')
+
+
+def diff_live_program_snapshots(
+  previous: Optional[LiveProgramSnapshot],  # None: first observation
+  current: LiveProgramSnapshot,
+  reported_viewers: Optional[int],
+  viewers_delta: int,
+) -> List[LiveProgramWatchEventType]:
+  event_types: List[LiveProgramWatchEventType] = []
+
+  # a program already on air at the first observation is reported as well
+  was_live = previous is not None and previous.is_live
+  if current.is_live and not was_live:
+    event_types.append('went_live')
+  elif was_live and not current.is_live:
+    event_types.append('ended')
+
+  if previous is None:
+    return event_types
+
+  if current.program_id is not None and \
+      previous.program_id is not None and \
+      current.program_id != previous.program_id:
+    event_types.append('new_program')
+  elif current.program_id is not None and \
+      current.program_id == previous.program_id and \
+      current.title != previous.title:
+    event_types.append('title_changed')
+
+  if current.is_live and current.viewers is not None and \
+      reported_viewers is not None and \
+      abs(current.viewers - reported_viewers) >= viewers_delta:
+    event_types.append('viewers_changed')
+
+  return event_types
+
+
+class LiveProgramWatchScheduler:
+  # Decides when to poll each target next from the program times
+  # (nicolive start_date / end_date, ytlive scheduled / actual times).
+  #
+  # - live: every interval, and again right after the scheduled end_date
+  # - start_date ahead: idle polling, but from start_lead seconds before
+  #   it until start_grace seconds after it, every dense_interval
+  # - a program id (lv*) that has ended: stop polling
+  # - otherwise idle: back off from interval by backoff up to
+  #   max_interval, and use long_idle_interval once nothing has been on
+  #   air for long_idle_after seconds
+  #
+  # Any change resets the idle interval to the target's interval.
+
+  def __init__(
+    self,
+    interval: float = 60.0,
+    max_interval: float = 900.0,
+    backoff: float = 2.0,
+    dense_interval: float = 15.0,
+    start_lead: float = 300.0,
+    start_grace: float = 900.0,
+    long_idle_after: float = 3 * 86400.0,
+    long_idle_interval: float = 3600.0,
+  ):
+    self.interval = interval
+    self.max_interval = max_interval
+    self.backoff = backoff
+    self.dense_interval = dense_interval
+    self.start_lead = start_lead
+    self.start_grace = start_grace
+    self.long_idle_after = long_idle_after
+    self.long_idle_interval = long_idle_interval
+
+  def get_base_interval(self, target: WatchTarget) -> float:
+    return target.interval if target.interval is not None else self.interval
+
+  def get_next_poll_at(
+    self,
+    state: WatchTargetState,
+    changed: bool,
+    now: float,  # UNIX time
+  ) -> Optional[float]:
+    # None: stop polling the target
+    snapshot = state.snapshot
+    if snapshot is None:
+      return now + state.interval
+
+    base_interval = self.get_base_interval(target=state.target)
+    if changed or snapshot.is_live:
+      state.interval = base_interval
+    else:
+      state.interval = min(
+        max(state.interval * self.backoff, base_interval),
+        max(self.max_interval, base_interval),
+      )
+
+    start_time = parse_timestamp(snapshot.start_date)
+    end_time = parse_timestamp(snapshot.end_date)
+
+    if snapshot.is_live:
+      if end_time is not None and end_time > now:
+        return min(
+          now + base_interval,
+          max(end_time, now + self.dense_interval),
+        )
+
+      return now + base_interval
+
+    if end_time is not None and end_time <= now:
+      if is_program_target(target=state.target):
+        return None
+    elif start_time is not None:
+      if now < start_time - self.start_lead:
+        return min(now + state.interval, start_time - self.start_lead)
+
+      if now < start_time + self.start_grace:
+        return now + min(self.dense_interval, base_interval)
+
+    # the last time something was on air, or else the first poll
+    idle_since = max(
+      (
+        value
+        for value in [state.last_live_at, end_time]
+        if value is not None
+      ),
+      default=(
+        state.first_polled_at if state.first_polled_at is not None else now
+      ),
+    )
+
+    if now - idle_since >= self.long_idle_after:
+      return now + max(state.interval, self.long_idle_interval)
+
+    return now + state.interval
+
+
+def is_program_target(target: WatchTarget) -> bool:
+  # a program id never starts again, unlike a community, channel or user
+  if target.service != 'nicolive':
+    return False
+
+  safe_live_id = nicolive.get_safe_live_id(
+    live_id_or_url=target.live_id_or_url,
+  )
+  return safe_live_id is not None and safe_live_id.startswith('lv')
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+  if value is None:
+    return None
+
+  return parse_iso8601(value).timestamp()
+
+
+class LiveProgramWatcher:
+  # Polls targets in the order of the next poll time decided by the
+  # scheduler, and reports changes between consecutive snapshots.
+
+  def __init__(
+    self,
+    targets: Sequence[WatchTarget],
+    fetch: Callable[[WatchTarget], Optional[LiveProgramSnapshot]],
+    scheduler: Optional[LiveProgramWatchScheduler] = None,
+    viewers_delta: int = 100,
+    jobs: int = 8,
+  ):
+    self.fetch = fetch
+    self.scheduler = (
+      scheduler if scheduler is not None else LiveProgramWatchScheduler()
+    )
+    self.viewers_delta = viewers_delta
+    self.jobs = jobs
+
+    now = time.time()
+    self.states = [
+      WatchTargetState(
+        target=target,
+        interval=self.scheduler.get_base_interval(target=target),
+        next_poll_at=now,
+      )
+      for target in targets
+    ]
+
+    # (next_poll_at, index in self.states)
+    self._queue: List[Tuple[float, int]] = [
+      (now, index) for index in range(len(self.states))
+    ]
+    heapq.heapify(self._queue)
+
+    self._executor: Optional[ThreadPoolExecutor] = None
+
+  def next_poll_at(self) -> Optional[float]:
+    if len(self._queue) == 0:
+      return None
+
+    return self._queue[0][0]
+
+  def poll_due(
+    self,
+    now: float,  # UNIX time
+  ) -> List[LiveProgramWatchEvent]:
+    due_indices: List[int] = []
+    while len(self._queue) > 0 and self._queue[0][0] <= now:
+      _, index = heapq.heappop(self._queue)
+      due_indices.append(index)
+
+    if len(due_indices) == 0:
+      return []
+
+    targets = [self.states[index].target for index in due_indices]
+    if len(targets) == 1 or self.jobs <= 1:
+      snapshots = [self.fetch(target) for target in targets]
+    else:
+      if self._executor is None:
+        self._executor = ThreadPoolExecutor(max_workers=self.jobs)
+      snapshots = list(self._executor.map(self.fetch, targets))
+
+    events: List[LiveProgramWatchEvent] = []
+    for index, snapshot in zip(due_indices, snapshots):
+      events.extend(self.update(index=index, snapshot=snapshot, now=now))
+
+    return events
+
+  def update(
+    self,
+    index: int,  # index in self.states
+    snapshot: Optional[LiveProgramSnapshot],
+    now: float,  # UNIX time
+  ) -> List[LiveProgramWatchEvent]:
+    state = self.states[index]
+    events: List[LiveProgramWatchEvent] = []
+
+    if state.first_polled_at is None:
+      state.first_polled_at = now
+
+    if snapshot is not None:
+      event_types = diff_live_program_snapshots(
+        previous=state.snapshot,
+        current=snapshot,
+        reported_viewers=state.reported_viewers,
+        viewers_delta=self.viewers_delta,
+      )
+
+      event_time = datetime.fromtimestamp(now, tz=timezone.utc).isoformat()
+      for event_type in event_types:
+        events.append(
+          LiveProgramWatchEvent(
+            event_type=event_type,
+            time=event_time,
+            live_id_or_url=state.target.live_id_or_url,
+            current=snapshot,
+            previous=state.snapshot,
+          )
+        )
+
+      if not snapshot.is_live:
+        state.reported_viewers = None
+      elif state.reported_viewers is None or \
+          'viewers_changed' in event_types:
+        state.reported_viewers = snapshot.viewers
+
+      if snapshot.is_live:
+        state.last_live_at = now
+
+      state.snapshot = snapshot
+      changed = len(event_types) > 0
+
+      state.next_poll_at = self.scheduler.get_next_poll_at(
+        state=state,
+        changed=changed,
+        now=now,
+      )
+    else:
+      # keep the previous snapshot and retry after the current interval
+      state.next_poll_at = now + state.interval
+
+    if state.next_poll_at is not None:
+      heapq.heappush(self._queue, (state.next_poll_at, index))
+
+    return events
+
+  def run(
+    self,
+    emit: Callable[[LiveProgramWatchEvent], None],
+    stop_event: Optional[threading.Event] = None,
+  ) -> None:
+    if stop_event is None:
+      stop_event = threading.Event()
+
+    while not stop_event.is_set():
+      for event in self.poll_due(now=time.time()):
+        emit(event)
+
+      next_poll_at = self.next_poll_at()
+      if next_poll_at is None:
+        break
+
+      stop_event.wait(max(next_poll_at - time.time(), 0.0))
+
+  def close(self) -> None:
+    if self._executor is not None:
+      self._executor.shutdown(wait=False)
+      self._executor = None
+
+  def __enter__(self) -> 'LiveProgramWatcher':
+    return self
+
+  def __exit__(self, *args: object) -> None:
+    self.close()
@@ -1,6 +1,19 @@
-from typing import Optional, List, Literal, Union
-import requests
+from typing import (
+  Any, AsyncIterator, Callable, Container, Dict, Iterator, Optional, List,
+  Literal, Mapping, Sequence, Set, Tuple, TypeVar, Union,
+)
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+from .aio import AsyncLiveInfoClient, open_async_client
+from .cache import parse_iso8601
+from .client import LiveInfoClient, http_get
+from .metrics import get_metrics, measure, observe_http_response_bytes
 
 
 """
@@ -8,8 +21,29 @@ from dataclasses import dataclass
 """
 
 
+# search: search.list (100 units, includes only public videos)
+# uploads: playlistItems.list on the channel uploads playlist (1 unit)
+YtliveDiscovery = Literal['search', 'uploads']
+
+# YouTube Data API v3 quota cost per request (units)
+# https://developers.google.com/youtube/v3/determine_quota_cost
+ytlive_quota_costs: Dict[str, int] = {
+  'search.list': 100,
+  'videos.list': 1,
+  'playlistItems.list': 1,
+}
+
+# default daily quota of a Google Cloud project (units)
+ytlive_default_daily_quota = 10000
+
+# an API key, or a pool of API keys to rotate between
+YtliveApiKey = Union[str, 'YtliveApiKeyPool']
+
+
 @dataclass
 class GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail:
+  __slots__ = ('url', 'width', 'height')
+
   url: str
   width: int
   height: int
@@ -17,6 +51,8 @@ class GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail:
 
 @dataclass
 class GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnails:
+  __slots__ = ('default', 'medium', 'high', 'standard', 'maxres')
+
   default: Optional[GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail]
   medium: Optional[GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail]
   high: Optional[GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail]
@@ -26,12 +62,22 @@ class GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnails:
 
 @dataclass
 class GetYtliveProgramsSuccessYtliveProgramsDataItemStatus:
+  __slots__ = ('upload_status', 'privacy_status')
+
   upload_status: Union[Literal['processed', 'uploaded'], str]
-  privacy_status: Union[Literal['public'], str]
+  privacy_status: Union[Literal['private', 'public', 'unlisted'], str]
 
 
 @dataclass
 class GetYtliveProgramsSuccessYtliveProgramsDataItemLiveStreamingDetails:
+  __slots__ = (
+    'actual_start_time',
+    'actual_end_time',
+    'scheduled_start_time',
+    'scheduled_end_time',
+    'concurrent_viewers',
+  )
+
   actual_start_time: Optional[str]
   actual_end_time: Optional[str]
   scheduled_start_time: Optional[str]
@@ -41,6 +87,18 @@ class GetYtliveProgramsSuccessYtliveProgramsDataItemLiveStreamingDetails:
 
 @dataclass
 class GetYtliveProgramsSuccessYtliveProgramsDataItem:
+  __slots__ = (
+    'channel_id',
+    'channel_title',
+    'video_id',
+    'title',
+    'description',
+    'live_broadcast_content',
+    'status',
+    'thumbnails',
+    'live_streaming_details',
+  )
+
   channel_id: str
   channel_title: str
   video_id: str
@@ -55,11 +113,15 @@ class GetYtliveProgramsSuccessYtliveProgramsDataItem:
 
 @dataclass
 class GetYtliveProgramsSuccessYtliveProgramsData:
+  __slots__ = ('items',)
+
   items: List[GetYtliveProgramsSuccessYtliveProgramsDataItem]
 
 
 @dataclass
 class GetYtliveProgramsSuccessYtliveProgramsResult:
+  __slots__ = ('result_type', 'data_type', 'data')
+
   result_type: Literal['success']
   data_type: Literal['ytlive_programs']
   data: GetYtliveProgramsSuccessYtliveProgramsData
@@ -67,21 +129,29 @@ class GetYtliveProgramsSuccessYtliveProgramsResult:
 
 @dataclass
 class GetYtliveProgramsBadRequestResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['bad_request']
 
 
 @dataclass
 class GetYtliveProgramsForbiddenResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['forbidden']
 
 
 @dataclass
 class GetYtliveProgramsMaintenanceResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['maintenance']
 
 
 @dataclass
 class GetYtliveProgramsUnknownErrorResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['unknown_error']
 
 
@@ -94,149 +164,554 @@ GetYtliveProgramsResult = Union[
 ]
 
 
+def validate_ytlive_channel_id(channel_id: str) -> bool:
+  return re.fullmatch(r'UC[0-9A-Za-z_-]{22}', channel_id) is not None
+
+
 def get_ytlive_programs(
   channel_id: str,
   useragent: str,
-  api_key: str,
+  api_key: YtliveApiKey,
   max_results: Optional[int] = None,
+  client: Optional[LiveInfoClient] = None,
+  conditional_cache: Optional['YtliveConditionalCache'] = None,
+  discovery: YtliveDiscovery = 'search',
+  sync_state: Optional['YtliveSyncState'] = None,
 ) -> GetYtliveProgramsResult:
-  search_list_video_result = get_ytlive_search_list_video(
+  discovery_result = discover_ytlive_videos(
     channel_id=channel_id,
     useragent=useragent,
     api_key=api_key,
     max_results=max_results,
+    client=client,
+    conditional_cache=conditional_cache,
+    discovery=discovery,
   )
-  if search_list_video_result.result_type == 'success':
-    if search_list_video_result.data_type == 'ytlive_programs':
-      search_list_video_items = search_list_video_result.data.items
 
-      video_ids = [
-        search_list_video_item.video_id
-        for search_list_video_item in search_list_video_items
-      ]
+  if discovery_result.result_type == 'success':
+    if discovery_result.data_type == 'ytlive_programs':
+      video_ids = get_ytlive_discovered_video_ids(
+        discovery_result=discovery_result,
+      )
 
-      videos_list_result = get_ytlive_videos_list(
-        id=','.join(video_ids),
-        useragent=useragent,
-        api_key=api_key,
+      # with sync_state, only new, upcoming and live videos are queried
+      query_video_ids = (
+        sync_state.select_video_ids(
+          channel_id=channel_id,
+          video_ids=video_ids,
+        )
+        if sync_state is not None else video_ids
+      )
+
+      if sync_state is not None and len(query_video_ids) == 0:
+        videos_list_result = merge_ytlive_videos_list_results(
+          videos_list_results=[],
+        )
+      else:
+        videos_list_result = get_ytlive_videos_list_chunked(
+          video_ids=query_video_ids,
+          useragent=useragent,
+          api_key=api_key,
+          client=client,
+          conditional_cache=conditional_cache,
+        )
+
+      if sync_state is not None:
+        videos_list_result = sync_state.merge(
+          channel_id=channel_id,
+          video_ids=video_ids,
+          queried_video_ids=query_video_ids,
+          videos_list_result=videos_list_result,
+        )
+
+      return build_ytlive_programs_result(
+        videos_list_result=videos_list_result,
       )
 
-      if videos_list_result.result_type == 'success':
-        if videos_list_result.data_type == 'ytlive_programs':
-          videos_list_items = videos_list_result.data.items
-
-          items: List[GetYtliveProgramsSuccessYtliveProgramsDataItem] = []
-          for videos_list_item in videos_list_items:
-            if videos_list_item.status.privacy_status != 'public':
-              continue  # drop not-public (private and unlisted) videos
-
-            live_streaming_details = (
-              GetYtliveProgramsSuccessYtliveProgramsDataItemLiveStreamingDetails(  # noqa: E501
-                actual_start_time=(
-                  videos_list_item.live_streaming_details.actual_start_time
-                ),
-                actual_end_time=(
-                  videos_list_item.live_streaming_details.actual_end_time
-                ),
-                scheduled_start_time=(
-                  videos_list_item.live_streaming_details.scheduled_start_time
-                ),
-                scheduled_end_time=(
-                  videos_list_item.live_streaming_details.scheduled_end_time
-                ),
-                concurrent_viewers=(
-                  videos_list_item.live_streaming_details.concurrent_viewers
-                ),
-              )
-            )
-
-            items.append(
-              GetYtliveProgramsSuccessYtliveProgramsDataItem(
-                channel_id=videos_list_item.channel_id,
-                channel_title=videos_list_item.channel_title,
-                video_id=videos_list_item.video_id,
-                title=videos_list_item.title,
-                description=videos_list_item.description,
-                live_broadcast_content=videos_list_item.live_broadcast_content,
-                status=GetYtliveProgramsSuccessYtliveProgramsDataItemStatus(
-                  upload_status=videos_list_item.status.upload_status,
-                  privacy_status=videos_list_item.status.privacy_status,
-                ),
-                thumbnails=(
-                  GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnails(
-                    default=(
-                      GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail(
-                        url=videos_list_item.thumbnails.default.url,
-                        width=videos_list_item.thumbnails.default.width,
-                        height=videos_list_item.thumbnails.default.height,
-                      )
-                      if videos_list_item.thumbnails.default is not None
-                      else None
-                    ),
-                    medium=(
-                      GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail(
-                        url=videos_list_item.thumbnails.medium.url,
-                        width=videos_list_item.thumbnails.medium.width,
-                        height=videos_list_item.thumbnails.medium.height,
-                      )
-                      if videos_list_item.thumbnails.medium is not None
-                      else None
-                    ),
-                    high=(
-                      GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail(
-                        url=videos_list_item.thumbnails.high.url,
-                        width=videos_list_item.thumbnails.high.width,
-                        height=videos_list_item.thumbnails.high.height,
-                      )
-                      if videos_list_item.thumbnails.high is not None
-                      else None
-                    ),
-                    standard=(
-                      GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail(
-                        url=videos_list_item.thumbnails.standard.url,
-                        width=videos_list_item.thumbnails.standard.width,
-                        height=videos_list_item.thumbnails.standard.height,
-                      )
-                      if videos_list_item.thumbnails.standard is not None
-                      else None
-                    ),
-                    maxres=(
-                      GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail(
-                        url=videos_list_item.thumbnails.maxres.url,
-                        width=videos_list_item.thumbnails.maxres.width,
-                        height=videos_list_item.thumbnails.maxres.height,
-                      )
-                      if videos_list_item.thumbnails.maxres is not None
-                      else None
-                    ),
-                  )
-                ),
-                live_streaming_details=live_streaming_details,
-              )
-            )
-
-          return GetYtliveProgramsSuccessYtliveProgramsResult(
-            result_type='success',
-            data_type='ytlive_programs',
-            data=GetYtliveProgramsSuccessYtliveProgramsData(
-              items=items,
-            ),
+  return GetYtliveProgramsUnknownErrorResult(
+    result_type='unknown_error',
+  )
+
+
+async def aget_ytlive_programs(
+  channel_id: str,
+  useragent: str,
+  api_key: YtliveApiKey,
+  max_results: Optional[int] = None,
+  client: Optional[AsyncLiveInfoClient] = None,
+  conditional_cache: Optional['YtliveConditionalCache'] = None,
+  discovery: YtliveDiscovery = 'search',
+  sync_state: Optional['YtliveSyncState'] = None,
+) -> GetYtliveProgramsResult:
+  async with open_async_client(client=client) as client:
+    discovery_result = await adiscover_ytlive_videos(
+      channel_id=channel_id,
+      useragent=useragent,
+      api_key=api_key,
+      max_results=max_results,
+      client=client,
+      conditional_cache=conditional_cache,
+      discovery=discovery,
+    )
+
+    if discovery_result.result_type == 'success':
+      if discovery_result.data_type == 'ytlive_programs':
+        video_ids = get_ytlive_discovered_video_ids(
+          discovery_result=discovery_result,
+        )
+
+        # with sync_state, only new, upcoming and live videos are queried
+        query_video_ids = (
+          sync_state.select_video_ids(
+            channel_id=channel_id,
+            video_ids=video_ids,
+          )
+          if sync_state is not None else video_ids
+        )
+
+        if sync_state is not None and len(query_video_ids) == 0:
+          videos_list_result = merge_ytlive_videos_list_results(
+            videos_list_results=[],
+          )
+        else:
+          videos_list_result = await aget_ytlive_videos_list_chunked(
+            video_ids=query_video_ids,
+            useragent=useragent,
+            api_key=api_key,
+            client=client,
+            conditional_cache=conditional_cache,
           )
 
-      elif videos_list_result.result_type == 'bad_request':
-        return GetYtliveProgramsBadRequestResult(
-          result_type='bad_request',
+        if sync_state is not None:
+          videos_list_result = sync_state.merge(
+            channel_id=channel_id,
+            video_ids=video_ids,
+            queried_video_ids=query_video_ids,
+            videos_list_result=videos_list_result,
+          )
+
+        return build_ytlive_programs_result(
+          videos_list_result=videos_list_result,
         )
 
-      elif videos_list_result.result_type == 'forbidden':
-        return GetYtliveProgramsForbiddenResult(
-          result_type='forbidden',
+    return GetYtliveProgramsUnknownErrorResult(
+      result_type='unknown_error',
+    )
+
+
+def get_ytlive_programs_batch(
+  channel_ids: Sequence[str],
+  useragent: str,
+  api_key: YtliveApiKey,
+  max_results: Optional[int] = None,
+  client: Optional[LiveInfoClient] = None,
+  conditional_cache: Optional['YtliveConditionalCache'] = None,
+  discovery: YtliveDiscovery = 'search',
+  max_concurrency: int = 8,
+) -> Dict[str, GetYtliveProgramsResult]:
+  # Discover videos per channel, then hydrate the video ids of all the
+  # channels together with videos.list (up to 50 ids per request).
+  # Results are keyed by channel id in the order of channel_ids.
+  def discover(channel_id: str) -> 'YtliveDiscoveryResult':
+    return discover_ytlive_videos(
+      channel_id=channel_id,
+      useragent=useragent,
+      api_key=api_key,
+      max_results=max_results,
+      client=client,
+      conditional_cache=conditional_cache,
+      discovery=discovery,
+    )
+
+  with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+    discovery_results = dict(
+      zip(channel_ids, executor.map(discover, channel_ids))
+    )
+
+  channel_video_ids: Dict[str, List[str]] = {}
+  for channel_id, discovery_result in discovery_results.items():
+    if discovery_result.result_type == 'success':
+      if discovery_result.data_type == 'ytlive_programs':
+        channel_video_ids[channel_id] = get_ytlive_discovered_video_ids(
+          discovery_result=discovery_result,
         )
 
-      elif videos_list_result.result_type == 'maintenance':
-        return GetYtliveProgramsMaintenanceResult(
-          result_type='maintenance',
+  all_video_ids = list(dict.fromkeys(
+    video_id
+    for video_ids in channel_video_ids.values()
+    for video_id in video_ids
+  ))
+
+  videos_list_items: Dict[
+    str,
+    'GetYtliveVideosListSuccessYtliveProgramsDataItem',
+  ] = {}
+  videos_list_errors: Dict[str, 'GetYtliveVideosListResult'] = {}
+  for chunk_video_ids in chunk_ytlive_video_ids(video_ids=all_video_ids):
+    videos_list_result = get_ytlive_videos_list(
+      id=','.join(chunk_video_ids),
+      useragent=useragent,
+      api_key=api_key,
+      client=client,
+      conditional_cache=conditional_cache,
+    )
+
+    if videos_list_result.result_type == 'success':
+      for item in videos_list_result.data.items:
+        videos_list_items[item.video_id] = item
+    else:
+      for video_id in chunk_video_ids:
+        videos_list_errors[video_id] = videos_list_result
+
+  results: Dict[str, GetYtliveProgramsResult] = {}
+  for channel_id in channel_ids:
+    video_ids = channel_video_ids.get(channel_id)
+    if video_ids is None:
+      results[channel_id] = GetYtliveProgramsUnknownErrorResult(
+        result_type='unknown_error',
+      )
+      continue
+
+    error_result = next(
+      (
+        videos_list_errors[video_id]
+        for video_id in video_ids
+        if video_id in videos_list_errors
+      ),
+      None,
+    )
+    if error_result is not None:
+      results[channel_id] = build_ytlive_programs_result(
+        videos_list_result=error_result,
+      )
+      continue
+
+    results[channel_id] = build_ytlive_programs_result(
+      videos_list_result=GetYtliveVideosListSuccessYtliveProgramsResult(
+        result_type='success',
+        data_type='ytlive_programs',
+        data=GetYtliveVideosListSuccessYtliveProgramsData(
+          items=[
+            videos_list_items[video_id]
+            for video_id in video_ids
+            if video_id in videos_list_items
+          ],
+        ),
+      ),
+    )
+
+  return results
+
+
+def iter_ytlive_programs(
+  channel_id: str,
+  useragent: str,
+  api_key: YtliveApiKey,
+  published_after: Optional[str] = None,
+  max_count: Optional[int] = None,
+  stop_video_ids: Optional[Container[str]] = None,
+  page_size: int = 50,
+  client: Optional[LiveInfoClient] = None,
+  discovery: YtliveDiscovery = 'search',
+) -> Iterator[GetYtliveProgramsResult]:
+  # Crawls the videos of a channel from the newest, following nextPageToken,
+  # and yields one result per discovered page hydrated with videos.list,
+  # holding only one page at a time.
+  # Stops after the last page, at a video published before published_after
+  # (ISO 8601), at a video in stop_video_ids (e.g. the video ids yielded in
+  # a previous run) or after max_count programs.
+  # A result other than success is yielded last.
+  paginator = YtliveProgramsPaginator(
+    published_after=published_after,
+    max_count=max_count,
+    stop_video_ids=stop_video_ids,
+  )
+
+  page_token: Optional[str] = None
+  while True:
+    discovery_result = discover_ytlive_videos(
+      channel_id=channel_id,
+      useragent=useragent,
+      api_key=api_key,
+      max_results=page_size,
+      page_token=page_token,
+      client=client,
+      discovery=discovery,
+    )
+    if discovery_result.result_type != 'success':
+      yield GetYtliveProgramsUnknownErrorResult(
+        result_type='unknown_error',
+      )
+      return
+
+    video_ids = paginator.select_video_ids(discovery_result=discovery_result)
+    if len(video_ids) > 0:
+      programs_result = paginator.build_programs_result(
+        videos_list_result=get_ytlive_videos_list_chunked(
+          video_ids=video_ids,
+          useragent=useragent,
+          api_key=api_key,
+          client=client,
+        ),
+      )
+      if programs_result.result_type != 'success' \
+          or len(programs_result.data.items) > 0:
+        yield programs_result
+
+    page_token = paginator.next_page_token
+    if page_token is None:
+      return
+
+
+async def aiter_ytlive_programs(
+  channel_id: str,
+  useragent: str,
+  api_key: YtliveApiKey,
+  published_after: Optional[str] = None,
+  max_count: Optional[int] = None,
+  stop_video_ids: Optional[Container[str]] = None,
+  page_size: int = 50,
+  client: Optional[AsyncLiveInfoClient] = None,
+  discovery: YtliveDiscovery = 'search',
+) -> AsyncIterator[GetYtliveProgramsResult]:
+  async with open_async_client(client=client) as client:
+    paginator = YtliveProgramsPaginator(
+      published_after=published_after,
+      max_count=max_count,
+      stop_video_ids=stop_video_ids,
+    )
+
+    page_token: Optional[str] = None
+    while True:
+      discovery_result = await adiscover_ytlive_videos(
+        channel_id=channel_id,
+        useragent=useragent,
+        api_key=api_key,
+        max_results=page_size,
+        page_token=page_token,
+        client=client,
+        discovery=discovery,
+      )
+      if discovery_result.result_type != 'success':
+        yield GetYtliveProgramsUnknownErrorResult(
+          result_type='unknown_error',
+        )
+        return
+
+      video_ids = paginator.select_video_ids(discovery_result=discovery_result)
+      if len(video_ids) > 0:
+        programs_result = paginator.build_programs_result(
+          videos_list_result=await aget_ytlive_videos_list_chunked(
+            video_ids=video_ids,
+            useragent=useragent,
+            api_key=api_key,
+            client=client,
+          ),
         )
+        if programs_result.result_type != 'success' \
+            or len(programs_result.data.items) > 0:
+          yield programs_result
+
+      page_token = paginator.next_page_token
+      if page_token is None:
+        return
+
+
+class YtliveProgramsPaginator:
+  # Stop conditions of iter_ytlive_programs, shared by the async version.
+  # next_page_token is None once a stop condition is met.
+
+  def __init__(
+    self,
+    published_after: Optional[str] = None,
+    max_count: Optional[int] = None,
+    stop_video_ids: Optional[Container[str]] = None,
+  ):
+    self.published_after = (
+      parse_iso8601(published_after)
+      if published_after is not None else None
+    )
+    self.max_count = max_count
+    self.stop_video_ids = stop_video_ids
+
+    self.count = 0
+    self.next_page_token: Optional[str] = None
+
+  def select_video_ids(
+    self,
+    discovery_result: Union[
+      'GetYtliveSearchListSuccessYtliveProgramsResult',
+      'GetYtlivePlaylistItemsListSuccessYtliveProgramsResult',
+    ],
+  ) -> List[str]:
+    # Video ids of a page up to the first one meeting a stop condition
+    self.next_page_token = discovery_result.data.next_page_token
+
+    video_ids: List[str] = []
+    for discovered_item in discovery_result.data.items:
+      if self.stop_video_ids is not None and \
+          discovered_item.video_id in self.stop_video_ids:
+        self.next_page_token = None
+        break
+
+      video_published_at = discovered_item.video_published_at
+      if self.published_after is not None and \
+          video_published_at is not None and \
+          parse_iso8601(video_published_at) < self.published_after:
+        self.next_page_token = None
+        break
+
+      video_ids.append(discovered_item.video_id)
+
+    return video_ids
+
+  def build_programs_result(
+    self,
+    videos_list_result: 'GetYtliveVideosListResult',
+  ) -> GetYtliveProgramsResult:
+    programs_result = build_ytlive_programs_result(
+      videos_list_result=videos_list_result,
+    )
+    if programs_result.result_type != 'success':
+      self.next_page_token = None
+      return programs_result
+
+    if self.max_count is not None:
+      items = programs_result.data.items[:self.max_count - self.count]
+      programs_result.data.items = items
+
+      if self.count + len(items) >= self.max_count:
+        self.next_page_token = None
+
+    self.count += len(programs_result.data.items)
+    return programs_result
+
+
+def discover_ytlive_videos(
+  channel_id: str,
+  useragent: str,
+  api_key: YtliveApiKey,
+  max_results: Optional[int] = None,
+  page_token: Optional[str] = None,
+  client: Optional[LiveInfoClient] = None,
+  conditional_cache: Optional['YtliveConditionalCache'] = None,
+  discovery: YtliveDiscovery = 'search',
+) -> 'YtliveDiscoveryResult':
+  if discovery == 'uploads':
+    return get_ytlive_playlist_items_list(
+      playlist_id=get_ytlive_uploads_playlist_id(channel_id=channel_id),
+      useragent=useragent,
+      api_key=api_key,
+      max_results=max_results,
+      page_token=page_token,
+      client=client,
+      conditional_cache=conditional_cache,
+    )
+
+  return get_ytlive_search_list_video(
+    channel_id=channel_id,
+    useragent=useragent,
+    api_key=api_key,
+    max_results=max_results,
+    page_token=page_token,
+    client=client,
+    conditional_cache=conditional_cache,
+  )
+
+
+async def adiscover_ytlive_videos(
+  channel_id: str,
+  useragent: str,
+  api_key: YtliveApiKey,
+  max_results: Optional[int] = None,
+  page_token: Optional[str] = None,
+  client: Optional[AsyncLiveInfoClient] = None,
+  conditional_cache: Optional['YtliveConditionalCache'] = None,
+  discovery: YtliveDiscovery = 'search',
+) -> 'YtliveDiscoveryResult':
+  if discovery == 'uploads':
+    return await aget_ytlive_playlist_items_list(
+      playlist_id=get_ytlive_uploads_playlist_id(channel_id=channel_id),
+      useragent=useragent,
+      api_key=api_key,
+      max_results=max_results,
+      page_token=page_token,
+      client=client,
+      conditional_cache=conditional_cache,
+    )
+
+  return await aget_ytlive_search_list_video(
+    channel_id=channel_id,
+    useragent=useragent,
+    api_key=api_key,
+    max_results=max_results,
+    page_token=page_token,
+    client=client,
+    conditional_cache=conditional_cache,
+  )
+
+
+def estimate_ytlive_programs_quota_cost(
+  discovery: YtliveDiscovery = 'search',
+  channel_count: int = 1,
+) -> int:
+  discovery_cost = (
+    ytlive_quota_costs['playlistItems.list']
+    if discovery == 'uploads'
+    else ytlive_quota_costs['search.list']
+  )
+
+  return (discovery_cost + ytlive_quota_costs['videos.list']) * channel_count
+
+
+def get_ytlive_discovered_video_ids(
+  discovery_result: Union[
+    'GetYtliveSearchListSuccessYtliveProgramsResult',
+    'GetYtlivePlaylistItemsListSuccessYtliveProgramsResult',
+  ],
+) -> List[str]:
+  return [
+    discovered_item.video_id
+    for discovered_item in discovery_result.data.items
+  ]
+
+
+def build_ytlive_programs_result(
+  videos_list_result: 'GetYtliveVideosListResult',
+) -> GetYtliveProgramsResult:
+  if videos_list_result.result_type == 'success':
+    if videos_list_result.data_type == 'ytlive_programs':
+      videos_list_items = videos_list_result.data.items
+
+      # drop not-public (private and unlisted) videos
+      items = [
+        videos_list_item
+        for videos_list_item in videos_list_items
+        if videos_list_item.status.privacy_status == 'public'
+      ]
+
+      return GetYtliveProgramsSuccessYtliveProgramsResult(
+        result_type='success',
+        data_type='ytlive_programs',
+        data=GetYtliveProgramsSuccessYtliveProgramsData(
+          items=items,
+        ),
+      )
+
+  elif videos_list_result.result_type == 'bad_request':
+    return GetYtliveProgramsBadRequestResult(
+      result_type='bad_request',
+    )
+
+  elif videos_list_result.result_type == 'forbidden':
+    return GetYtliveProgramsForbiddenResult(
+      result_type='forbidden',
+    )
+
+  elif videos_list_result.result_type == 'maintenance':
+    return GetYtliveProgramsMaintenanceResult(
+      result_type='maintenance',
+    )
 
   return GetYtliveProgramsUnknownErrorResult(
     result_type='unknown_error',
@@ -244,19 +719,492 @@ def get_ytlive_programs(
 
 
 """
-  Private API: Search: list
+  Public APIs: Conditional request cache
+
+  Stores ETag / Last-Modified and the parsed result per request URL and
+  params (except the API key). A cached result is revalidated with
+  If-None-Match / If-Modified-Since and reused on 304 Not Modified.
 """
 
 
+YtliveConditionalCacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
 @dataclass
-class GetYtliveSearchListSuccessYtliveProgramsDataItemThumbnail:
-  url: str
-  width: int
-  height: int
+class YtliveConditionalCacheEntry:
+  etag: Optional[str]
+  last_modified: Optional[str]
+  result: Any
+
+
+class YtliveConditionalCache:
+  def __init__(
+    self,
+    max_entries: int = 1024,
+  ):
+    self.max_entries = max_entries
+
+    self._lock = threading.Lock()
+    self._entries: \
+      'OrderedDict[YtliveConditionalCacheKey, YtliveConditionalCacheEntry]' = \
+      OrderedDict()
+
+  @staticmethod
+  def build_key(
+    url: str,
+    params: Mapping[str, str],
+  ) -> YtliveConditionalCacheKey:
+    return (
+      url,
+      tuple(sorted(
+        (name, value) for name, value in params.items() if name != 'key'
+      )),
+    )
+
+  def lookup(
+    self,
+    url: str,
+    params: Mapping[str, str],
+  ) -> Optional[YtliveConditionalCacheEntry]:
+    key = self.build_key(url=url, params=params)
+
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None:
+        self._entries.move_to_end(key)
+
+      return entry
+
+  def store(
+    self,
+    url: str,
+    params: Mapping[str, str],
+    response_headers: Mapping[str, str],
+    result: Any,
+  ) -> None:
+    if result.result_type != 'success':
+      return
+
+    etag = response_headers.get('ETag')
+    last_modified = response_headers.get('Last-Modified')
+    if etag is None and last_modified is None:
+      return
+
+    key = self.build_key(url=url, params=params)
+
+    with self._lock:
+      self._entries[key] = YtliveConditionalCacheEntry(
+        etag=etag,
+        last_modified=last_modified,
+        result=result,
+      )
+      self._entries.move_to_end(key)
+
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+
+
+def build_ytlive_conditional_headers(
+  headers: Dict[str, str],
+  cache_entry: Optional[YtliveConditionalCacheEntry],
+) -> Dict[str, str]:
+  if cache_entry is None:
+    return headers
+
+  conditional_headers = dict(headers)
+  if cache_entry.etag is not None:
+    conditional_headers['If-None-Match'] = cache_entry.etag
+  if cache_entry.last_modified is not None:
+    conditional_headers['If-Modified-Since'] = cache_entry.last_modified
+
+  return conditional_headers
+
+
+"""
+  Public APIs: Incremental sync state
+
+  Remembers the videos.list item of each video discovered per channel.
+  Items that can not change anymore (ended live streams and premieres,
+  videos without live streaming details) are reused instead of queried
+  again; new videos and upcoming or live ones are queried on every call.
+"""
+
+
+class YtliveSyncState:
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    # channel id -> video id -> videos.list item
+    # (None: not returned by videos.list, e.g. a normal video)
+    self._channels: Dict[
+      str,
+      Dict[str, Optional[GetYtliveProgramsSuccessYtliveProgramsDataItem]],
+    ] = {}
+
+  @staticmethod
+  def is_finalized(
+    item: Optional[GetYtliveProgramsSuccessYtliveProgramsDataItem],
+  ) -> bool:
+    if item is None:
+      return True
+
+    return item.live_broadcast_content == 'none' and \
+      item.live_streaming_details.actual_end_time is not None
+
+  def select_video_ids(
+    self,
+    channel_id: str,
+    video_ids: Sequence[str],
+  ) -> List[str]:
+    # Video ids to query with videos.list
+    with self._lock:
+      known_items = self._channels.get(channel_id, {})
+
+      return [
+        video_id
+        for video_id in video_ids
+        if video_id not in known_items
+        or not self.is_finalized(known_items[video_id])
+      ]
+
+  def merge(
+    self,
+    channel_id: str,
+    video_ids: Sequence[str],
+    queried_video_ids: Sequence[str],
+    videos_list_result: 'GetYtliveVideosListResult',
+  ) -> 'GetYtliveVideosListResult':
+    # Stores the queried items and returns the items of all video_ids in
+    # their order. Videos not discovered anymore are forgotten.
+    if videos_list_result.result_type != 'success':
+      return videos_list_result
+
+    queried_items = {
+      item.video_id: item
+      for item in videos_list_result.data.items
+    }
+    queried_video_id_set = set(queried_video_ids)
+
+    with self._lock:
+      known_items = self._channels.get(channel_id, {})
+
+      channel_items: Dict[
+        str,
+        Optional[GetYtliveProgramsSuccessYtliveProgramsDataItem],
+      ] = {}
+      for video_id in video_ids:
+        if video_id in queried_video_id_set:
+          channel_items[video_id] = queried_items.get(video_id)
+        elif video_id in known_items:
+          channel_items[video_id] = known_items[video_id]
+
+      self._channels[channel_id] = channel_items
+
+    return GetYtliveVideosListSuccessYtliveProgramsResult(
+      result_type='success',
+      data_type='ytlive_programs',
+      data=GetYtliveVideosListSuccessYtliveProgramsData(
+        items=[
+          item for item in channel_items.values() if item is not None
+        ],
+      ),
+    )
+
+  def clear(self) -> None:
+    with self._lock:
+      self._channels.clear()
+
+
+"""
+  Public APIs: API key pool
+
+  Spreads requests over several API keys (one per Google Cloud project,
+  each with its own daily quota): each request uses the key with the least
+  estimated use today, counted with ytlive_quota_costs. A key that returns
+  403 quotaExceeded is not used until the quota resets at midnight Pacific
+  Time, and the request is retried with the next key.
+"""
+
+
+class YtliveApiKeyPool:
+  def __init__(
+    self,
+    api_keys: Sequence[str],
+    daily_quota: int = ytlive_default_daily_quota,  # units per key
+  ):
+    if len(api_keys) == 0:
+      raise ValueError('api_keys is empty')
+
+    self.api_keys = list(dict.fromkeys(api_keys))
+    self.daily_quota = daily_quota
+
+    self._lock = threading.Lock()
+    self._quota_date: Optional[date] = None
+    self._usages: Dict[str, int] = {}
+    self._exhausted_api_keys: Set[str] = set()
+
+  def acquire(self, api_name: str) -> Optional[str]:
+    # Returns the key to use for a request of api_name (search.list, ...)
+    # and counts its cost, or None if every key has run out of quota
+    cost = ytlive_quota_costs[api_name]
+
+    with self._lock:
+      self._reset_if_new_quota_date()
+
+      available_api_keys = [
+        api_key for api_key in self.api_keys
+        if api_key not in self._exhausted_api_keys and
+        self._usages[api_key] + cost <= self.daily_quota
+      ]
+      if len(available_api_keys) == 0:
+        return None
+
+      api_key = min(available_api_keys, key=self._usages.__getitem__)
+      self._usages[api_key] += cost
+
+      return api_key
+
+  def mark_exhausted(self, api_key: str) -> None:
+    with self._lock:
+      self._reset_if_new_quota_date()
+
+      self._exhausted_api_keys.add(api_key)
+
+  def get_usage(self, api_key: str) -> int:
+    # Estimated units used today by this process
+    with self._lock:
+      self._reset_if_new_quota_date()
+
+      return self._usages[api_key]
+
+  def _reset_if_new_quota_date(self) -> None:
+    quota_date = get_ytlive_quota_date()
+    if quota_date == self._quota_date:
+      return
+
+    self._quota_date = quota_date
+    self._usages = {api_key: 0 for api_key in self.api_keys}
+    self._exhausted_api_keys.clear()
+
+
+def get_ytlive_quota_date(now: Optional[datetime] = None) -> date:
+  # The date in Pacific Time, when the daily quota resets.
+  # Daylight saving time (UTC-7) starts on the second Sunday in March and
+  # ends on the first Sunday in November at 2:00 local time (UTC-8 else).
+  now_utc = (now if now is not None else datetime.now(tz=timezone.utc)) \
+    .astimezone(timezone.utc)
+
+  def get_sunday(month: int, n: int) -> datetime:
+    first_day = datetime(now_utc.year, month, 1, tzinfo=timezone.utc)
+    return first_day + timedelta(
+      days=(6 - first_day.weekday()) % 7 + 7 * (n - 1),
+    )
+
+  dst_start = get_sunday(month=3, n=2) + timedelta(hours=2 + 8)
+  dst_end = get_sunday(month=11, n=1) + timedelta(hours=2 + 7)
+  utc_offset = -7 if dst_start <= now_utc < dst_end else -8
+
+  return (now_utc + timedelta(hours=utc_offset)).date()
+
+
+def is_ytlive_quota_exceeded(
+  response: Any,  # decoded JSON error response body
+) -> bool:
+  try:
+    errors = response['error']['errors']
+  except (KeyError, TypeError):
+    return False
+
+  return any(
+    isinstance(error, dict) and
+    error.get('reason') in ('quotaExceeded', 'dailyLimitExceeded')
+    for error in errors
+  )
+
+
+"""
+  Private API: Requests
+
+  Sends a Data API request with a conditional request cache, rotating the
+  keys of an YtliveApiKeyPool on quotaExceeded.
+"""
+
+
+T = TypeVar('T')
+
+# (status code, decoded JSON response body (status 200 only)) -> result
+YtliveBuildResult = Callable[[int, Any], T]
+
+
+def request_ytlive_api(
+  url: str,
+  api_name: str,
+  useragent: str,
+  api_key: YtliveApiKey,
+  build_params: Callable[[str], Dict[str, str]],
+  build_result: YtliveBuildResult[T],
+  client: Optional[LiveInfoClient] = None,
+  conditional_cache: Optional[YtliveConditionalCache] = None,
+) -> T:
+  headers = {
+    'User-Agent': useragent,
+  }
+
+  while True:
+    selected_api_key = select_ytlive_api_key(
+      api_key=api_key,
+      api_name=api_name,
+    )
+    if selected_api_key is None:
+      return build_result(403, None)
+
+    params = build_params(selected_api_key)
+
+    cache_entry = (
+      conditional_cache.lookup(url=url, params=params)
+      if conditional_cache is not None else None
+    )
+
+    with measure('http_request_duration', labels=(api_name,)):
+      res = http_get(
+        client,
+        url,
+        headers=build_ytlive_conditional_headers(
+          headers=headers,
+          cache_entry=cache_entry,
+        ),
+        params=params,
+      )
+    status = res.status_code
+
+    if get_metrics() is not None:
+      observe_http_response_bytes(endpoint=api_name, body=res.content)
+
+    if status == 304 and cache_entry is not None:
+      return cache_entry.result
+
+    if status == 403 and isinstance(api_key, YtliveApiKeyPool):
+      try:
+        error_response = res.json()
+      except ValueError:
+        error_response = None
+
+      if is_ytlive_quota_exceeded(response=error_response):
+        api_key.mark_exhausted(api_key=selected_api_key)
+        continue
+
+    result = build_result(status, res.json() if status == 200 else None)
+
+    if conditional_cache is not None:
+      conditional_cache.store(
+        url=url,
+        params=params,
+        response_headers=res.headers,
+        result=result,
+      )
+
+    return result
+
+
+async def arequest_ytlive_api(
+  url: str,
+  api_name: str,
+  useragent: str,
+  api_key: YtliveApiKey,
+  build_params: Callable[[str], Dict[str, str]],
+  build_result: YtliveBuildResult[T],
+  client: Optional[AsyncLiveInfoClient] = None,
+  conditional_cache: Optional[YtliveConditionalCache] = None,
+) -> T:
+  async with open_async_client(client=client) as client:
+    headers = {
+      'User-Agent': useragent,
+    }
+
+    while True:
+      selected_api_key = select_ytlive_api_key(
+        api_key=api_key,
+        api_name=api_name,
+      )
+      if selected_api_key is None:
+        return build_result(403, None)
+
+      params = build_params(selected_api_key)
+
+      cache_entry = (
+        conditional_cache.lookup(url=url, params=params)
+        if conditional_cache is not None else None
+      )
+
+      with measure('http_request_duration', labels=(api_name,)):
+        res = await client.get(
+          url,
+          headers=build_ytlive_conditional_headers(
+            headers=headers,
+            cache_entry=cache_entry,
+          ),
+          params=params,
+        )
+      status = res.status_code
+
+      observe_http_response_bytes(endpoint=api_name, body=res.text)
+
+      if status == 304 and cache_entry is not None:
+        return cache_entry.result
+
+      if status == 403 and isinstance(api_key, YtliveApiKeyPool):
+        try:
+          error_response = json.loads(res.text)
+        except ValueError:
+          error_response = None
+
+        if is_ytlive_quota_exceeded(response=error_response):
+          api_key.mark_exhausted(api_key=selected_api_key)
+          continue
+
+      result = build_result(
+        status,
+        json.loads(res.text) if status == 200 else None,
+      )
+
+      if conditional_cache is not None:
+        conditional_cache.store(
+          url=url,
+          params=params,
+          response_headers=res.headers,
+          result=result,
+        )
+
+      return result
+
+
+def select_ytlive_api_key(
+  api_key: YtliveApiKey,
+  api_name: str,
+) -> Optional[str]:
+  # None: every key of the pool has run out of quota
+  if isinstance(api_key, YtliveApiKeyPool):
+    return api_key.acquire(api_name=api_name)
+
+  return api_key
+
+
+"""
+  Private API: Search: list
+"""
+
+
+GetYtliveSearchListSuccessYtliveProgramsDataItemThumbnail = \
+  GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail
 
 
 @dataclass
 class GetYtliveSearchListSuccessYtliveProgramsDataItemThumbnails:
+  __slots__ = ('default', 'medium', 'high')
+
   default: Optional[GetYtliveSearchListSuccessYtliveProgramsDataItemThumbnail]
   medium: Optional[GetYtliveSearchListSuccessYtliveProgramsDataItemThumbnail]
   high: Optional[GetYtliveSearchListSuccessYtliveProgramsDataItemThumbnail]
@@ -264,9 +1212,21 @@ class GetYtliveSearchListSuccessYtliveProgramsDataItemThumbnails:
 
 @dataclass
 class GetYtliveSearchListSuccessYtliveProgramsDataItem:
+  __slots__ = (
+    'channel_id',
+    'channel_title',
+    'video_id',
+    'video_published_at',
+    'title',
+    'description',
+    'live_broadcast_content',
+    'thumbnails',
+  )
+
   channel_id: str
   channel_title: str
   video_id: str
+  video_published_at: Optional[str]
   title: str
   description: str
   live_broadcast_content: Union[Literal['upcoming', 'live', 'none'], str]
@@ -275,11 +1235,16 @@ class GetYtliveSearchListSuccessYtliveProgramsDataItem:
 
 @dataclass
 class GetYtliveSearchListSuccessYtliveProgramsData:
+  __slots__ = ('items', 'next_page_token')
+
   items: List[GetYtliveSearchListSuccessYtliveProgramsDataItem]
+  next_page_token: Optional[str]  # None: the last page
 
 
 @dataclass
 class GetYtliveSearchListSuccessYtliveProgramsResult:
+  __slots__ = ('result_type', 'data_type', 'data')
+
   result_type: Literal['success']
   data_type: Literal['ytlive_programs']
   data: GetYtliveSearchListSuccessYtliveProgramsData
@@ -287,21 +1252,29 @@ class GetYtliveSearchListSuccessYtliveProgramsResult:
 
 @dataclass
 class GetYtliveSearchListBadRequestResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['bad_request']
 
 
 @dataclass
 class GetYtliveSearchListForbiddenResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['forbidden']
 
 
 @dataclass
 class GetYtliveSearchListMaintenanceResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['maintenance']
 
 
 @dataclass
 class GetYtliveSearchListUnknownErrorResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['unknown_error']
 
 
@@ -314,13 +1287,15 @@ GetYtliveSearchListResult = Union[
 ]
 
 
-def get_ytlive_search_list_video(
+search_api_url = 'https://www.googleapis.com/youtube/v3/search'
+
+
+def build_ytlive_search_list_video_params(
   channel_id: str,
-  useragent: str,
   api_key: str,
   max_results: Optional[int] = None,
-) -> GetYtliveSearchListResult:
-  search_api_url = 'https://www.googleapis.com/youtube/v3/search'
+  page_token: Optional[str] = None,
+) -> Dict[str, str]:
   params = {
     'key': api_key,
     'part': 'id,snippet',
@@ -330,16 +1305,76 @@ def get_ytlive_search_list_video(
   }
   if max_results is not None:
     params['maxResults'] = str(max_results)
+  if page_token is not None:
+    params['pageToken'] = page_token
 
-  headers = {
-    'User-Agent': useragent,
-  }
+  return params
 
-  search_res = requests.get(search_api_url, headers=headers, params=params)
-  search_status = search_res.status_code
+
+def get_ytlive_search_list_video(
+  channel_id: str,
+  useragent: str,
+  api_key: YtliveApiKey,
+  max_results: Optional[int] = None,
+  page_token: Optional[str] = None,
+  client: Optional[LiveInfoClient] = None,
+  conditional_cache: Optional[YtliveConditionalCache] = None,
+) -> GetYtliveSearchListResult:
+  return request_ytlive_api(
+    url=search_api_url,
+    api_name='search.list',
+    useragent=useragent,
+    api_key=api_key,
+    build_params=lambda selected_api_key: (
+      build_ytlive_search_list_video_params(
+        channel_id=channel_id,
+        api_key=selected_api_key,
+        max_results=max_results,
+        page_token=page_token,
+      )
+    ),
+    build_result=build_ytlive_search_list_result,
+    client=client,
+    conditional_cache=conditional_cache,
+  )
+
+
+async def aget_ytlive_search_list_video(
+  channel_id: str,
+  useragent: str,
+  api_key: YtliveApiKey,
+  max_results: Optional[int] = None,
+  page_token: Optional[str] = None,
+  client: Optional[AsyncLiveInfoClient] = None,
+  conditional_cache: Optional[YtliveConditionalCache] = None,
+) -> GetYtliveSearchListResult:
+  return await arequest_ytlive_api(
+    url=search_api_url,
+    api_name='search.list',
+    useragent=useragent,
+    api_key=api_key,
+    build_params=lambda selected_api_key: (
+      build_ytlive_search_list_video_params(
+        channel_id=channel_id,
+        api_key=selected_api_key,
+        max_results=max_results,
+        page_token=page_token,
+      )
+    ),
+    build_result=build_ytlive_search_list_result,
+    client=client,
+    conditional_cache=conditional_cache,
+  )
+
+
+def build_ytlive_search_list_result(
+  status_code: int,
+  response: Any,  # decoded JSON response body (status 200 only)
+) -> GetYtliveSearchListResult:
+  search_status = status_code
 
   if search_status == 200:
-    search_response = search_res.json()
+    search_response = response
     search_response_items = search_response.get('items', [])
 
     items: List[GetYtliveSearchListSuccessYtliveProgramsDataItem] = []
@@ -360,6 +1395,7 @@ def get_ytlive_search_list_video(
         channel_id=snippet_channel_id,
         channel_title=snippet_channel_title,
         video_id=video_id,
+        video_published_at=snippet.get('publishedAt'),
         title=snippet['title'],
         description=snippet['description'],
         live_broadcast_content=snippet['liveBroadcastContent'],
@@ -387,6 +1423,7 @@ def get_ytlive_search_list_video(
       data_type='ytlive_programs',
       data=GetYtliveSearchListSuccessYtliveProgramsData(
         items=items,
+        next_page_token=search_response.get('nextPageToken'),
       )
     )
 
@@ -411,62 +1448,243 @@ def get_ytlive_search_list_video(
 
 
 """
-  Private API: Videos: list
+  Private API: PlaylistItems: list
 """
 
 
 @dataclass
-class GetYtliveVideosListSuccessYtliveProgramsDataItemThumbnail:
-  url: str
-  width: int
-  height: int
+class GetYtlivePlaylistItemsListSuccessYtliveProgramsDataItem:
+  __slots__ = ('video_id', 'video_published_at')
+
+  video_id: str
+  video_published_at: Optional[str]
 
 
 @dataclass
-class GetYtliveVideosListSuccessYtliveProgramsDataItemThumbnails:
-  default: Optional[GetYtliveVideosListSuccessYtliveProgramsDataItemThumbnail]
-  medium: Optional[GetYtliveVideosListSuccessYtliveProgramsDataItemThumbnail]
-  high: Optional[GetYtliveVideosListSuccessYtliveProgramsDataItemThumbnail]
-  standard: Optional[GetYtliveVideosListSuccessYtliveProgramsDataItemThumbnail]
-  maxres: Optional[GetYtliveVideosListSuccessYtliveProgramsDataItemThumbnail]
+class GetYtlivePlaylistItemsListSuccessYtliveProgramsData:
+  __slots__ = ('items', 'next_page_token')
+
+  items: List[GetYtlivePlaylistItemsListSuccessYtliveProgramsDataItem]
+  next_page_token: Optional[str]  # None: the last page
 
 
 @dataclass
-class GetYtliveVideosListSuccessYtliveProgramsDataItemStatus:
-  upload_status: Union[Literal['processed', 'uploaded'], str]
-  privacy_status: Union[Literal['private', 'public', 'unlisted'], str]
+class GetYtlivePlaylistItemsListSuccessYtliveProgramsResult:
+  __slots__ = ('result_type', 'data_type', 'data')
+
+  result_type: Literal['success']
+  data_type: Literal['ytlive_programs']
+  data: GetYtlivePlaylistItemsListSuccessYtliveProgramsData
 
 
 @dataclass
-class GetYtliveVideosListSuccessYtliveProgramsDataItemLiveStreamingDetails:
-  actual_start_time: Optional[str]
-  actual_end_time: Optional[str]
-  scheduled_start_time: Optional[str]
-  scheduled_end_time: Optional[str]
-  concurrent_viewers: Optional[str]
+class GetYtlivePlaylistItemsListBadRequestResult:
+  __slots__ = ('result_type',)
+
+  result_type: Literal['bad_request']
 
 
 @dataclass
-class GetYtliveVideosListSuccessYtliveProgramsDataItem:
-  channel_id: str
-  channel_title: str
-  video_id: str
-  title: str
-  description: str
-  live_broadcast_content: Union[Literal['upcoming', 'live', 'none'], str]
-  status: GetYtliveVideosListSuccessYtliveProgramsDataItemStatus
-  thumbnails: GetYtliveVideosListSuccessYtliveProgramsDataItemThumbnails
-  live_streaming_details: \
-    GetYtliveVideosListSuccessYtliveProgramsDataItemLiveStreamingDetails
+class GetYtlivePlaylistItemsListForbiddenResult:
+  __slots__ = ('result_type',)
+
+  result_type: Literal['forbidden']
+
+
+@dataclass
+class GetYtlivePlaylistItemsListMaintenanceResult:
+  __slots__ = ('result_type',)
+
+  result_type: Literal['maintenance']
+
+
+@dataclass
+class GetYtlivePlaylistItemsListUnknownErrorResult:
+  __slots__ = ('result_type',)
+
+  result_type: Literal['unknown_error']
+
+
+GetYtlivePlaylistItemsListResult = Union[
+  GetYtlivePlaylistItemsListSuccessYtliveProgramsResult,
+  GetYtlivePlaylistItemsListBadRequestResult,
+  GetYtlivePlaylistItemsListForbiddenResult,
+  GetYtlivePlaylistItemsListMaintenanceResult,
+  GetYtlivePlaylistItemsListUnknownErrorResult,
+]
+
+
+YtliveDiscoveryResult = Union[
+  'GetYtliveSearchListResult',
+  GetYtlivePlaylistItemsListResult,
+]
+
+
+playlist_items_api_url = 'https://www.googleapis.com/youtube/v3/playlistItems'
+
+
+def get_ytlive_uploads_playlist_id(channel_id: str) -> str:
+  # The uploads playlist of a channel UC{id} is UU{id}.
+  # Unknown channel id forms are passed through and rejected by the API.
+  if channel_id.startswith('UC'):
+    return 'UU' + channel_id[2:]
+
+  return channel_id
+
+
+def build_ytlive_playlist_items_list_params(
+  playlist_id: str,
+  api_key: str,
+  max_results: Optional[int] = None,
+  page_token: Optional[str] = None,
+) -> Dict[str, str]:
+  params = {
+    'key': api_key,
+    'part': 'contentDetails',
+    'playlistId': playlist_id,
+  }
+  if max_results is not None:
+    params['maxResults'] = str(max_results)
+  if page_token is not None:
+    params['pageToken'] = page_token
+
+  return params
+
+
+def get_ytlive_playlist_items_list(
+  playlist_id: str,
+  useragent: str,
+  api_key: YtliveApiKey,
+  max_results: Optional[int] = None,
+  page_token: Optional[str] = None,
+  client: Optional[LiveInfoClient] = None,
+  conditional_cache: Optional[YtliveConditionalCache] = None,
+) -> GetYtlivePlaylistItemsListResult:
+  return request_ytlive_api(
+    url=playlist_items_api_url,
+    api_name='playlistItems.list',
+    useragent=useragent,
+    api_key=api_key,
+    build_params=lambda selected_api_key: (
+      build_ytlive_playlist_items_list_params(
+        playlist_id=playlist_id,
+        api_key=selected_api_key,
+        max_results=max_results,
+        page_token=page_token,
+      )
+    ),
+    build_result=build_ytlive_playlist_items_list_result,
+    client=client,
+    conditional_cache=conditional_cache,
+  )
+
+
+async def aget_ytlive_playlist_items_list(
+  playlist_id: str,
+  useragent: str,
+  api_key: YtliveApiKey,
+  max_results: Optional[int] = None,
+  page_token: Optional[str] = None,
+  client: Optional[AsyncLiveInfoClient] = None,
+  conditional_cache: Optional[YtliveConditionalCache] = None,
+) -> GetYtlivePlaylistItemsListResult:
+  return await arequest_ytlive_api(
+    url=playlist_items_api_url,
+    api_name='playlistItems.list',
+    useragent=useragent,
+    api_key=api_key,
+    build_params=lambda selected_api_key: (
+      build_ytlive_playlist_items_list_params(
+        playlist_id=playlist_id,
+        api_key=selected_api_key,
+        max_results=max_results,
+        page_token=page_token,
+      )
+    ),
+    build_result=build_ytlive_playlist_items_list_result,
+    client=client,
+    conditional_cache=conditional_cache,
+  )
+
+
+def build_ytlive_playlist_items_list_result(
+  status_code: int,
+  response: Any,  # decoded JSON response body (status 200 only)
+) -> GetYtlivePlaylistItemsListResult:
+  playlist_items_status = status_code
+
+  if playlist_items_status == 200:
+    playlist_items_response = response
+    playlist_items_response_items = playlist_items_response.get('items', [])
+
+    items: List[GetYtlivePlaylistItemsListSuccessYtliveProgramsDataItem] = []
+    for response_item in playlist_items_response_items:
+      content_details = response_item['contentDetails']
+
+      items.append(GetYtlivePlaylistItemsListSuccessYtliveProgramsDataItem(
+        video_id=content_details['videoId'],
+        video_published_at=content_details.get('videoPublishedAt'),
+      ))
+
+    return GetYtlivePlaylistItemsListSuccessYtliveProgramsResult(
+      result_type='success',
+      data_type='ytlive_programs',
+      data=GetYtlivePlaylistItemsListSuccessYtliveProgramsData(
+        items=items,
+        next_page_token=playlist_items_response.get('nextPageToken'),
+      )
+    )
+
+  elif playlist_items_status == 400:
+    return GetYtlivePlaylistItemsListBadRequestResult(
+      result_type='bad_request',
+    )
+
+  elif playlist_items_status == 403:
+    return GetYtlivePlaylistItemsListForbiddenResult(
+      result_type='forbidden',
+    )
+
+  elif playlist_items_status == 500:
+    return GetYtlivePlaylistItemsListMaintenanceResult(
+      result_type='maintenance',
+    )
+
+  return GetYtlivePlaylistItemsListUnknownErrorResult(
+    result_type='unknown_error',
+  )
+
+
+"""
+  Private API: Videos: list
+"""
+
+
+# videos.list items are the items of GetYtliveProgramsResult: public items are
+# passed through as they are, not copied
+GetYtliveVideosListSuccessYtliveProgramsDataItemThumbnail = \
+  GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnail
+GetYtliveVideosListSuccessYtliveProgramsDataItemThumbnails = \
+  GetYtliveProgramsSuccessYtliveProgramsDataItemThumbnails
+GetYtliveVideosListSuccessYtliveProgramsDataItemStatus = \
+  GetYtliveProgramsSuccessYtliveProgramsDataItemStatus
+GetYtliveVideosListSuccessYtliveProgramsDataItemLiveStreamingDetails = \
+  GetYtliveProgramsSuccessYtliveProgramsDataItemLiveStreamingDetails
+GetYtliveVideosListSuccessYtliveProgramsDataItem = \
+  GetYtliveProgramsSuccessYtliveProgramsDataItem
 
 
 @dataclass
 class GetYtliveVideosListSuccessYtliveProgramsData:
+  __slots__ = ('items',)
+
   items: List[GetYtliveVideosListSuccessYtliveProgramsDataItem]
 
 
 @dataclass
 class GetYtliveVideosListSuccessYtliveProgramsResult:
+  __slots__ = ('result_type', 'data_type', 'data')
+
   result_type: Literal['success']
   data_type: Literal['ytlive_programs']
   data: GetYtliveVideosListSuccessYtliveProgramsData
@@ -474,21 +1692,29 @@ class GetYtliveVideosListSuccessYtliveProgramsResult:
 
 @dataclass
 class GetYtliveVideosListBadRequestResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['bad_request']
 
 
 @dataclass
 class GetYtliveVideosListForbiddenResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['forbidden']
 
 
 @dataclass
 class GetYtliveVideosListMaintenanceResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['maintenance']
 
 
 @dataclass
 class GetYtliveVideosListUnknownErrorResult:
+  __slots__ = ('result_type',)
+
   result_type: Literal['unknown_error']
 
 
@@ -501,27 +1727,170 @@ GetYtliveVideosListResult = Union[
 ]
 
 
-def get_ytlive_videos_list(
+videos_api_url = 'https://www.googleapis.com/youtube/v3/videos'
+
+# max number of ids in a videos.list request
+ytlive_videos_list_max_ids = 50
+
+
+def build_ytlive_videos_list_params(
   id: str,  # video id (comma-separated)
-  useragent: str,
   api_key: str,
-) -> GetYtliveVideosListResult:
-  videos_api_url = 'https://www.googleapis.com/youtube/v3/videos'
-  params = {
+) -> Dict[str, str]:
+  return {
     'key': api_key,
     'part': 'snippet,status,liveStreamingDetails',
     'id': id,
   }
 
-  headers = {
-    'User-Agent': useragent,
-  }
 
-  videos_res = requests.get(videos_api_url, headers=headers, params=params)
-  videos_status = videos_res.status_code
+def get_ytlive_videos_list(
+  id: str,  # video id (comma-separated)
+  useragent: str,
+  api_key: YtliveApiKey,
+  client: Optional[LiveInfoClient] = None,
+  conditional_cache: Optional[YtliveConditionalCache] = None,
+) -> GetYtliveVideosListResult:
+  return request_ytlive_api(
+    url=videos_api_url,
+    api_name='videos.list',
+    useragent=useragent,
+    api_key=api_key,
+    build_params=lambda selected_api_key: (
+      build_ytlive_videos_list_params(
+        id=id,
+        api_key=selected_api_key,
+      )
+    ),
+    build_result=build_ytlive_videos_list_result,
+    client=client,
+    conditional_cache=conditional_cache,
+  )
+
+
+async def aget_ytlive_videos_list(
+  id: str,  # video id (comma-separated)
+  useragent: str,
+  api_key: YtliveApiKey,
+  client: Optional[AsyncLiveInfoClient] = None,
+  conditional_cache: Optional[YtliveConditionalCache] = None,
+) -> GetYtliveVideosListResult:
+  return await arequest_ytlive_api(
+    url=videos_api_url,
+    api_name='videos.list',
+    useragent=useragent,
+    api_key=api_key,
+    build_params=lambda selected_api_key: (
+      build_ytlive_videos_list_params(
+        id=id,
+        api_key=selected_api_key,
+      )
+    ),
+    build_result=build_ytlive_videos_list_result,
+    client=client,
+    conditional_cache=conditional_cache,
+  )
+
+
+def chunk_ytlive_video_ids(
+  video_ids: Sequence[str],
+) -> List[List[str]]:
+  return [
+    list(video_ids[offset:offset + ytlive_videos_list_max_ids])
+    for offset in range(0, len(video_ids), ytlive_videos_list_max_ids)
+  ]
+
+
+def merge_ytlive_videos_list_results(
+  videos_list_results: Sequence[GetYtliveVideosListResult],
+) -> GetYtliveVideosListResult:
+  items: List[GetYtliveVideosListSuccessYtliveProgramsDataItem] = []
+  for videos_list_result in videos_list_results:
+    if videos_list_result.result_type != 'success':
+      return videos_list_result
+
+    items.extend(videos_list_result.data.items)
+
+  return GetYtliveVideosListSuccessYtliveProgramsResult(
+    result_type='success',
+    data_type='ytlive_programs',
+    data=GetYtliveVideosListSuccessYtliveProgramsData(
+      items=items,
+    ),
+  )
+
+
+def get_ytlive_videos_list_chunked(
+  video_ids: Sequence[str],
+  useragent: str,
+  api_key: YtliveApiKey,
+  client: Optional[LiveInfoClient] = None,
+  conditional_cache: Optional[YtliveConditionalCache] = None,
+) -> GetYtliveVideosListResult:
+  if len(video_ids) <= ytlive_videos_list_max_ids:
+    return get_ytlive_videos_list(
+      id=','.join(video_ids),
+      useragent=useragent,
+      api_key=api_key,
+      client=client,
+      conditional_cache=conditional_cache,
+    )
+
+  videos_list_results: List[GetYtliveVideosListResult] = []
+  for chunk_video_ids in chunk_ytlive_video_ids(video_ids=video_ids):
+    videos_list_result = get_ytlive_videos_list(
+      id=','.join(chunk_video_ids),
+      useragent=useragent,
+      api_key=api_key,
+      client=client,
+      conditional_cache=conditional_cache,
+    )
+    videos_list_results.append(videos_list_result)
+
+    if videos_list_result.result_type != 'success':
+      break
+
+  return merge_ytlive_videos_list_results(
+    videos_list_results=videos_list_results,
+  )
+
+
+async def aget_ytlive_videos_list_chunked(
+  video_ids: Sequence[str],
+  useragent: str,
+  api_key: YtliveApiKey,
+  client: Optional[AsyncLiveInfoClient] = None,
+  conditional_cache: Optional[YtliveConditionalCache] = None,
+) -> GetYtliveVideosListResult:
+  import asyncio
+
+  async with open_async_client(client=client) as client:
+    videos_list_results = await asyncio.gather(*(
+      aget_ytlive_videos_list(
+        id=','.join(chunk_video_ids),
+        useragent=useragent,
+        api_key=api_key,
+        client=client,
+        conditional_cache=conditional_cache,
+      )
+      for chunk_video_ids in (
+        chunk_ytlive_video_ids(video_ids=video_ids) or [[]]
+      )
+    ))
+
+    return merge_ytlive_videos_list_results(
+      videos_list_results=videos_list_results,
+    )
+
+
+def build_ytlive_videos_list_result(
+  status_code: int,
+  response: Any,  # decoded JSON response body (status 200 only)
+) -> GetYtliveVideosListResult:
+  videos_status = status_code
 
   if videos_status == 200:
-    videos_response = videos_res.json()
+    videos_response = response
     videos_response_items = videos_response.get('items', [])
 
     items: List[GetYtliveVideosListSuccessYtliveProgramsDataItem] = []
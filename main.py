@@ -1,4 +1,4 @@
-import liveinfo
+from liveinfo.cli import cli
 
 if __name__ == '__main__':
-  liveinfo.cli.cli()
+  cli()
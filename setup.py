@@ -13,7 +13,7 @@ setup(
 
   license='MIT',
 
-  packages=find_packages(),
+  packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
   include_package_data=True,
 
   entry_points={
@@ -25,6 +25,17 @@ setup(
   install_requires=(
     Path('requirements.in').read_text(encoding='utf-8').splitlines()
   ),
+  extras_require={
+    'async': [
+      'aiohttp',
+    ],
+    'fast': [
+      'orjson',
+    ],
+    'msgpack': [
+      'msgpack',
+    ],
+  },
 
   author='aoirint',
   author_email='aoirint@gmail.com',
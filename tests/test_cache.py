@@ -0,0 +1,235 @@
+import asyncio
+import gc
+import threading
+import time
+
+from liveinfo import nicolive
+from liveinfo.cache import LiveProgramCache
+
+
+def build_nicolive_program_result(end_date):
+  return nicolive.GetNicoliveProgramSuccessNicoliveProgramResult(
+    result_type='success',
+    data_type='nicolive_program',
+    data=nicolive.GetNicoliveProgramNicoliveProgramData(
+      name='program',
+      description='',
+      url='https://live.nicovideo.jp/watch/lv1',
+      thumbnail_url=[],
+      start_date='2023-10-01T21:00:00+09:00',
+      end_date=end_date,
+    ),
+  )
+
+
+def test_get_ttl_by_result_type():
+  cache = LiveProgramCache(ttl=60.0, ended_program_ttl=3600.0)
+
+  ended_result = build_nicolive_program_result(
+    end_date='2023-10-01T23:00:00+09:00',
+  )
+  assert cache.get_ttl(key=('nicolive', 'lv1'), result=ended_result) == 3600.0
+  # a community may start a new program at any time
+  assert cache.get_ttl(key=('nicolive', 'co1'), result=ended_result) == 60.0
+
+  onair_result = build_nicolive_program_result(
+    end_date='2999-01-01T00:00:00+09:00',
+  )
+  assert cache.get_ttl(key=('nicolive', 'lv1'), result=onair_result) == 60.0
+
+  # an end date that can not be compared falls back to ttl
+  for end_date in ['not a date', '2023-10-01T23:00:00']:
+    assert cache.get_ttl(
+      key=('nicolive', 'lv1'),
+      result=build_nicolive_program_result(end_date=end_date),
+    ) == 60.0
+
+  maintenance_result = nicolive.GetNicoliveProgramMaintenanceResult(
+    result_type='maintenance',
+  )
+  assert cache.get_ttl(
+    key=('nicolive', 'lv1'),
+    result=maintenance_result,
+  ) == 10.0
+
+
+def test_get_or_fetch_evicts_least_recently_used():
+  cache = LiveProgramCache(max_entries=2)
+  fetched = []
+
+  def fetch(live_id):
+    def _fetch():
+      fetched.append(live_id)
+      return nicolive.GetNicoliveProgramNotFoundResult(
+        result_type='not_found',
+      )
+    return _fetch
+
+  for live_id in ['lv1', 'lv2', 'lv1', 'lv3', 'lv1', 'lv2']:
+    cache.get_or_fetch(key=('nicolive', live_id), fetch=fetch(live_id))
+
+  assert fetched == ['lv1', 'lv2', 'lv3', 'lv2']
+
+
+def test_get_or_fetch_serves_stale_while_revalidating():
+  cache = LiveProgramCache(
+    ttl=0.01,
+    result_type_ttls={},
+    stale_while_revalidate=60.0,
+  )
+  refreshed = threading.Event()
+  results = iter([
+    nicolive.GetNicoliveProgramNotFoundResult(result_type='not_found'),
+    nicolive.GetNicoliveProgramMaintenanceResult(result_type='maintenance'),
+  ])
+
+  def fetch():
+    result = next(results)
+    if result.result_type == 'maintenance':
+      refreshed.set()
+    return result
+
+  key = ('nicolive', 'lv1')
+  assert cache.get_or_fetch(key=key, fetch=fetch).result_type == 'not_found'
+  time.sleep(0.02)
+
+  # expired: the stale result is returned and refreshed in the background
+  assert cache.get_or_fetch(key=key, fetch=fetch).result_type == 'not_found'
+  assert refreshed.wait(timeout=5.0)
+
+  for _ in range(100):
+    entry = cache.lookup(key=key)
+    if entry is not None and entry.result.result_type == 'maintenance':
+      break
+    time.sleep(0.01)
+  else:
+    raise AssertionError('stale entry was not refreshed')
+
+
+def test_aget_or_fetch_keeps_refresh_tasks():
+  cache = LiveProgramCache(
+    ttl=0.01,
+    result_type_ttls={},
+    stale_while_revalidate=60.0,
+  )
+  key = ('nicolive', 'lv1')
+
+  async def fetch_not_found():
+    return nicolive.GetNicoliveProgramNotFoundResult(result_type='not_found')
+
+  async def get():
+    release = asyncio.Event()
+
+    async def fetch_maintenance():
+      await release.wait()
+      raise RuntimeError('the refresh failed')
+
+    await cache.aget_or_fetch(key=key, fetch=fetch_not_found)
+    await asyncio.sleep(0.02)
+
+    # expired: the stale result is returned and refreshed in a task
+    result = await cache.aget_or_fetch(key=key, fetch=fetch_maintenance)
+    assert result.result_type == 'not_found'
+
+    # held by the cache, not only by the event loop
+    gc.collect()
+    assert len(cache._refresh_tasks) == 1
+    (task,) = cache._refresh_tasks
+
+    release.set()
+    await task
+    assert len(cache._refresh_tasks) == 0
+
+  asyncio.run(get())
+  # the failed refresh kept the stale entry
+  assert cache.lookup(key=key).result.result_type == 'not_found'
+
+
+def test_sqlite_backend_shares_results(tmp_path):
+  from liveinfo import ytlive
+  from liveinfo.cache import SqliteLiveProgramCacheBackend
+
+  path = tmp_path / 'cache.sqlite3'
+  nicolive_result = build_nicolive_program_result(
+    end_date='2023-10-01T23:00:00+09:00',
+  )
+  ytlive_result = ytlive.build_ytlive_programs_result(
+    videos_list_result=ytlive.build_ytlive_videos_list_result(
+      status_code=200,
+      response={
+        'items': [{
+          'id': 'v1',
+          'snippet': {
+            'channelId': 'UC0000000000000000000000',
+            'channelTitle': 'channel',
+            'title': 'title',
+            'description': '',
+            'liveBroadcastContent': 'live',
+            'thumbnails': {
+              'high': {'url': 'https://i.ytimg.com/h.jpg', 'width': 480, 'height': 360},  # noqa: E501
+            },
+          },
+          'status': {'uploadStatus': 'uploaded', 'privacyStatus': 'public'},
+          'liveStreamingDetails': {'actualStartTime': '2023-10-01T12:00:00Z'},
+        }],
+      },
+    ),
+  )
+
+  writer = LiveProgramCache(backend=SqliteLiveProgramCacheBackend(path=path))
+  writer.store(key=('nicolive', 'lv1'), result=nicolive_result)
+  writer.store(
+    key=('ytlive', 'UC0000000000000000000000'),
+    result=ytlive_result,
+  )
+
+  reader = LiveProgramCache(backend=SqliteLiveProgramCacheBackend(path=path))
+
+  nicolive_entry = reader.lookup(key=('nicolive', 'lv1'))
+  assert nicolive_entry is not None
+  assert nicolive_entry.result == nicolive_result
+
+  ytlive_entry = reader.lookup(key=('ytlive', 'UC0000000000000000000000'))
+  assert ytlive_entry is not None
+  assert ytlive_entry.result == ytlive_result
+
+  assert reader.lookup(key=('nicolive', 'lv2')) is None
+
+
+def test_sqlite_backend_evicts_expired_and_oldest(tmp_path):
+  from liveinfo.cache import (
+    LiveProgramCacheEntry, SqliteLiveProgramCacheBackend,
+  )
+
+  backend = SqliteLiveProgramCacheBackend(
+    path=tmp_path / 'cache.sqlite3',
+    max_entries=2,
+  )
+  not_found_result = nicolive.GetNicoliveProgramNotFoundResult(
+    result_type='not_found',
+  )
+
+  now = time.time()
+  backend.store(
+    key=('nicolive', 'lv0'),
+    entry=LiveProgramCacheEntry(
+      result=not_found_result,
+      fresh_until=now - 2,
+      stale_until=now - 1,
+    ),
+  )
+  assert backend.lookup(key=('nicolive', 'lv0')) is None
+
+  for live_id in ['lv1', 'lv2', 'lv3']:
+    backend.store(
+      key=('nicolive', live_id),
+      entry=LiveProgramCacheEntry(
+        result=not_found_result,
+        fresh_until=now + 60,
+        stale_until=now + 60,
+      ),
+    )
+
+  assert backend.lookup(key=('nicolive', 'lv1')) is None
+  assert backend.lookup(key=('nicolive', 'lv2')) is not None
+  assert backend.lookup(key=('nicolive', 'lv3')) is not None
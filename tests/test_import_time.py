@@ -0,0 +1,70 @@
+import subprocess
+import sys
+from typing import Set
+
+
+heavy_modules = {'bs4', 'html5lib', 'requests', 'aiohttp', 'asyncio'}
+
+
+def get_imported_modules(statement: str) -> Set[str]:
+  # Modules in sys.modules after running the statement in a new process.
+  # (`python -X importtime` does not report modules imported through
+  # importlib.import_module, as the lazy attributes of liveinfo are)
+  completed = subprocess.run(
+    [
+      sys.executable, '-c',
+      f'{statement}\n'
+      'import sys; print("\\n".join(sys.modules))',
+    ],
+    capture_output=True,
+    check=True,
+    text=True,
+  )
+
+  return set(completed.stdout.splitlines())
+
+
+def test_import_liveinfo_is_light():
+  modules = get_imported_modules('import liveinfo')
+
+  assert 'liveinfo' in modules
+  assert 'liveinfo.nicolive' not in modules
+  assert 'liveinfo.cli' not in modules
+  assert modules.isdisjoint(heavy_modules)
+
+
+def test_import_cli_defers_heavy_modules():
+  modules = get_imported_modules('import liveinfo.cli')
+
+  assert 'liveinfo.ytlive' in modules
+  assert 'liveinfo.watch' not in modules
+  assert modules.isdisjoint(heavy_modules)
+
+
+def test_submodules_are_attributes():
+  # `import liveinfo` alone, without importing the submodules first
+  subprocess.run(
+    [
+      sys.executable, '-c',
+      'import types, liveinfo; '
+      'assert all('
+      'isinstance(getattr(liveinfo, name), types.ModuleType) '
+      'for name in ['
+      "'aio', 'cache', 'cli', 'client', 'liveinfo', 'metrics', 'nicolive', "
+      "'output', 'ratelimit', 'resilience', 'serialization', "
+      "'singleflight', 'watch', 'ytlive'"
+      ']); '
+      'assert liveinfo.liveinfo.get_live_program is liveinfo.get_live_program'
+    ],
+    check=True,
+  )
+
+
+def test_heavy_modules_load_on_first_use():
+  modules = get_imported_modules(
+    'from liveinfo import nicolive; '
+    'nicolive.parse_nicolive_watch_html('
+    "html='<html></html>', engine='html5lib')"
+  )
+
+  assert {'bs4', 'html5lib'} <= modules
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import threading
+
+from liveinfo import liveinfo, nicolive
+from liveinfo.aio import AsyncLiveInfoClient, AsyncLiveInfoResponse
+
+
+def test_guess_service():
+  assert liveinfo.guess_service(
+    'https://live.nicovideo.jp/watch/lv339313375',
+  ) == 'nicolive'
+  assert liveinfo.guess_service('lv339313375') == 'nicolive'
+  assert liveinfo.guess_service('co5633084') == 'nicolive'
+  assert liveinfo.guess_service('user/123430062') == 'nicolive'
+  assert liveinfo.guess_service('UC7OazbQ3Eo9vrkcReXGIZkQ') == 'ytlive'
+  assert liveinfo.guess_service('@handle') is None
+
+
+def test_iter_live_program_results_yields_as_completed(monkeypatch):
+  slow_started = threading.Event()
+  release_slow = threading.Event()
+
+  def get_nicolive_program(live_id_or_url, **kwargs):
+    if live_id_or_url == 'lv1':
+      slow_started.set()
+      release_slow.wait(timeout=5)
+
+    return nicolive.GetNicoliveProgramNotFoundResult(
+      result_type='not_found',
+    )
+
+  monkeypatch.setattr(nicolive, 'get_nicolive_program', get_nicolive_program)
+
+  outputs = liveinfo.iter_live_program_results(
+    live_ids_or_urls=iter(['lv1', 'lv2', '@unknown']),
+    service=None,
+    ytlive_api_key=None,
+    jobs=4,
+  )
+
+  first = next(outputs)
+  second = next(outputs)
+  assert slow_started.is_set()
+  assert {first.live_id_or_url, second.live_id_or_url} == {'lv2', '@unknown'}
+
+  unknown = first if first.live_id_or_url == '@unknown' else second
+  assert unknown.service is None
+  assert unknown.result is None
+  assert unknown.error is not None
+
+  release_slow.set()
+  last = next(outputs)
+  assert last.live_id_or_url == 'lv1'
+  assert last.service == 'nicolive'
+  assert last.result == nicolive.GetNicoliveProgramNotFoundResult(
+    result_type='not_found',
+  )
+
+
+def test_iter_live_program_results_maps_errors_to_outputs(monkeypatch):
+  def get_nicolive_program(live_id_or_url, **kwargs):
+    raise json.JSONDecodeError('Expecting value', '', 0)
+
+  monkeypatch.setattr(nicolive, 'get_nicolive_program', get_nicolive_program)
+
+  outputs = list(liveinfo.iter_live_program_results(
+    # a channel id without an api key, a malformed response, an unknown id
+    live_ids_or_urls=['UC' + 'a' * 22, 'lv1', 'foo'],
+    service=None,
+    ytlive_api_key=None,
+  ))
+
+  assert sorted(output.live_id_or_url for output in outputs) == [
+    'UC' + 'a' * 22, 'foo', 'lv1',
+  ]
+  for output in outputs:
+    assert output.result is None
+    assert output.error is not None
+
+  errors = {output.live_id_or_url: output.error for output in outputs}
+  assert errors['UC' + 'a' * 22] == 'ytlive_api_key is required'
+  assert errors['lv1'].startswith('JSONDecodeError: ')
+
+
+def test_aget_live_program_end_to_end(monkeypatch):
+  watch_html = (
+    '<html><head><script type="application/ld+json">'
+    '{"name": "program", "publication": '
+    '{"startDate": "2023-10-01T21:00:00+09:00", '
+    '"endDate": "2023-10-01T23:00:00+09:00"}}'
+    '</script></head></html>'
+  )
+  sessions = []
+
+  async def get_once(self, url, headers, params, read_text):
+    sessions.append(self.session)  # a real aiohttp session
+    return AsyncLiveInfoResponse(status_code=200, headers={}, text=watch_html)
+
+  monkeypatch.setattr(AsyncLiveInfoClient, '_get_once', get_once)
+
+  program = asyncio.run(liveinfo.aget_live_program(
+    live_id_or_url='https://live.nicovideo.jp/watch/lv339313375',
+    service=None,
+    ytlive_api_key=None,
+  ))
+
+  assert program.name == 'program'
+  assert program.end_date == '2023-10-01T23:00:00+09:00'
+  # no session is left open after the event loop
+  assert len(sessions) == 1 and sessions[0].closed
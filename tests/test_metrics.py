@@ -0,0 +1,109 @@
+import urllib.request
+
+import pytest
+
+from liveinfo import liveinfo, metrics
+
+
+watch_html = '''<!DOCTYPE html>
+<html lang="ja"><head>
+<meta property="og:url" content="https://live.nicovideo.jp/watch/lv1">
+<script type="application/ld+json">{
+  "name": "テスト番組",
+  "description": "番組説明",
+  "publication": {"startDate": "2023-10-01T21:00:00+09:00"}
+}</script>
+</head><body></body></html>
+'''
+
+
+class FakeResponse:
+  status_code = 200
+  text = watch_html
+
+  def close(self):
+    pass
+
+
+class FakeClient:
+  def get(self, url, headers, params=None, stream=False):
+    return FakeResponse()
+
+
+@pytest.fixture
+def live_info_metrics():
+  yield metrics.enable_metrics()
+  metrics.disable_metrics()
+
+
+def test_metrics_are_disabled_by_default():
+  assert metrics.get_metrics() is None
+  assert metrics.measure('html5lib_parse_duration') is \
+    metrics.measure('http_request_duration', labels=('search.list',))
+
+  metrics.count_result(service='nicolive', result_type='success')
+  assert metrics.get_metrics() is None
+
+
+def test_get_live_program_result_records_metrics(live_info_metrics):
+  for _ in range(2):
+    result = liveinfo.get_live_program_result(
+      live_id_or_url='lv1',
+      service=None,
+      ytlive_api_key=None,
+      client=FakeClient(),  # type: ignore
+    )
+    assert result.result_type == 'success'
+
+  assert live_info_metrics.http_request_duration.get_count(
+    labels=('nicolive_watch',),
+  ) == 2
+  assert live_info_metrics.http_response_bytes.get_count(
+    labels=('nicolive_watch',),
+  ) == 2
+  assert live_info_metrics.html5lib_parse_duration.get_count() == 2
+  assert live_info_metrics.json_ld_decode_duration.get_count() == 2
+  assert live_info_metrics.sanitize_filename_duration.get_count() == 2
+  assert live_info_metrics.results.get(labels=('nicolive', 'success')) == 2
+
+  text = live_info_metrics.render()
+  assert '# TYPE liveinfo_http_request_duration_seconds histogram\n' in text
+  assert 'liveinfo_http_request_duration_seconds_count' \
+    '{endpoint="nicolive_watch"} 2\n' in text
+  assert 'liveinfo_http_response_bytes_bucket' \
+    '{endpoint="nicolive_watch",le="+Inf"} 2\n' in text
+  assert 'liveinfo_results_total' \
+    '{service="nicolive",result_type="success"} 2.0\n' in text
+
+
+def test_histogram_buckets_are_cumulative():
+  histogram = metrics.Histogram(
+    name='test_seconds',
+    help='test',
+    buckets=(0.1, 1.0),
+  )
+  for value in [0.05, 0.5, 0.5, 5.0]:
+    histogram.observe(value=value)
+
+  assert histogram.render()[2:] == [
+    'test_seconds_bucket{le="0.1"} 1',
+    'test_seconds_bucket{le="1.0"} 3',
+    'test_seconds_bucket{le="+Inf"} 4',
+    'test_seconds_sum 6.05',
+    'test_seconds_count 4',
+  ]
+
+
+def test_serve_metrics(live_info_metrics):
+  live_info_metrics.results.inc(labels=('ytlive', 'forbidden'))
+
+  server = metrics.serve_metrics(port=0)
+  try:
+    port = server.server_address[1]
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics') as res:
+      assert res.headers['Content-Type'] == 'text/plain; version=0.0.4'
+      assert 'liveinfo_results_total' \
+        '{service="ytlive",result_type="forbidden"} 1.0' in res.read().decode()
+  finally:
+    server.shutdown()
+    server.server_close()
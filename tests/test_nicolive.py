@@ -0,0 +1,281 @@
+import asyncio
+import json
+import re
+
+from liveinfo import nicolive
+from liveinfo.aio import AsyncLiveInfoClient, AsyncLiveInfoResponse
+
+
+watch_html = '''<!DOCTYPE html>
+<html lang="ja"><head>
+<meta charset="utf-8">
+<meta property="og:url" content="https://live.nicovideo.jp/watch/lv339313375">
+<script type="application/ld+json">{
+  "name": "テスト番組",
+  "description": "番組説明",
+  "thumbnailUrl": ["https://example.com/thumbnail.jpg"],
+  "publication": {
+    "startDate": "2023-10-01T21:00:00+09:00",
+    "endDate": "2023-10-01T23:00:00+09:00"
+  }
+}</script>
+</head>
+<body><p>body</p></body></html>
+'''
+
+
+def test_parse_nicolive_watch_html():
+  result = nicolive.parse_nicolive_watch_html(html=watch_html)
+  assert result.result_type == 'success'
+
+  ogp_result = result.data.ogp
+  assert ogp_result.result_type == 'success'
+  assert ogp_result.data.url == 'https://live.nicovideo.jp/watch/lv339313375'
+
+  json_ld_result = result.data.json_ld
+  assert json_ld_result.result_type == 'success'
+  assert json_ld_result.data.name == 'テスト番組'
+  assert json_ld_result.data.description == '番組説明'
+  assert json_ld_result.data.thumbnail_url == [
+    'https://example.com/thumbnail.jpg',
+  ]
+  assert json_ld_result.data.start_date == '2023-10-01T21:00:00+09:00'
+  assert json_ld_result.data.end_date == '2023-10-01T23:00:00+09:00'
+
+
+def test_parse_nicolive_watch_html_matches_separate_parsers():
+  result = nicolive.parse_nicolive_watch_html(html=watch_html)
+
+  assert result.data.ogp == \
+    nicolive.parse_ogp_in_nicolive_watch_html(html=watch_html)
+  assert result.data.json_ld == \
+    nicolive.parse_json_ld_in_nicolive_watch_html(html=watch_html)
+
+
+def test_parse_nicolive_watch_html_streaming_matches_html5lib():
+  assert nicolive.parse_nicolive_watch_html(
+    html=watch_html,
+    engine='streaming',
+  ) == nicolive.parse_nicolive_watch_html(
+    html=watch_html,
+    engine='html5lib',
+  )
+
+
+def test_parse_nicolive_watch_html_streaming_falls_back_to_html5lib():
+  html = watch_html.replace(
+    '<meta property="og:url" '
+    'content="https://live.nicovideo.jp/watch/lv339313375">',
+    '',
+  )
+
+  result = nicolive.parse_nicolive_watch_html(html=html, engine='streaming')
+  assert result.data.ogp.result_type == 'success'
+  assert result.data.ogp.data.url is None
+  assert result.data.json_ld.result_type == 'success'
+  assert result.data.json_ld.data.name == 'テスト番組'
+
+
+def test_read_nicolive_watch_html_head_stops_after_head():
+  class FakeResponse:
+    encoding = 'utf-8'
+    closed = False
+    consumed = 0
+
+    def iter_content(self, chunk_size):
+      body = (watch_html + '<p>filler</p>' * 10000).encode('utf-8')
+      for offset in range(0, len(body), chunk_size):
+        self.consumed += 1
+        yield body[offset:offset + chunk_size]
+
+    def close(self):
+      self.closed = True
+
+  res = FakeResponse()
+  html = nicolive.read_nicolive_watch_html_head(
+    res=res,  # type: ignore
+    chunk_size=64,
+  )
+
+  assert res.closed
+  assert '</script>' in html
+  assert len(html) < len(watch_html)
+
+
+def test_aget_nicolive_program_closes_its_session(monkeypatch):
+  sessions = []
+
+  async def get_once(self, url, headers, params, read_text):
+    sessions.append(self.session)  # a real aiohttp session
+    return AsyncLiveInfoResponse(status_code=200, headers={}, text=watch_html)
+
+  monkeypatch.setattr(AsyncLiveInfoClient, '_get_once', get_once)
+
+  async def get_programs():
+    # without a client: a session of its own, closed on return
+    result = await nicolive.aget_nicolive_program(
+      live_id_or_url='lv339313375',
+      useragent='test',
+    )
+    assert len(sessions) == 1 and sessions[0].closed
+
+    # with a client: the session is kept until the client is closed
+    async with AsyncLiveInfoClient() as client:
+      await nicolive.aget_nicolive_program(
+        live_id_or_url='lv339313375',
+        useragent='test',
+        client=client,
+      )
+      assert len(sessions) == 2 and not sessions[1].closed
+
+    return result
+
+  result = asyncio.run(get_programs())
+  assert result.result_type == 'success'
+  assert result.data.name == 'テスト番組'
+  assert all(session.closed for session in sessions)
+
+
+def test_get_nicolive_programs_batch_keeps_order(monkeypatch):
+  def fake_fetch_nicolive_watch(live_id_or_url, **kwargs):
+    if live_id_or_url == 'lv404':
+      return nicolive.FetchNicoliveWatchNotFoundResult(
+        result_type='not_found',
+      )
+    if live_id_or_url == 'lv500':
+      return nicolive.FetchNicoliveWatchMaintenanceResult(
+        result_type='maintenance',
+      )
+    return nicolive.FetchNicoliveWatchSuccessHtmlResult(
+      result_type='success',
+      data_type='html',
+      data=nicolive.FetchNicoliveWatchSuccessHtmlData(
+        html=watch_html,
+      ),
+    )
+
+  monkeypatch.setattr(
+    nicolive, 'fetch_nicolive_watch', fake_fetch_nicolive_watch,
+  )
+
+  results = nicolive.get_nicolive_programs_batch(
+    live_ids_or_urls=['lv1', 'lv404', 'lv500', 'co1'],
+    useragent='test',
+    max_concurrency=2,
+  )
+
+  assert [result.result_type for result in results] == [
+    'success',
+    'not_found',
+    'maintenance',
+    'success',
+  ]
+
+
+def test_get_nicolive_programs_batch_maps_errors_per_id(monkeypatch):
+  from liveinfo.resilience import CircuitOpenError
+
+  def fake_fetch_nicolive_watch(live_id_or_url, **kwargs):
+    if live_id_or_url == 'lv503':
+      raise CircuitOpenError('live.nicovideo.jp')
+    return nicolive.FetchNicoliveWatchSuccessHtmlResult(
+      result_type='success',
+      data_type='html',
+      data=nicolive.FetchNicoliveWatchSuccessHtmlData(
+        html='<html>broken</html>' if live_id_or_url == 'lv2' else watch_html,
+      ),
+    )
+
+  get_nicolive_program_from_watch_result = \
+    nicolive.get_nicolive_program_from_watch_result
+
+  def fake_get_nicolive_program_from_watch_result(
+    nicolive_watch_result, **kwargs,
+  ):
+    if nicolive_watch_result.result_type == 'success' and \
+       'broken' in nicolive_watch_result.data.html:
+      raise json.JSONDecodeError('Expecting value', '', 0)
+    return get_nicolive_program_from_watch_result(
+      nicolive_watch_result=nicolive_watch_result,
+      **kwargs,
+    )
+
+  monkeypatch.setattr(
+    nicolive, 'fetch_nicolive_watch', fake_fetch_nicolive_watch,
+  )
+  monkeypatch.setattr(
+    nicolive, 'get_nicolive_program_from_watch_result',
+    fake_get_nicolive_program_from_watch_result,
+  )
+
+  results = nicolive.get_nicolive_programs_batch(
+    live_ids_or_urls=['lv1', 'lv2', 'lv503', 'co1'],
+    useragent='test',
+    max_concurrency=2,
+  )
+
+  assert [result.result_type for result in results] == [
+    'success',
+    'unknown_error',
+    'unknown_error',
+    'success',
+  ]
+
+
+def sanitize_filename_per_char(filename):
+  # the previous implementation, kept as the reference behavior
+  if filename.startswith(' '):
+    filename = '_' + filename[1:]
+
+  filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+  filename = filename.replace('\xe4', '')
+
+  sanitized = []
+  for char in filename:
+    try:
+      char.encode('cp932')
+      sanitized.append(char)
+    except UnicodeEncodeError:
+      sanitized.append('_')
+
+  return ''.join(sanitized)
+
+
+def test_sanitize_filename_matches_per_char_implementation():
+  filenames = [
+    '',
+    ' ',
+    '  先頭に空白が2つ',
+    '【雑談】まったり作業配信 #123',
+    'a<b>c:d"e/f\\g|h?i*j',
+    'Mädchen \xe4\xe4 ä',
+    '絵文字😀と①②③と髙﨑と～〜',
+    'тест ελληνικά 한국어  　\t\n',
+    '\ud800 lone surrogate',
+    ''.join(chr(code_point) for code_point in range(0, 0x3100)),
+  ]
+
+  for filename in filenames:
+    assert nicolive.sanitize_filename(filename) == \
+      sanitize_filename_per_char(filename)
+
+
+def test_parse_json_ld_text_sanitize_can_be_disabled():
+  json_ld_text = json.dumps({
+    'name': 'a/b 😀',
+    'description': None,
+  })
+
+  sanitized = nicolive.parse_json_ld_text_in_nicolive_watch_html(
+    json_ld_text=json_ld_text,
+  )
+  assert sanitized.result_type == 'success'
+  assert sanitized.data.name == 'a_b _'
+  assert sanitized.data.description is None
+
+  raw = nicolive.parse_json_ld_text_in_nicolive_watch_html(
+    json_ld_text=json_ld_text,
+    sanitize=False,
+  )
+  assert raw.result_type == 'success'
+  assert raw.data.name == 'a/b 😀'
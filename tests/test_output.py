@@ -0,0 +1,98 @@
+import dataclasses
+import io
+import json
+
+import pytest
+
+from liveinfo import nicolive, ytlive
+from liveinfo.output import LiveProgramOutput, LiveProgramOutputWriter
+from liveinfo.serialization import dump_dataclass
+
+
+def build_ytlive_programs_result():
+  return ytlive.build_ytlive_programs_result(
+    videos_list_result=ytlive.build_ytlive_videos_list_result(
+      status_code=200,
+      response={
+        'items': [
+          {
+            'id': f'v{index}',
+            'snippet': {
+              'channelId': 'UC0000000000000000000000',
+              'channelTitle': 'channel',
+              'title': f'title {index}',
+              'description': '',
+              'liveBroadcastContent': 'live',
+              'thumbnails': {
+                'default': {'url': 'https://i.ytimg.com/d.jpg', 'width': 120, 'height': 90},  # noqa: E501
+              },
+            },
+            'status': {
+              'uploadStatus': 'uploaded',
+              'privacyStatus': 'public',
+            },
+            'liveStreamingDetails': {
+              'actualStartTime': '2023-10-01T12:00:00Z',
+            },
+          }
+          for index in range(3)
+        ],
+      },
+    ),
+  )
+
+
+def build_outputs():
+  return [
+    LiveProgramOutput(
+      live_id_or_url='UC0000000000000000000000',
+      service='ytlive',
+      result=build_ytlive_programs_result(),
+    ),
+    LiveProgramOutput(
+      live_id_or_url='lv1',
+      service='nicolive',
+      result=nicolive.GetNicoliveProgramNotFoundResult(
+        result_type='not_found',
+      ),
+    ),
+  ]
+
+
+def test_dump_dataclass_matches_asdict():
+  for output in build_outputs():
+    assert dump_dataclass(output) == dataclasses.asdict(output)
+
+
+def test_output_writer_ndjson_and_json():
+  outputs = build_outputs()
+
+  stream = io.BytesIO()
+  with LiveProgramOutputWriter(format='ndjson', stream=stream) as writer:
+    for output in outputs:
+      writer.write(output)
+
+  lines = stream.getvalue().decode('utf-8').splitlines()
+  assert [json.loads(line) for line in lines] == \
+    [dataclasses.asdict(output) for output in outputs]
+
+  stream = io.BytesIO()
+  with LiveProgramOutputWriter(format='json', stream=stream) as writer:
+    writer.write(outputs[1])
+
+  # an array even of a single record
+  assert json.loads(stream.getvalue()) == [dataclasses.asdict(outputs[1])]
+
+
+def test_output_writer_msgpack():
+  msgpack = pytest.importorskip('msgpack')
+
+  outputs = build_outputs()
+
+  stream = io.BytesIO()
+  with LiveProgramOutputWriter(format='msgpack', stream=stream) as writer:
+    for output in outputs:
+      writer.write(output)
+
+  unpacker = msgpack.Unpacker(io.BytesIO(stream.getvalue()), raw=False)
+  assert list(unpacker) == [dataclasses.asdict(output) for output in outputs]
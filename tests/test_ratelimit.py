@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+
+from liveinfo.client import LiveInfoClient
+from liveinfo.ratelimit import (
+  MemoryRateLimiterBackend, RateLimit, RateLimiter, SqliteRateLimiterBackend,
+  parse_retry_after,
+)
+
+
+def test_rate_limiter_allows_burst():
+  rate_limiter = RateLimiter(rate=10.0, burst=3)
+
+  assert [rate_limiter.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+  assert rate_limiter.reserve() == pytest.approx(0.1, abs=0.01)
+  assert rate_limiter.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_rate_limiter_keys():
+  rate_limiter = RateLimiter(
+    rate=1.0,
+    host_limits={'live.nicovideo.jp': RateLimit(rate=2.0, burst=2)},
+  )
+
+  assert rate_limiter.reserve(key='www.googleapis.com') == 0.0
+  assert rate_limiter.reserve(key='www.googleapis.com') == \
+    pytest.approx(1.0, abs=0.01)
+
+  assert rate_limiter.reserve(key='live.nicovideo.jp') == 0.0
+  assert rate_limiter.reserve(key='live.nicovideo.jp') == 0.0
+  assert rate_limiter.reserve(key='live.nicovideo.jp') == \
+    pytest.approx(0.5, abs=0.01)
+
+  with pytest.raises(ValueError):
+    RateLimiter(rate=0.0)
+
+
+def test_rate_limiter_across_threads():
+  rate_limiter = RateLimiter(rate=100.0)
+  waits = []
+
+  def reserve():
+    for _ in range(25):
+      waits.append(rate_limiter.reserve())
+
+  threads = [threading.Thread(target=reserve) for _ in range(4)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  # one token each 10 ms regardless of the thread
+  assert len(waits) == 100
+  assert max(waits) == pytest.approx(0.99, abs=0.05)
+
+
+def test_rate_limiter_aacquire():
+  rate_limiter = RateLimiter(rate=100.0)
+
+  async def acquire():
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(*(rate_limiter.aacquire() for _ in range(10)))
+    return loop.time() - start
+
+  # the tasks wait without blocking each other: 9 intervals in total
+  assert asyncio.run(acquire()) == pytest.approx(0.09, abs=0.05)
+
+
+def test_rate_limiter_defer():
+  rate_limiter = RateLimiter(rate=10.0, burst=2)
+
+  rate_limiter.defer(key='live.nicovideo.jp', seconds=5.0)
+  assert rate_limiter.reserve(key='live.nicovideo.jp') == \
+    pytest.approx(5.0, abs=0.01)
+  assert rate_limiter.reserve(key='www.googleapis.com') == 0.0
+
+
+def test_rate_limiter_aacquire_does_not_block_event_loop():
+  memory_backend = MemoryRateLimiterBackend()
+  released = threading.Event()
+
+  class BlockingBackend:
+    # like a SQLite database locked by another process
+    def update(self, key, func):
+      assert released.wait(timeout=5)
+      return memory_backend.update(key=key, func=func)
+
+  rate_limiter = RateLimiter(rate=100.0, backend=BlockingBackend())
+
+  async def acquire():
+    task = asyncio.ensure_future(rate_limiter.aacquire())
+    await asyncio.sleep(0.01)
+    # reached only while the backend waits in another thread
+    released.set()
+    await task
+    await rate_limiter.adefer(key='', seconds=1.0)
+
+  asyncio.run(acquire())
+  assert rate_limiter.reserve() == pytest.approx(1.0, abs=0.05)
+
+
+def test_sqlite_rate_limiter_backend_shares_budget(tmp_path):
+  path = tmp_path / 'ratelimit.sqlite3'
+
+  # one limiter per process, sharing the database file
+  first = RateLimiter(rate=10.0, backend=SqliteRateLimiterBackend(path=path))
+  second = RateLimiter(rate=10.0, backend=SqliteRateLimiterBackend(path=path))
+
+  assert first.reserve(key='live.nicovideo.jp') == 0.0
+  assert second.reserve(key='live.nicovideo.jp') == \
+    pytest.approx(0.1, abs=0.02)
+  assert first.reserve(key='live.nicovideo.jp') == \
+    pytest.approx(0.2, abs=0.02)
+
+
+def test_parse_retry_after():
+  assert parse_retry_after('120') == 120.0
+  assert parse_retry_after('soon') is None
+
+  assert parse_retry_after(formatdate(time.time() + 60, usegmt=True)) == \
+    pytest.approx(60.0, abs=2.0)
+
+
+def test_client_honors_retry_after():
+  class FakeResponse:
+    status_code = 429
+    headers = {'Retry-After': '30'}
+
+    def close(self):
+      pass
+
+  class FakeSession:
+    def get(self, url, headers, params=None, stream=False, timeout=None):
+      return FakeResponse()
+
+  rate_limiter = RateLimiter(rate=10.0)
+  client = LiveInfoClient(
+    session=FakeSession(),  # type: ignore
+    rate_limiter=rate_limiter,
+  )
+
+  assert client.get(
+    'https://live.nicovideo.jp/watch/co1',
+    headers={},
+  ).status_code == 429
+  assert rate_limiter.reserve(key='live.nicovideo.jp') == \
+    pytest.approx(30.0, abs=0.1)
@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+import requests
+
+from liveinfo.aio import AsyncLiveInfoClient, AsyncLiveInfoResponse
+from liveinfo.client import LiveInfoClient
+from liveinfo.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+
+class FakeResponse:
+  def __init__(self, status_code, headers=None):
+    self.status_code = status_code
+    self.headers = headers or {}
+    self.closed = False
+
+  def close(self):
+    self.closed = True
+
+
+class FakeSession:
+  def __init__(self, outcomes):
+    self.outcomes = list(outcomes)  # status codes or exceptions
+    self.urls = []
+
+  def get(self, url, headers, params=None, stream=False, timeout=None):
+    self.urls.append(url)
+
+    outcome = self.outcomes.pop(0)
+    if isinstance(outcome, Exception):
+      raise outcome
+
+    return FakeResponse(outcome)
+
+
+def build_client(outcomes, max_retries=2, circuit_breaker=None):
+  session = FakeSession(outcomes)
+  client = LiveInfoClient(
+    session=session,  # type: ignore
+    retry=RetryPolicy(max_retries=max_retries, backoff_base=0.0),
+    circuit_breaker=circuit_breaker,
+  )
+  return client, session
+
+
+def get(client):
+  return client.get('https://live.nicovideo.jp/watch/co1', headers={})
+
+
+def test_retry_policy_delay():
+  retry = RetryPolicy(backoff_base=0.5, backoff_max=3.0)
+
+  for attempt, max_delay in [(0, 0.5), (1, 1.0), (2, 2.0), (5, 3.0)]:
+    for _ in range(100):
+      assert 0.0 <= retry.get_delay(attempt=attempt) <= max_delay
+
+
+def test_client_retries_retryable_statuses():
+  client, session = build_client([503, 429, 200])
+  assert get(client).status_code == 200
+  assert len(session.urls) == 3
+
+  client, session = build_client([404])
+  assert get(client).status_code == 404
+  assert len(session.urls) == 1
+
+  # the last response is returned when the retries run out
+  client, session = build_client([500, 500, 500])
+  assert get(client).status_code == 500
+  assert len(session.urls) == 3
+
+
+def test_client_retries_connection_errors():
+  client, session = build_client([requests.ConnectionError(), 200])
+  assert get(client).status_code == 200
+
+  client, session = build_client([
+    requests.Timeout(),
+    requests.ConnectionError(),
+  ], max_retries=1)
+  with pytest.raises(requests.ConnectionError):
+    get(client)
+  assert len(session.urls) == 2
+
+
+def test_circuit_breaker_fails_fast():
+  circuit_breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60.0)
+  client, session = build_client(
+    [500, 500, 500],
+    circuit_breaker=circuit_breaker,
+  )
+
+  assert get(client).status_code == 500
+  assert circuit_breaker.is_open(host='live.nicovideo.jp')
+
+  with pytest.raises(CircuitOpenError):
+    get(client)
+  assert len(session.urls) == 3
+
+  # other hosts are not affected
+  circuit_breaker.before_request(host='www.googleapis.com')
+
+
+def test_circuit_breaker_half_open():
+  circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+  host = 'live.nicovideo.jp'
+
+  circuit_breaker.record_failure(host=host)
+  assert circuit_breaker.is_open(host=host)
+
+  # one trial request at a time after reset_timeout
+  circuit_breaker.before_request(host=host)
+  with pytest.raises(CircuitOpenError):
+    circuit_breaker.before_request(host=host)
+
+  circuit_breaker.record_failure(host=host)
+  assert circuit_breaker.is_open(host=host)
+
+  circuit_breaker.before_request(host=host)
+  circuit_breaker.record_success(host=host)
+  assert not circuit_breaker.is_open(host=host)
+
+
+def test_async_client_retries():
+  client = AsyncLiveInfoClient(
+    retry=RetryPolicy(backoff_base=0.0),
+    circuit_breaker=CircuitBreaker(),
+  )
+  statuses = [503, 200]
+
+  async def get_once(url, headers, params, read_text):
+    return AsyncLiveInfoResponse(
+      status_code=statuses.pop(0),
+      headers={},
+      text='',
+    )
+
+  client._get_once = get_once  # type: ignore
+
+  res = asyncio.run(client.get('https://live.nicovideo.jp/', headers={}))
+  assert res.status_code == 200
+  assert statuses == []
+
+
+def test_circuit_breaker_half_open_released_on_other_errors():
+  circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+  host = 'live.nicovideo.jp'
+  circuit_breaker.record_failure(host=host)
+
+  # the trial ends with an error that is not a connection error
+  client, session = build_client(
+    [requests.TooManyRedirects(), 200],
+    circuit_breaker=circuit_breaker,
+  )
+  with pytest.raises(requests.TooManyRedirects):
+    get(client)
+
+  # the circuit is not stuck waiting for the trial
+  assert get(client).status_code == 200
+  assert not circuit_breaker.is_open(host=host)
+
+
+def test_async_client_half_open_released_on_cancel():
+  circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+  host = 'live.nicovideo.jp'
+  circuit_breaker.record_failure(host=host)
+
+  client = AsyncLiveInfoClient(circuit_breaker=circuit_breaker)
+
+  async def get_once(url, headers, params, read_text):
+    raise asyncio.CancelledError()
+
+  client._get_once = get_once  # type: ignore
+
+  with pytest.raises(asyncio.CancelledError):
+    asyncio.run(client.get('https://live.nicovideo.jp/', headers={}))
+
+  circuit_breaker.before_request(host=host)
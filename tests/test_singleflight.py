@@ -0,0 +1,185 @@
+import asyncio
+import gc
+import threading
+import time
+
+import pytest
+
+from liveinfo import liveinfo, nicolive
+from liveinfo.singleflight import SingleFlight
+
+
+def run_threads(target, count):
+  results = []
+  errors = []
+
+  def run():
+    try:
+      results.append(target())
+    except Exception as error:
+      errors.append(error)
+
+  threads = [threading.Thread(target=run) for _ in range(count)]
+  for thread in threads:
+    thread.start()
+
+  return threads, results, errors
+
+
+def test_single_flight_coalesces_threads():
+  single_flight = SingleFlight()
+  release = threading.Event()
+  calls = []
+
+  def fetch():
+    calls.append(None)
+    release.wait(timeout=5)
+    return object()
+
+  threads, results, errors = run_threads(
+    lambda: single_flight.do(key='co1', fetch=fetch),
+    count=8,
+  )
+  time.sleep(0.1)  # let every thread join the flight
+  release.set()
+  for thread in threads:
+    thread.join()
+
+  assert len(calls) == 1
+  assert errors == []
+  assert len(results) == 8
+  assert all(result is results[0] for result in results)
+
+  # nothing is kept after the flight
+  single_flight.do(key='co1', fetch=fetch)
+  assert len(calls) == 2
+
+
+def test_single_flight_shares_exceptions():
+  single_flight = SingleFlight()
+  release = threading.Event()
+
+  def fetch():
+    release.wait(timeout=5)
+    raise ValueError('maintenance')
+
+  threads, results, errors = run_threads(
+    lambda: single_flight.do(key='co1', fetch=fetch),
+    count=4,
+  )
+  time.sleep(0.1)
+  release.set()
+  for thread in threads:
+    thread.join()
+
+  assert results == []
+  assert len(errors) == 4
+  assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_single_flight_coalesces_tasks():
+  single_flight = SingleFlight()
+  calls = []
+
+  async def fetch():
+    calls.append(None)
+    await asyncio.sleep(0.05)
+    return object()
+
+  async def run():
+    leader = asyncio.ensure_future(
+      single_flight.ado(key='co1', fetch=fetch),
+    )
+    followers = asyncio.gather(*(
+      single_flight.ado(key=key, fetch=fetch)
+      for key in ['co1', 'co1', 'co2']
+    ))
+    await asyncio.sleep(0)
+
+    # a cancelled caller does not cancel the flight the others wait for
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+      await leader
+
+    return await followers
+
+  first, second, other = asyncio.run(run())
+
+  assert len(calls) == 2
+  assert first is second
+  assert other is not first
+
+
+def test_single_flight_fetch_fails_after_callers_cancelled():
+  single_flight = SingleFlight()
+  contexts = []
+
+  async def fetch():
+    await asyncio.sleep(0.01)
+    raise ValueError('fetch failed')
+
+  async def main():
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(lambda loop, context: contexts.append(context))
+
+    callers = [
+      asyncio.ensure_future(single_flight.ado(key='lv1', fetch=fetch))
+      for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+    for caller in callers:
+      caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+
+    # the fetch keeps running and fails with nobody waiting for it
+    await asyncio.sleep(0.05)
+
+  asyncio.run(main())
+  gc.collect()  # the unretrieved exception is reported when the task is freed
+
+  assert contexts == []
+
+
+def test_get_live_program_result_coalesces_normalized_ids(monkeypatch):
+  release = threading.Event()
+  calls = []
+
+  def get_nicolive_program(live_id_or_url, **kwargs):
+    calls.append(live_id_or_url)
+    release.wait(timeout=5)
+    return nicolive.GetNicoliveProgramNotFoundResult(
+      result_type='not_found',
+    )
+
+  monkeypatch.setattr(nicolive, 'get_nicolive_program', get_nicolive_program)
+
+  single_flight = SingleFlight()
+  live_ids_or_urls = [
+    'co1',
+    'https://live.nicovideo.jp/watch/co1',
+    'co1',
+    'co2',
+  ]
+  results = {}
+
+  def run(live_id_or_url):
+    results[live_id_or_url] = liveinfo.get_live_program_result(
+      live_id_or_url=live_id_or_url,
+      service=None,
+      ytlive_api_key=None,
+      single_flight=single_flight,
+    )
+
+  threads = [
+    threading.Thread(target=run, args=(live_id_or_url,))
+    for live_id_or_url in live_ids_or_urls
+  ]
+  for thread in threads:
+    thread.start()
+  time.sleep(0.1)
+  release.set()
+  for thread in threads:
+    thread.join()
+
+  assert sorted(calls) == ['co1', 'co2']
+  assert len(results) == 3
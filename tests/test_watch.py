@@ -0,0 +1,210 @@
+import json
+
+from liveinfo import nicolive
+from liveinfo.watch import (
+  LiveProgramSnapshot, LiveProgramWatchScheduler, LiveProgramWatcher,
+  WatchTarget, WatchTargetState, build_nicolive_program_snapshot,
+  diff_live_program_snapshots, fetch_live_program_snapshot,
+)
+
+
+def build_snapshot(
+  is_live=False,
+  program_id='lv1',
+  title='program',
+  viewers=None,
+  start_date=None,
+  end_date=None,
+):
+  return LiveProgramSnapshot(
+    service='nicolive',
+    is_live=is_live,
+    program_id=program_id,
+    title=title,
+    url=None,
+    viewers=viewers,
+    start_date=start_date,
+    end_date=end_date,
+  )
+
+
+def test_build_nicolive_program_snapshot():
+  result = nicolive.GetNicoliveProgramSuccessNicoliveProgramResult(
+    result_type='success',
+    data_type='nicolive_program',
+    data=nicolive.GetNicoliveProgramNicoliveProgramData(
+      name='program',
+      description='',
+      url='https://live.nicovideo.jp/watch/lv339313375',
+      thumbnail_url=[],
+      start_date='2023-10-01T21:00:00+09:00',
+      end_date='2023-10-01T23:00:00+09:00',
+    ),
+  )
+  start = 1696161600.0  # 2023-10-01T21:00:00+09:00
+
+  before = build_nicolive_program_snapshot(result, now=start - 1)
+  assert before is not None
+  assert before.program_id == 'lv339313375'
+  assert not before.is_live
+
+  onair = build_nicolive_program_snapshot(result, now=start + 60)
+  assert onair is not None and onair.is_live
+
+  ended = build_nicolive_program_snapshot(result, now=start + 7200)
+  assert ended is not None and not ended.is_live
+
+  maintenance = nicolive.GetNicoliveProgramMaintenanceResult(
+    result_type='maintenance',
+  )
+  assert build_nicolive_program_snapshot(maintenance, now=start) is None
+
+
+def test_diff_live_program_snapshots():
+  def diff(previous, current, reported_viewers=None):
+    return diff_live_program_snapshots(
+      previous=previous,
+      current=current,
+      reported_viewers=reported_viewers,
+      viewers_delta=100,
+    )
+
+  offline = build_snapshot()
+  onair = build_snapshot(is_live=True, viewers=1000)
+
+  assert diff(None, offline) == []
+  assert diff(None, onair) == ['went_live']
+  assert diff(offline, offline) == []
+  assert diff(offline, onair) == ['went_live']
+  assert diff(onair, offline) == ['ended']
+
+  assert diff(offline, build_snapshot(program_id='lv2')) == ['new_program']
+  assert diff(offline, build_snapshot(title='renamed')) == ['title_changed']
+
+  assert diff(onair, build_snapshot(is_live=True, viewers=1099), 1000) == []
+  assert diff(onair, build_snapshot(is_live=True, viewers=1100), 1000) == [
+    'viewers_changed',
+  ]
+
+
+def test_watcher_backs_off_idle_targets():
+  snapshots = {
+    'co1': build_snapshot(),
+    'co2': build_snapshot(),
+  }
+  polled = []
+
+  def fetch(target):
+    polled.append(target.live_id_or_url)
+    return snapshots[target.live_id_or_url]
+
+  watcher = LiveProgramWatcher(
+    targets=[
+      WatchTarget(live_id_or_url='co1', service='nicolive'),
+      WatchTarget(live_id_or_url='co2', service='nicolive', interval=30.0),
+    ],
+    fetch=fetch,
+    scheduler=LiveProgramWatchScheduler(
+      interval=60.0,
+      max_interval=200.0,
+      backoff=2.0,
+    ),
+    jobs=1,
+  )
+  start = watcher.next_poll_at()
+
+  assert watcher.poll_due(now=start) == []
+  assert sorted(polled) == ['co1', 'co2']
+  # idle targets double their interval up to max_interval
+  assert [state.interval for state in watcher.states] == [120.0, 60.0]
+
+  watcher.poll_due(now=start + 120)
+  assert [state.interval for state in watcher.states] == [200.0, 120.0]
+
+  snapshots['co1'] = build_snapshot(is_live=True)
+  events = watcher.poll_due(now=start + 320)
+  assert [event.event_type for event in events] == ['went_live']
+  assert events[0].live_id_or_url == 'co1'
+  # a change resets the interval
+  assert watcher.states[0].interval == 60.0
+
+
+def test_watcher_keeps_state_on_errors():
+  snapshot = build_snapshot(is_live=True)
+  results = [snapshot, None, snapshot]
+
+  watcher = LiveProgramWatcher(
+    targets=[WatchTarget(live_id_or_url='co1', service='nicolive')],
+    fetch=lambda target: results.pop(0),
+  )
+
+  assert len(watcher.poll_due(now=watcher.next_poll_at())) == 1
+  assert watcher.poll_due(now=watcher.next_poll_at()) == []
+  assert watcher.states[0].snapshot == snapshot
+  assert watcher.poll_due(now=watcher.next_poll_at()) == []
+
+
+def test_fetch_live_program_snapshot_unknown_on_errors(monkeypatch):
+  def get_nicolive_program(live_id_or_url, **kwargs):
+    raise json.JSONDecodeError('Expecting value', '', 0)
+
+  monkeypatch.setattr(nicolive, 'get_nicolive_program', get_nicolive_program)
+
+  assert fetch_live_program_snapshot(
+    target=WatchTarget(live_id_or_url='co1', service='nicolive'),
+    useragent='test',
+    ytlive_api_key=None,
+  ) is None
+
+
+def test_scheduler_follows_program_times():
+  scheduler = LiveProgramWatchScheduler(
+    interval=60.0,
+    max_interval=900.0,
+    dense_interval=15.0,
+    start_lead=300.0,
+    start_grace=900.0,
+  )
+  start = 1696161600.0  # 2023-10-01T21:00:00+09:00
+  end = start + 7200  # 2023-10-01T23:00:00+09:00
+
+  def get_next_poll_at(live_id, snapshot, now, interval=60.0):
+    state = WatchTargetState(
+      target=WatchTarget(live_id_or_url=live_id, service='nicolive'),
+      interval=interval,
+      next_poll_at=now,
+      snapshot=snapshot,
+      first_polled_at=now,
+    )
+    return scheduler.get_next_poll_at(state=state, changed=False, now=now)
+
+  reserved = build_snapshot(
+    start_date='2023-10-01T21:00:00+09:00',
+    end_date='2023-10-01T23:00:00+09:00',
+  )
+  # idle polling until start_lead before the start
+  assert get_next_poll_at('lv1', reserved, start - 3600, 480.0) == \
+    start - 3600 + 900.0
+  assert get_next_poll_at('lv1', reserved, start - 600, 480.0) == start - 300
+  # dense polling around the start
+  assert get_next_poll_at('lv1', reserved, start - 100) == start - 85
+  assert get_next_poll_at('co1', build_snapshot(
+    start_date='2023-10-01T21:00:00+09:00',
+  ), start + 600) == start + 615
+
+  onair = build_snapshot(
+    is_live=True,
+    start_date='2023-10-01T21:00:00+09:00',
+    end_date='2023-10-01T23:00:00+09:00',
+  )
+  assert get_next_poll_at('lv1', onair, start + 60) == start + 120
+  # right after the scheduled end
+  assert get_next_poll_at('lv1', onair, end - 30) == end
+
+  # an ended program is not polled anymore, a community is
+  assert get_next_poll_at('lv1', reserved, end + 1) is None
+  assert get_next_poll_at('co1', reserved, end + 1) == end + 1 + 120.0
+
+  # nothing on air for days
+  assert get_next_poll_at('co1', reserved, end + 4 * 86400) == \
+    end + 4 * 86400 + 3600.0
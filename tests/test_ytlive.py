@@ -0,0 +1,581 @@
+import asyncio
+import dataclasses
+import json
+import pickle
+from datetime import date, datetime, timezone
+
+from liveinfo import ytlive
+from liveinfo.aio import AsyncLiveInfoResponse
+from liveinfo.serialization import dump_dataclass, load_dataclass
+
+
+def build_search_list_response(video_ids):
+  return {
+    'items': [
+      {
+        'id': {'videoId': video_id},
+        'snippet': {
+          'channelId': 'UC0000000000000000000000',
+          'channelTitle': 'channel',
+          'title': f'title {video_id}',
+          'description': '',
+          'liveBroadcastContent': 'none',
+          'thumbnails': {
+            'default': {'url': 'https://i.ytimg.com/d.jpg', 'width': 120, 'height': 90},  # noqa: E501
+          },
+        },
+      }
+      for video_id in video_ids
+    ],
+  }
+
+
+def build_videos_list_response(video_ids, privacy_status='public'):
+  return {
+    'items': [
+      {
+        'id': video_id,
+        'snippet': {
+          'channelId': 'UC0000000000000000000000',
+          'channelTitle': 'channel',
+          'title': f'title {video_id}',
+          'description': '',
+          'liveBroadcastContent': 'live',
+          'thumbnails': {
+            'default': {'url': 'https://i.ytimg.com/d.jpg', 'width': 120, 'height': 90},  # noqa: E501
+            'maxres': {'url': 'https://i.ytimg.com/m.jpg', 'width': 1280, 'height': 720},  # noqa: E501
+          },
+        },
+        'status': {
+          'uploadStatus': 'uploaded',
+          'privacyStatus': privacy_status,
+        },
+        'liveStreamingDetails': {
+          'actualStartTime': '2023-10-01T12:00:00Z',
+          'concurrentViewers': '100',
+        },
+      }
+      for video_id in video_ids
+    ],
+  }
+
+
+class FakeAsyncClient:
+  def __init__(self):
+    self.urls = []
+
+  async def get(self, url, headers, params=None, read_text=None):
+    self.urls.append(url)
+
+    if url == ytlive.search_api_url:
+      response = build_search_list_response(['v1', 'v2'])
+    else:
+      response = build_videos_list_response(params['id'].split(','))
+
+    return AsyncLiveInfoResponse(
+      status_code=200,
+      headers={},
+      text=json.dumps(response),
+    )
+
+
+def test_build_ytlive_programs_result_drops_not_public_videos():
+  videos_list_result = ytlive.build_ytlive_videos_list_result(
+    status_code=200,
+    response=build_videos_list_response(['v1'], privacy_status='unlisted'),
+  )
+
+  result = ytlive.build_ytlive_programs_result(
+    videos_list_result=videos_list_result,
+  )
+  assert result.result_type == 'success'
+  assert result.data.items == []
+
+
+def test_build_ytlive_programs_result_passes_items_through():
+  videos_list_result = ytlive.build_ytlive_videos_list_result(
+    status_code=200,
+    response=build_videos_list_response(['v1', 'v2']),
+  )
+  assert videos_list_result.result_type == 'success'
+
+  result = ytlive.build_ytlive_programs_result(
+    videos_list_result=videos_list_result,
+  )
+  assert result.result_type == 'success'
+  assert len(result.data.items) == 2
+  for item, videos_list_item in zip(
+    result.data.items,
+    videos_list_result.data.items,
+  ):
+    assert item is videos_list_item
+
+  item = result.data.items[0]
+  assert item.thumbnails.default is not None
+  assert item.thumbnails.medium is None
+  assert not hasattr(item, '__dict__')
+  assert not hasattr(item.thumbnails.default, '__dict__')
+
+  assert pickle.loads(pickle.dumps(result)) == result
+  assert load_dataclass(
+    ytlive.GetYtliveProgramsResult,
+    dump_dataclass(result),
+  ) == result
+
+
+def test_ytlive_dataclass_slots_match_fields():
+  for value in vars(ytlive).values():
+    if isinstance(value, type) and dataclasses.is_dataclass(value) \
+        and value.__name__.startswith('GetYtlive'):
+      assert value.__slots__ == tuple(
+        field.name for field in dataclasses.fields(value)
+      ), value.__name__
+
+
+def test_aget_ytlive_programs():
+  client = FakeAsyncClient()
+
+  result = asyncio.run(
+    ytlive.aget_ytlive_programs(
+      channel_id='UC0000000000000000000000',
+      useragent='test',
+      api_key='key',
+      client=client,  # type: ignore
+    )
+  )
+
+  assert client.urls == [ytlive.search_api_url, ytlive.videos_api_url]
+  assert result.result_type == 'success'
+  assert [item.video_id for item in result.data.items] == ['v1', 'v2']
+  assert result.data.items[0].thumbnails.maxres is not None
+  assert result.data.items[0].thumbnails.medium is None
+
+
+class FakeResponse:
+  def __init__(self, status_code, response, headers=None):
+    self.status_code = status_code
+    self.response = response
+    self.headers = headers or {}
+
+  def json(self):
+    return self.response
+
+  def close(self):
+    pass
+
+
+class FakeClient:
+  def __init__(self):
+    self.urls = []
+
+  def get(self, url, headers, params=None, stream=False):
+    self.urls.append(url)
+
+    if url == ytlive.search_api_url:
+      return FakeResponse(200, build_search_list_response(['v1', 'v2']))
+
+    return FakeResponse(
+      200,
+      build_videos_list_response(params['id'].split(',')),
+    )
+
+
+def test_get_ytlive_programs_reuses_client():
+  client = FakeClient()
+
+  result = ytlive.get_ytlive_programs(
+    channel_id='UC0000000000000000000000',
+    useragent='test',
+    api_key='key',
+    client=client,  # type: ignore
+  )
+
+  assert client.urls == [ytlive.search_api_url, ytlive.videos_api_url]
+  assert result.result_type == 'success'
+  assert [item.video_id for item in result.data.items] == ['v1', 'v2']
+
+
+def test_get_ytlive_videos_list_reuses_cached_result_on_not_modified():
+  class FakeConditionalClient:
+    def __init__(self):
+      self.request_headers = []
+
+    def get(self, url, headers, params=None, stream=False):
+      self.request_headers.append(headers)
+
+      if headers.get('If-None-Match') == '"etag-1"':
+        return FakeResponse(304, None)
+
+      return FakeResponse(
+        200,
+        build_videos_list_response(['v1']),
+        headers={'ETag': '"etag-1"'},
+      )
+
+  client = FakeConditionalClient()
+  conditional_cache = ytlive.YtliveConditionalCache()
+
+  first_result = ytlive.get_ytlive_videos_list(
+    id='v1',
+    useragent='test',
+    api_key='key-1',
+    client=client,  # type: ignore
+    conditional_cache=conditional_cache,
+  )
+  second_result = ytlive.get_ytlive_videos_list(
+    id='v1',
+    useragent='test',
+    api_key='key-2',
+    client=client,  # type: ignore
+    conditional_cache=conditional_cache,
+  )
+
+  assert 'If-None-Match' not in client.request_headers[0]
+  assert client.request_headers[1]['If-None-Match'] == '"etag-1"'
+  assert first_result.result_type == 'success'
+  assert second_result is first_result
+
+
+def test_get_ytlive_programs_with_uploads_discovery():
+  class FakeUploadsClient:
+    def __init__(self):
+      self.requests = []
+
+    def get(self, url, headers, params=None, stream=False):
+      self.requests.append((url, params))
+
+      if url == ytlive.playlist_items_api_url:
+        return FakeResponse(200, {
+          'items': [
+            {'contentDetails': {'videoId': 'v1'}},
+            {'contentDetails': {'videoId': 'v2'}},
+          ],
+        })
+
+      return FakeResponse(
+        200,
+        build_videos_list_response(params['id'].split(',')),
+      )
+
+  client = FakeUploadsClient()
+
+  result = ytlive.get_ytlive_programs(
+    channel_id='UC0000000000000000000000',
+    useragent='test',
+    api_key='key',
+    client=client,  # type: ignore
+    discovery='uploads',
+  )
+
+  assert [url for url, _ in client.requests] == [
+    ytlive.playlist_items_api_url,
+    ytlive.videos_api_url,
+  ]
+  assert client.requests[0][1]['playlistId'] == 'UU0000000000000000000000'
+  assert result.result_type == 'success'
+  assert [item.video_id for item in result.data.items] == ['v1', 'v2']
+
+
+class FakePagingClient:
+  # search.list pages of two videos each, published one day apart
+  def __init__(self, page_count=3):
+    self.video_ids = [f'v{index}' for index in range(page_count * 2)]
+    self.requests = []
+
+  def get_response(self, url, params):
+    self.requests.append((url, params))
+
+    if url == ytlive.search_api_url:
+      page = int(params.get('pageToken', '0'))
+      video_ids = self.video_ids[page * 2:page * 2 + 2]
+      response = build_search_list_response(video_ids)
+      for index, item in enumerate(response['items']):
+        day = 30 - page * 2 - index
+        item['snippet']['publishedAt'] = f'2023-10-{day:02d}T12:00:00Z'
+      if page * 2 + 2 < len(self.video_ids):
+        response['nextPageToken'] = str(page + 1)
+      return response
+
+    return build_videos_list_response(params['id'].split(','))
+
+  def get(self, url, headers, params=None, stream=False):
+    return FakeResponse(200, self.get_response(url, params))
+
+
+def iter_ytlive_program_video_ids(client, **kwargs):
+  video_ids = []
+  for result in ytlive.iter_ytlive_programs(
+    channel_id='UC0000000000000000000000',
+    useragent='test',
+    api_key='key',
+    page_size=2,
+    client=client,
+    **kwargs,
+  ):
+    assert result.result_type == 'success'
+    video_ids.append([item.video_id for item in result.data.items])
+
+  return video_ids
+
+
+def test_iter_ytlive_programs_follows_pages():
+  client = FakePagingClient()
+
+  assert iter_ytlive_program_video_ids(client) == [
+    ['v0', 'v1'], ['v2', 'v3'], ['v4', 'v5'],
+  ]
+  search_params = [
+    params for url, params in client.requests
+    if url == ytlive.search_api_url
+  ]
+  assert [params.get('pageToken') for params in search_params] == [
+    None, '1', '2',
+  ]
+  assert search_params[0]['maxResults'] == '2'
+
+
+def test_iter_ytlive_programs_stops():
+  client = FakePagingClient()
+  assert iter_ytlive_program_video_ids(client, max_count=3) == [
+    ['v0', 'v1'], ['v2'],
+  ]
+  assert len(client.requests) == 4
+
+  client = FakePagingClient()
+  assert iter_ytlive_program_video_ids(
+    client,
+    stop_video_ids={'v2', 'v3'},
+  ) == [['v0', 'v1']]
+  # no videos.list request for the page of the seen video
+  assert [url for url, _ in client.requests] == [
+    ytlive.search_api_url,
+    ytlive.videos_api_url,
+    ytlive.search_api_url,
+  ]
+
+  client = FakePagingClient()
+  assert iter_ytlive_program_video_ids(
+    client,
+    published_after='2023-10-28T00:00:00+09:00',
+  ) == [['v0', 'v1'], ['v2']]
+
+
+def test_aiter_ytlive_programs():
+  class FakeAsyncPagingClient(FakePagingClient):
+    async def get(self, url, headers, params=None, read_text=None):
+      return AsyncLiveInfoResponse(
+        status_code=200,
+        headers={},
+        text=json.dumps(self.get_response(url, params)),
+      )
+
+  async def collect():
+    return [
+      [item.video_id for item in result.data.items]
+      async for result in ytlive.aiter_ytlive_programs(
+        channel_id='UC0000000000000000000000',
+        useragent='test',
+        api_key='key',
+        max_count=3,
+        page_size=2,
+        client=FakeAsyncPagingClient(),  # type: ignore
+      )
+    ]
+
+  assert asyncio.run(collect()) == [['v0', 'v1'], ['v2']]
+
+
+def test_get_ytlive_programs_with_sync_state():
+  # v1: ended live stream, v2: on air, v3: normal video, v4: new upcoming
+  discovered_video_ids = ['v1', 'v2', 'v3']
+  live_broadcast_contents = {'v1': 'none', 'v2': 'live', 'v4': 'upcoming'}
+
+  class FakeSyncClient:
+    def __init__(self):
+      self.videos_list_ids = []
+
+    def get(self, url, headers, params=None, stream=False):
+      if url == ytlive.search_api_url:
+        return FakeResponse(
+          200,
+          build_search_list_response(discovered_video_ids),
+        )
+
+      video_ids = params['id'].split(',')
+      self.videos_list_ids.append(video_ids)
+
+      response = build_videos_list_response([
+        video_id for video_id in video_ids
+        if video_id in live_broadcast_contents
+      ])
+      for item in response['items']:
+        live_broadcast_content = live_broadcast_contents[item['id']]
+        item['snippet']['liveBroadcastContent'] = live_broadcast_content
+        if live_broadcast_content == 'none':
+          item['liveStreamingDetails']['actualEndTime'] = \
+            '2023-10-01T14:00:00Z'
+
+      return FakeResponse(200, response)
+
+  client = FakeSyncClient()
+  sync_state = ytlive.YtliveSyncState()
+
+  def get_video_ids():
+    result = ytlive.get_ytlive_programs(
+      channel_id='UC0000000000000000000000',
+      useragent='test',
+      api_key='key',
+      client=client,  # type: ignore
+      sync_state=sync_state,
+    )
+    assert result.result_type == 'success'
+    return [item.video_id for item in result.data.items]
+
+  assert get_video_ids() == ['v1', 'v2']
+  assert get_video_ids() == ['v1', 'v2']
+
+  discovered_video_ids[:] = ['v4', 'v1', 'v2', 'v3']
+  assert get_video_ids() == ['v4', 'v1', 'v2']
+
+  live_broadcast_contents['v2'] = 'none'
+  live_broadcast_contents['v4'] = 'none'
+  assert get_video_ids() == ['v4', 'v1', 'v2']
+  assert get_video_ids() == ['v4', 'v1', 'v2']
+
+  assert client.videos_list_ids == [
+    ['v1', 'v2', 'v3'],
+    ['v2'],
+    ['v4', 'v2'],
+    ['v4', 'v2'],
+  ]
+
+
+def test_estimate_ytlive_programs_quota_cost():
+  assert ytlive.estimate_ytlive_programs_quota_cost(discovery='search') == 101
+  assert ytlive.estimate_ytlive_programs_quota_cost(
+    discovery='uploads',
+    channel_count=1000,
+  ) == 2000
+
+
+def test_get_ytlive_programs_batch_packs_videos_list_requests():
+  channel_video_ids = {
+    'UC0000000000000000000001': [f'a{index}' for index in range(40)],
+    'UC0000000000000000000002': [f'b{index}' for index in range(30)],
+  }
+
+  class FakeBatchClient:
+    def __init__(self):
+      self.videos_list_ids = []
+
+    def get(self, url, headers, params=None, stream=False):
+      if url == ytlive.search_api_url:
+        return FakeResponse(
+          200,
+          build_search_list_response(channel_video_ids[params['channelId']]),
+        )
+
+      video_ids = params['id'].split(',')
+      self.videos_list_ids.append(video_ids)
+      return FakeResponse(200, build_videos_list_response(video_ids))
+
+  client = FakeBatchClient()
+
+  results = ytlive.get_ytlive_programs_batch(
+    channel_ids=list(channel_video_ids.keys()),
+    useragent='test',
+    api_key='key',
+    client=client,  # type: ignore
+  )
+
+  assert [len(ids) for ids in client.videos_list_ids] == [50, 20]
+  assert list(results.keys()) == list(channel_video_ids.keys())
+  for channel_id, video_ids in channel_video_ids.items():
+    result = results[channel_id]
+    assert result.result_type == 'success'
+    assert [item.video_id for item in result.data.items] == video_ids
+
+
+def test_ytlive_api_key_pool_spreads_quota():
+  pool = ytlive.YtliveApiKeyPool(api_keys=['a', 'b'], daily_quota=250)
+
+  assert [pool.acquire(api_name='search.list') for _ in range(4)] == \
+    ['a', 'b', 'a', 'b']
+  assert pool.get_usage(api_key='a') == 200
+
+  # 50 units left per key: videos.list only
+  assert pool.acquire(api_name='search.list') is None
+  assert pool.acquire(api_name='videos.list') == 'a'
+
+
+def test_get_ytlive_programs_rotates_api_keys_on_quota_exceeded():
+  quota_exceeded = {
+    'error': {
+      'code': 403,
+      'errors': [{'domain': 'youtube.quota', 'reason': 'quotaExceeded'}],
+    },
+  }
+
+  class FakeQuotaClient(FakeClient):
+    def __init__(self):
+      super().__init__()
+      self.api_keys = []
+
+    def get(self, url, headers, params=None, stream=False):
+      self.api_keys.append(params['key'])
+      if params['key'] == 'a':
+        return FakeResponse(403, quota_exceeded)
+
+      return super().get(url, headers=headers, params=params)
+
+  client = FakeQuotaClient()
+  pool = ytlive.YtliveApiKeyPool(api_keys=['a', 'b'])
+
+  result = ytlive.get_ytlive_programs(
+    channel_id='UC0000000000000000000000',
+    useragent='test',
+    api_key=pool,
+    client=client,  # type: ignore
+  )
+
+  assert result.result_type == 'success'
+  assert client.api_keys == ['a', 'b', 'b']
+
+  # forbidden without a request once every key is exhausted
+  pool.mark_exhausted(api_key='b')
+  result = ytlive.get_ytlive_programs(
+    channel_id='UC0000000000000000000000',
+    useragent='test',
+    api_key=pool,
+    client=client,  # type: ignore
+  )
+
+  assert result.result_type == 'unknown_error'
+  assert client.api_keys == ['a', 'b', 'b']
+  assert ytlive.get_ytlive_search_list_video(
+    channel_id='UC0000000000000000000000',
+    useragent='test',
+    api_key=pool,
+    client=client,  # type: ignore
+  ).result_type == 'forbidden'
+
+
+def test_get_ytlive_quota_date():
+  # PST (UTC-8)
+  assert ytlive.get_ytlive_quota_date(
+    datetime(2024, 1, 15, 7, 59, tzinfo=timezone.utc),
+  ) == date(2024, 1, 14)
+  assert ytlive.get_ytlive_quota_date(
+    datetime(2024, 1, 15, 8, 0, tzinfo=timezone.utc),
+  ) == date(2024, 1, 15)
+
+  # PDT (UTC-7) from 2024-03-10 2:00 PST
+  assert ytlive.get_ytlive_quota_date(
+    datetime(2024, 7, 15, 7, 0, tzinfo=timezone.utc),
+  ) == date(2024, 7, 15)
+  assert ytlive.get_ytlive_quota_date(
+    datetime(2024, 3, 10, 9, 59, tzinfo=timezone.utc),
+  ) == date(2024, 3, 10)
+  assert ytlive.get_ytlive_quota_date(
+    datetime(2024, 11, 3, 8, 59, tzinfo=timezone.utc),
+  ) == date(2024, 11, 3)